@@ -0,0 +1,67 @@
+"""
+Benchmark the resolution of `EnhancedWidget.main_window`, which is used in many hot paths.
+
+Usage:
+
+    $ python benchmarks/bench_main_window.py
+
+Set `MCQ_EDITOR_PROFILE=1` to display the instrumentation report too.
+"""
+
+import contextlib
+import io
+import os
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication, QWidget  # noqa: E402
+
+import ptyx_mcq_editor.param as param  # noqa: E402
+from ptyx_mcq_editor.main_window import McqEditorMainWindow  # noqa: E402
+from ptyx_mcq_editor.tools import instrumentation  # noqa: E402
+
+
+def walk_parent_chain(widget: QWidget) -> QWidget:
+    """Previous implementation of `EnhancedWidget.main_window` (without cache)."""
+    while widget.parent() is not None:
+        widget = widget.parent()  # type: ignore
+    return widget
+
+
+def main(args: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Benchmark `EnhancedWidget.main_window` resolution.")
+    parser.add_argument("-n", type=int, default=100_000, help="Number of accesses (default: 100000).")
+    parsed_args = parser.parse_args(args)
+    param.DEBUG = False
+    app = QApplication(sys.argv)
+    with contextlib.redirect_stdout(io.StringIO()):
+        window = McqEditorMainWindow()
+        window.file_events_handler.new_session()
+        window.file_events_handler.new_doc()
+        editor = window.file_events_handler.current_editor()
+    assert editor is not None
+    print(f"{parsed_args.n} accesses from the editor widget:")
+    start = perf_counter()
+    for _ in range(parsed_args.n):
+        assert walk_parent_chain(editor) is window
+    uncached = perf_counter() - start
+    print(f"  parent chain walk: {1e6 * uncached / parsed_args.n:6.2f} µs/access")
+    start = perf_counter()
+    for _ in range(parsed_args.n):
+        assert editor.main_window is window
+    cached = perf_counter() - start
+    print(
+        f"  cached property:   {1e6 * cached / parsed_args.n:6.2f} µs/access ({uncached / cached:.1f}x faster)"
+    )
+    if instrumentation.ENABLED:
+        print()
+        print(instrumentation.format_report())
+    window.compilation_tabs.pdf_viewer.doc.close()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
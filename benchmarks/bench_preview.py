@@ -0,0 +1,190 @@
+"""
+End-to-end latency of the preview, from the compilation request to the display of the result.
+
+The preview is generated like in the editor, through `CompilationTabs._run_compilation()`,
+either in another thread (the default in the editor) or in the main thread.
+For each document of the corpus, the first compilation is reported as "cold",
+the following ones as "warm".
+
+By default, the LaTeX compiler is replaced by a stub, generating a one-page pdf file
+(optionally after a simulated delay), so that no TeX installation is needed.
+Use `--real-tex` to measure the real LaTeX compilation time.
+
+The corpus defaults to the exercises of the pTyX-MCQ template, and to synthetic exams
+(see `synthetic.py`). Use `--corpus` to benchmark your own documents.
+
+Usage:
+
+    $ python benchmarks/bench_preview.py --repeat 10 --json preview.json
+    $ python benchmarks/bench_preview.py --corpus ~/exams --real-tex
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from collections import deque
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import ptyx.compilation  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+from ptyx.compilation import SingleFileCompilationInfo  # noqa: E402
+from ptyx_mcq.other_commands.template import get_template_path  # noqa: E402
+
+import ptyx_mcq_editor.param as param  # noqa: E402
+from ptyx_mcq_editor.main_window import McqEditorMainWindow  # noqa: E402
+from ptyx_mcq_editor.preview import tab_widget  # noqa: E402
+from ptyx_mcq_editor.tools import compilation_trace  # noqa: E402
+from ptyx_mcq_editor.tools.instrumentation import Stats  # noqa: E402
+from ptyx_mcq_editor.tools.file_tools import collect_files  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic import write_corpus  # noqa: E402
+
+# Stages of the compilation trace reported besides the total latency.
+STAGES = ("process_spawn", "Compiler.parse", "compile_latex_to_pdf", "pdf_load")
+
+
+def minimal_pdf() -> bytes:
+    """Return a valid pdf document, with a single empty page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>",
+    ]
+    content = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+    xref = len(content)
+    content += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    content += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    content += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return content
+
+
+def stub_compile_latex_to_pdf(
+    filename: Path, dest: Path | None = None, quiet: bool | None = False, delay: float = 0.0
+) -> SingleFileCompilationInfo:
+    """Replacement of `ptyx.compilation.compile_latex_to_pdf()`, which doesn't need LaTeX."""
+    time.sleep(delay)
+    pdf_path = (filename.parent if dest is None else dest) / f"{filename.stem}.pdf"
+    pdf_path.write_bytes(minimal_pdf())
+    return SingleFileCompilationInfo(page_count=1, errors={}, src=filename, dest=pdf_path)
+
+
+def default_corpus(directory: Path) -> list[Path]:
+    template = get_template_path()
+    paths = sorted((template / "questions").glob("*.ex"))
+    paths.append(template / "new.ptyx")
+    for questions in (10, 50):
+        paths.append(write_corpus(directory / f"synthetic-{questions}", questions))
+    return paths
+
+
+def compile_preview(
+    app: QApplication, window: McqEditorMainWindow, doc_path: Path, tmp_dir: Path, use_another_thread: bool
+) -> dict[str, float]:
+    """Compile the preview of the document, and return the latency and the duration of each stage."""
+    tabs = window.compilation_tabs
+    code = doc_path.read_text(encoding="utf8")
+    # The viewers must load the files generated in the temporary directory.
+    window.get_preview_dir = lambda path: tmp_dir  # type: ignore
+    start = perf_counter()
+    # noinspection PyProtectedMember
+    tabs._run_compilation(
+        code=code,
+        doc_path=doc_path,
+        tmp_dir=tmp_dir,
+        pdf=True,
+        target_widget=tabs.pdf_viewer,
+        _use_another_thread=use_another_thread,
+    )
+    worker = tabs.worker
+    # The result is displayed before the end of the compilation is notified.
+    while tabs.current_compilation_info.is_running:
+        app.processEvents()
+        time.sleep(0.001)
+    timings = {"latency": perf_counter() - start}
+    timings.update((stage, worker.trace.stages.get(stage, 0.0)) for stage in STAGES)
+    return timings
+
+
+def main(args: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Benchmark the end-to-end latency of the preview.")
+    parser.add_argument("--corpus", type=Path, nargs="+", help="Documents (or directories) to compile.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of warm compilations (default: 5).")
+    parser.add_argument("--real-tex", action="store_true", help="Use the real LaTeX compiler.")
+    parser.add_argument(
+        "--latex-delay", type=float, default=0.0, help="Simulated duration of the LaTeX stub, in seconds."
+    )
+    parser.add_argument(
+        "--mode", choices=("thread", "main-thread", "both"), default="both", help="Where to run the worker."
+    )
+    parser.add_argument("--json", type=Path, metavar="JSON_PATH", help="Save the results as JSON.")
+    parsed_args = parser.parse_args(args)
+    param.DEBUG = False
+    app = QApplication(sys.argv)
+    modes = {"thread": [True], "main-thread": [False], "both": [True, False]}[parsed_args.mode]
+    results: list[dict[str, Any]] = []
+    with TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        if not parsed_args.real_tex:
+            # The compiler imports `compile_latex_to_pdf()` only when needed.
+            ptyx.compilation.compile_latex_to_pdf = partial(  # type: ignore
+                stub_compile_latex_to_pdf, delay=parsed_args.latex_delay
+            )
+        # Don't pollute the user compilation history.
+        tab_widget.append_to_history = partial(  # type: ignore
+            compilation_trace.append_to_history, history_path=tmp_dir / "history.jsonl"
+        )
+        corpus = list(collect_files(parsed_args.corpus)) if parsed_args.corpus else default_corpus(tmp_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            window = McqEditorMainWindow()
+            window.file_events_handler.new_session()
+            for use_another_thread in modes:
+                for i, doc_path in enumerate(corpus):
+                    preview_dir = tmp_dir / f"preview-{use_another_thread}-{i}"
+                    preview_dir.mkdir()
+                    for run in range(1 + parsed_args.repeat):
+                        timings = compile_preview(app, window, doc_path, preview_dir, use_another_thread)
+                        results.append(
+                            {
+                                "doc_path": str(doc_path),
+                                "mode": "thread" if use_another_thread else "main-thread",
+                                "phase": "cold" if run == 0 else "warm",
+                                "timings": timings,
+                            }
+                        )
+        window.compilation_tabs.pdf_viewer.doc.close()
+    print(
+        f"Preview latency, {len(corpus)} documents, {'real LaTeX' if parsed_args.real_tex else 'LaTeX stub'}:"
+    )
+    print(f"{'mode':<12} {'phase':<5} {'measure':<22} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    summary = []
+    for mode in dict.fromkeys(result["mode"] for result in results):
+        for phase in ("cold", "warm"):
+            selected = [r["timings"] for r in results if r["mode"] == mode and r["phase"] == phase]
+            for measure in ("latency",) + STAGES:
+                stats = Stats(samples=deque(timings[measure] for timings in selected))
+                p50, p95 = stats.percentile(50), stats.percentile(95)
+                summary.append({"mode": mode, "phase": phase, "measure": measure, "p50": p50, "p95": p95})
+                print(f"{mode:<12} {phase:<5} {measure:<22} {1000 * p50:>10.1f} {1000 * p95:>10.1f}")
+    if parsed_args.json is not None:
+        data = {"real_tex": parsed_args.real_tex, "summary": summary, "runs": results}
+        parsed_args.json.write_text(json.dumps(data, indent=2), encoding="utf8")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
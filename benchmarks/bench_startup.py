@@ -0,0 +1,124 @@
+"""
+Benchmark the startup time of the editor, from the launch of the python interpreter
+to the first paint of the main window.
+
+Each run is done in a new python process, so that no module is already imported.
+With `--entry-point`, the whole `mcq-editor --dry-run` command is timed instead, as launched
+from the desktop shortcut (so without `PYTHONHASHSEED` set), until the end of the process.
+
+The cumulative import time of the slowest modules is reported too (using `python -X importtime`),
+to find which imports should be deferred.
+
+Usage:
+
+    $ python benchmarks/bench_startup.py --repeat 10 --top 15
+    $ python benchmarks/bench_startup.py --entry-point
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Wall-clock time of the launch of the child process, set by the parent process.
+START_ENV_VAR = "MCQ_EDITOR_BENCH_START"
+
+
+def child() -> None:
+    """Launch the editor, and print the time elapsed until the first paint of the main window."""
+    start = float(os.environ[START_ENV_VAR])
+    from PyQt6.QtCore import QObject, QEvent, QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    import ptyx_mcq_editor.param as param
+    from ptyx_mcq_editor.main_window import McqEditorMainWindow
+
+    imported = time.time()
+    param.DEBUG = False
+    app = QApplication(sys.argv)
+    window = McqEditorMainWindow()
+
+    class PaintFilter(QObject):
+        def eventFilter(self, obj: QObject | None, event: QEvent | None) -> bool:  # noqa: N802
+            if event is not None and event.type() == QEvent.Type.Paint:
+                print(f"imports={imported - start} first_paint={time.time() - start}", file=sys.__stdout__)
+                sys.__stdout__.flush()  # type: ignore
+                QTimer.singleShot(0, app.quit)
+                app.removeEventFilter(self)
+            return False
+
+    paint_filter = PaintFilter()
+    app.installEventFilter(paint_filter)
+    window.show()
+    app.exec()
+    window.compilation_tabs.pdf_viewer.doc.close()
+
+
+def measure_startup() -> dict[str, float]:
+    env = dict(os.environ, **{START_ENV_VAR: repr(time.time())})
+    output = subprocess.run(
+        [sys.executable, __file__, "--child"], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    match = re.search(r"imports=(\S+) first_paint=(\S+)", output)
+    assert match is not None, output
+    return {"imports": float(match.group(1)), "first_paint": float(match.group(2))}
+
+
+def measure_entry_point() -> dict[str, float]:
+    env = dict(os.environ)
+    env.pop("PYTHONHASHSEED", None)
+    start = time.time()
+    subprocess.run(
+        [sys.executable, "-m", "ptyx_mcq_editor.app", "--dry-run"], env=env, capture_output=True, check=True
+    )
+    return {"entry_point": time.time() - start}
+
+
+def import_times(module: str = "ptyx_mcq_editor.app") -> dict[str, float]:
+    """Return the cumulative import time (in seconds) of each module imported by `module`."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True
+    ).stderr
+    times: dict[str, float] = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(\S+)", line.strip())
+        if match is not None:
+            times[match.group(2)] = int(match.group(1)) / 1e6
+    return times
+
+
+def main(args: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Benchmark the startup time of the editor.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of launches (default: 5).")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to display.")
+    parser.add_argument(
+        "--entry-point", action="store_true", help="Time the whole `mcq-editor --dry-run` command."
+    )
+    parser.add_argument("--child", action="store_true", help="Used internally.")
+    parsed_args = parser.parse_args(args)
+    if parsed_args.child:
+        child()
+        return
+    measure_func = measure_entry_point if parsed_args.entry_point else measure_startup
+    results = [measure_func() for _ in range(parsed_args.repeat)]
+    print(f"Startup time ({parsed_args.repeat} launches):")
+    for measure in results[0]:
+        values = [result[measure] for result in results]
+        print(
+            f"  {measure:<12} median: {1000 * statistics.median(values):8.1f} ms   max: {1000 * max(values):8.1f} ms"
+        )
+    times = import_times()
+    print(f"\nSlowest imports (cumulative, top {parsed_args.top}):")
+    # Skip the root module, whose cumulative time is the total.
+    slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[1 : parsed_args.top + 1]
+    for module, duration in slowest:
+        print(f"  {module:<50} {1000 * duration:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
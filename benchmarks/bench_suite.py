@@ -0,0 +1,288 @@
+"""
+Benchmark suite of the editor hot paths (lexer, python code analysis, search), on synthetic exams.
+
+Synthetic documents of growing size are generated (see `synthetic.py`), then each benchmark
+is run on each of them. Benchmarks are written in the style of pytest-benchmark: they receive
+a `benchmark` fixture, and call it with the function to measure.
+
+Results may be saved as JSON, then compared with a previous run, to track regressions between releases:
+
+    $ python benchmarks/bench_suite.py --sizes 10 50 200 --json results-1.1.0.json
+    $ python benchmarks/bench_suite.py --compare results-1.1.0.json
+
+The Qt `offscreen` platform is used by default, so no display is needed.
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Any
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+import ptyx_mcq_editor.param as param  # noqa: E402
+from ptyx_mcq_editor.editor.editor_widget import EditorWidget  # noqa: E402
+from ptyx_mcq_editor.main_window import McqEditorMainWindow  # noqa: E402
+from ptyx_mcq_editor.tools import python_code_tools  # noqa: E402
+from ptyx_mcq_editor.tools.python_code_tools import (  # noqa: E402
+    check_each_python_block,
+    format_each_python_block,
+)
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic import write_corpus  # noqa: E402
+
+
+@dataclass
+class BenchmarkFixture:
+    """Minimal equivalent of pytest-benchmark `benchmark` fixture."""
+
+    rounds: int
+    warmup_rounds: int = 1
+    durations: list[float] = field(default_factory=list)
+
+    def __call__(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return self.pedantic(func, args, kwargs)
+
+    def pedantic(
+        self,
+        func: Callable[..., Any],
+        args: tuple = (),
+        kwargs: dict[str, Any] | None = None,
+        setup: Callable[[], Any] | None = None,
+        rounds: int | None = None,
+        warmup_rounds: int | None = None,
+    ) -> Any:
+        """Run `func` `rounds` times, calling `setup` (not measured) before each call."""
+        kwargs = kwargs or {}
+        result = None
+        if rounds is None:
+            rounds = self.rounds
+        if warmup_rounds is None:
+            warmup_rounds = self.warmup_rounds
+        for i in range(warmup_rounds + rounds):
+            if setup is not None:
+                setup()
+            start = perf_counter()
+            result = func(*args, **kwargs)
+            duration = perf_counter() - start
+            if i >= warmup_rounds:
+                self.durations.append(duration)
+        return result
+
+    def stats(self) -> dict[str, float]:
+        durations = self.durations
+        return {
+            "min": min(durations),
+            "max": max(durations),
+            "mean": statistics.mean(durations),
+            "median": statistics.median(durations),
+            "stddev": statistics.stdev(durations) if len(durations) > 1 else 0.0,
+            "rounds": len(durations),
+        }
+
+
+@dataclass
+class Context:
+    window: McqEditorMainWindow
+    editor: EditorWidget
+    # Code of the synthetic document.
+    code: str
+
+
+def bench_lexer(benchmark: BenchmarkFixture, context: Context) -> None:
+    editor = context.editor
+    benchmark(editor.lexer().styleText, 0, editor.length())
+
+
+def bench_check_python_blocks(benchmark: BenchmarkFixture, context: Context) -> None:
+    benchmark(check_each_python_block, context.code)
+
+
+def bench_format_python_blocks(benchmark: BenchmarkFixture, context: Context) -> None:
+    # Measure formatting without cache, like when opening a document.
+    # noinspection PyProtectedMember
+    benchmark.pedantic(
+        format_each_python_block, (context.code,), setup=python_code_tools._formatted_blocks_cache.clear
+    )
+
+
+def bench_include_indicators(benchmark: BenchmarkFixture, context: Context) -> None:
+    benchmark(context.editor.update_include_indicators)
+
+
+def _reset_search_highlighting(context: Context) -> None:
+    """Forget the highlighted search results, so that the next highlighting starts from scratch."""
+    search_dock = context.window.search_dock
+    # noinspection PyProtectedMember
+    search_dock._reset_highlighting()
+    search_dock._matches_cache.clear()
+
+
+def bench_highlight_find_results(benchmark: BenchmarkFixture, context: Context) -> None:
+    """Highlight all the results, including the ones outside the visible part of the document."""
+    search_dock = context.window.search_dock
+    search_dock.setVisible(True)
+    search_dock.find_field.setText("Compute")
+
+    def highlight() -> None:
+        search_dock.highlight_all_find_results()
+        search_dock.finish_highlighting()
+
+    try:
+        benchmark.pedantic(highlight, setup=lambda: _reset_search_highlighting(context))
+    finally:
+        search_dock.setVisible(False)
+
+
+def bench_highlight_visible_find_results(benchmark: BenchmarkFixture, context: Context) -> None:
+    """Highlight the results in the visible part of the document (the other ones are highlighted later)."""
+    search_dock = context.window.search_dock
+    search_dock.setVisible(True)
+    search_dock.find_field.setText("Compute")
+    try:
+        benchmark.pedantic(
+            search_dock.highlight_all_find_results, setup=lambda: _reset_search_highlighting(context)
+        )
+    finally:
+        search_dock.setVisible(False)
+
+
+def bench_selection_changed(benchmark: BenchmarkFixture, context: Context) -> None:
+    """Move the cursor while search results are highlighted."""
+    search_dock = context.window.search_dock
+    editor = context.editor
+    search_dock.setVisible(True)
+    search_dock.find_field.setText("Compute")
+    search_dock.finish_highlighting()
+
+    def move_cursor() -> None:
+        line, index = editor.getCursorPosition()
+        editor.setCursorPosition((line + 1) % editor.lines(), 0)
+
+    try:
+        benchmark(move_cursor)
+    finally:
+        search_dock.setVisible(False)
+
+
+def bench_replace_all(benchmark: BenchmarkFixture, context: Context) -> None:
+    search_dock = context.window.search_dock
+    search_dock.find_field.setText("Compute")
+    search_dock.replace_field.setText("Calculate")
+
+    def setup() -> None:
+        context.editor.setText(context.code)
+        context.editor.setCursorPosition(0, 0)
+
+    try:
+        benchmark.pedantic(search_dock.replace_all, setup=setup)
+    finally:
+        setup()
+
+
+BENCHMARKS: dict[str, Callable[[BenchmarkFixture, Context], None]] = {
+    "lexer": bench_lexer,
+    "check_python_blocks": bench_check_python_blocks,
+    "format_python_blocks": bench_format_python_blocks,
+    "include_indicators": bench_include_indicators,
+    "highlight_find_results": bench_highlight_find_results,
+    "highlight_visible_find_results": bench_highlight_visible_find_results,
+    "selection_changed": bench_selection_changed,
+    "replace_all": bench_replace_all,
+}
+
+
+def machine_info() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+    }
+
+
+def run(sizes: list[int], names: list[str], rounds: int) -> list[dict[str, Any]]:
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()), TemporaryDirectory() as tmp_dir:
+        window = McqEditorMainWindow()
+        window.file_events_handler.new_session()
+        for size in sizes:
+            path = write_corpus(Path(tmp_dir), size)
+            code = path.read_text(encoding="utf8")
+            window.file_events_handler.open_doc(paths=[path])
+            editor = window.file_events_handler.current_editor()
+            assert editor is not None
+            context = Context(window, editor, code)
+            for name in names:
+                benchmark = BenchmarkFixture(rounds=rounds)
+                BENCHMARKS[name](benchmark, context)
+                stats = benchmark.stats()
+                results.append({"name": name, "params": {"questions": size}, "stats": stats})
+                print(
+                    f"{name:<25} {size:>6} questions   median: {1000 * stats['median']:10.2f} ms",
+                    file=sys.__stdout__,
+                )
+    window.compilation_tabs.pdf_viewer.doc.close()
+    return results
+
+
+def compare(results: list[dict[str, Any]], previous_results: list[dict[str, Any]]) -> None:
+    """Display the ratio between the current and previous medians."""
+    previous = {(r["name"], r["params"]["questions"]): r["stats"]["median"] for r in previous_results}
+    print("\nComparison with previous results (median ratio, > 1 means slower):")
+    for result in results:
+        key = (result["name"], result["params"]["questions"])
+        if key in previous:
+            ratio = result["stats"]["median"] / previous[key]
+            warning = "  <-- regression?" if ratio > 1.2 else ""
+            print(f"  {key[0]:<25} {key[1]:>6} questions   {ratio:6.2f}{warning}")
+
+
+def main(args: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Benchmark the editor hot paths on synthetic exams.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 50, 200],
+        help="Numbers of questions (default: 10 50 200).",
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS), help="Benchmarks to run."
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="Number of measured runs (default: 5).")
+    parser.add_argument("--json", type=Path, metavar="JSON_PATH", help="Save the results as JSON.")
+    parser.add_argument("--compare", type=Path, metavar="JSON_PATH", help="Compare with previous results.")
+    parsed_args = parser.parse_args(args)
+    param.DEBUG = False
+    app = QApplication(sys.argv)
+    results = run(parsed_args.sizes, parsed_args.only, parsed_args.rounds)
+    if parsed_args.json is not None:
+        data = {
+            "datetime": datetime.now().isoformat(timespec="seconds"),
+            "machine_info": machine_info(),
+            "benchmarks": results,
+        }
+        parsed_args.json.write_text(json.dumps(data, indent=2), encoding="utf8")
+    if parsed_args.compare is not None:
+        compare(results, json.loads(parsed_args.compare.read_text(encoding="utf8"))["benchmarks"])
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark the synchronization of the tabs with the opened documents (`FileEventsHandler._update_ui()`).
+
+Usage:
+
+    $ python benchmarks/bench_update_ui.py --tabs 300
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Callable
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+import ptyx_mcq_editor.param as param  # noqa: E402
+from ptyx_mcq_editor.main_window import McqEditorMainWindow  # noqa: E402
+
+
+def measure(action: Callable[[], object], repeat: int) -> list[float]:
+    """Return the durations (in ms) of the action."""
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        action()
+        durations.append(1000 * (perf_counter() - start))
+    return durations
+
+
+def main(args: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Benchmark tabs synchronization with hundreds of tabs.")
+    parser.add_argument("--tabs", type=int, default=300, help="Number of opened documents (default: 300).")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of runs of each scenario.")
+    parsed_args = parser.parse_args(args)
+    param.DEBUG = False
+    app = QApplication(sys.argv)
+    # The editor is very verbose.
+    with contextlib.redirect_stdout(io.StringIO()):
+        window = McqEditorMainWindow()
+        handler = window.file_events_handler
+        settings = window.settings
+        handler.new_session()
+        for _ in range(parsed_args.tabs):
+            settings.new_doc()
+        docs = settings.docs()
+        # noinspection PyProtectedMember
+        handler._update_ui()
+
+        def move_first_to_last() -> None:
+            docs.move_doc(0, len(docs) - 1)
+            # noinspection PyProtectedMember
+            handler._update_ui()
+
+        def close_and_open() -> None:
+            settings.close_doc(None, len(docs) // 2)
+            settings.new_doc()
+            # noinspection PyProtectedMember
+            handler._update_ui()
+
+        scenarios = {
+            "no change": handler._update_ui,
+            "move a tab": move_first_to_last,
+            "close and open": close_and_open,
+        }
+        results = {name: measure(action, parsed_args.repeat) for name, action in scenarios.items()}
+    print(f"Tabs synchronization, {parsed_args.tabs} tabs ({parsed_args.repeat} runs):")
+    for name, durations in results.items():
+        print(f"  {name:<15} median: {statistics.median(durations):8.2f} ms   max: {max(durations):8.2f} ms")
+    window.compilation_tabs.pdf_viewer.doc.close()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
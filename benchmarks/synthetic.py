@@ -0,0 +1,115 @@
+"""
+Generate synthetic pTyX documents of any size, to benchmark the editor.
+
+Documents mimic real exams: a header, include directives, and many questions
+mixing python blocks (with `let` directives), `#ANSWERS_LIST` tags, formatted answers
+and variants (`OR`). Generation is deterministic for a given seed.
+
+Usage:
+
+    $ python benchmarks/synthetic.py /tmp/corpus --questions 200
+"""
+
+import random
+from argparse import ArgumentParser
+from pathlib import Path
+
+HEADER = """\
+#LOAD{mcq}
+#SEED{123456}
+
+===========================
+sty = amssymb, amsmath, [table]xcolor
+correct = 1
+incorrect = 0
+skipped = 0
+mode = all
+id format = 8 digits
+===========================
+
+"""
+
+WORDS = (
+    "value number edge square circle vertex function derivative integral limit sequence "
+    "matrix vector angle triangle probability event sample mean variance"
+).split()
+
+
+def _sentence(rng: random.Random, n_words: int = 8) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def generate_exercise(rng: random.Random, index: int = 0) -> str:
+    """Return the code of a single exercise, without the leading `*` (the `.ex` file format)."""
+    kind = index % 3
+    if kind == 0:
+        # Python generated question.
+        return (
+            "........................................\n"
+            f"# Question {index}\n"
+            "let a, b in -5..5 with a*b < 0\n"
+            "all_answers = list(range(-25, 26))\n"
+            "correct_answers = [a*b]\n"
+            f"values = [x**2 for x in range({rng.randint(3, 9)}) if x % 2 == 0]\n"
+            "........................................\n"
+            f"Compute $#a#*#b$ ({_sentence(rng)}).\n\n"
+            "#ANSWERS_LIST{all_answers}{correct_answers}\n"
+        )
+    if kind == 1:
+        # Formatted answers.
+        answers = rng.sample(range(1, 100), 5)
+        lines = [f"Compute the {_sentence(rng, 4)} of $x+{answers[0]}x$:", "", "@$%s$"]
+        lines.append(f"+ {answers[0] + 1}x")
+        lines.extend(f"- {n}x^2" for n in answers[1:])
+        return "\n".join(lines) + "\n"
+    # Question with a variant.
+    return (
+        f"Compute the {_sentence(rng, 3)} of a square ({_sentence(rng)}).\n"
+        "- 1\n- 2\n- 3\n+ 4\n\n- none\n\n"
+        "OR\n\n"
+        f"Compute the {_sentence(rng, 3)} of a circle.\n"
+        "- 1\n- 2\n- 3\n- 4\n+ none\n"
+    )
+
+
+def generate_document(questions: int, seed: int = 0, includes: int | None = None) -> str:
+    """Return the code of a `.ptyx` document with `questions` inline questions.
+
+    The document also includes `includes` external exercises (by default, a tenth of `questions`),
+    named `questions/q{i}.ex` (see `write_corpus()`).
+    """
+    rng = random.Random(seed)
+    if includes is None:
+        includes = questions // 10
+    parts = [HEADER, "<<<<<<<<<<<<<<<<<\n"]
+    parts.extend(f"-- questions/q{i}.ex\n" for i in range(includes))
+    parts.append("!-- questions/disabled.ex\n\n")
+    for i in range(questions):
+        parts.append(f"*\n{generate_exercise(rng, i)}\n")
+    parts.append(">>>>>>>>>>>>>>>>>\n")
+    return "".join(parts)
+
+
+def write_corpus(directory: Path, questions: int, seed: int = 0) -> Path:
+    """Write a `.ptyx` document and its included exercises in `directory`, and return the document path."""
+    rng = random.Random(seed)
+    includes = questions // 10
+    (directory / "questions").mkdir(parents=True, exist_ok=True)
+    for i in range(includes):
+        (directory / "questions" / f"q{i}.ex").write_text(generate_exercise(rng, i), encoding="utf8")
+    path = directory / f"exam-{questions}.ptyx"
+    path.write_text(generate_document(questions, seed, includes), encoding="utf8")
+    return path
+
+
+def main(args: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Generate a synthetic pTyX document and its included exercises.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--questions", type=int, default=100, help="Number of questions (default: 100).")
+    parser.add_argument("--seed", type=int, default=0)
+    parsed_args = parser.parse_args(args)
+    print(write_corpus(parsed_args.directory, parsed_args.questions, parsed_args.seed))
+
+
+if __name__ == "__main__":
+    main()
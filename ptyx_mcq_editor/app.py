@@ -1,5 +1,4 @@
 #!/usr/bin/python3
-import os
 import signal
 import sys
 from argparse import ArgumentParser
@@ -15,11 +14,14 @@ from PyQt6.QtWidgets import QMainWindow, QApplication, QMessageBox
 from argcomplete import FilesCompleter
 from ptyx.pretty_print import print_success
 
+from ptyx_mcq_editor.cli import COMMANDS, run_command
 from ptyx_mcq_editor.main_window import McqEditorMainWindow
 from ptyx_mcq_editor.param import ICON_PATH
 
 from ptyx_mcq_editor.signal_wake_up import SignalWakeupHandler
+from ptyx_mcq_editor.tools import instrumentation
 from ptyx_mcq_editor.tools.desktop_shortcut import install_desktop_shortcut
+from ptyx_mcq_editor.tools.preload import preload_modules
 
 
 def my_excepthook(
@@ -36,14 +38,12 @@ def my_excepthook(
     sys.__excepthook__(type_, value, traceback)
 
 
-def main(args: list | None = None, _verify_env=True) -> None:
-    # Make compilations more reproducible, by disabling PYTHONHASHSEED by default.
-    if _verify_env:
-        if not os.getenv("PYTHONHASHSEED"):
-            os.environ["PYTHONHASHSEED"] = "0"
-            os.execv(sys.executable, [sys.executable] + sys.argv)
-        assert os.getenv("PYTHONHASHSEED")
-    print("PYTHONHASHSEED:", os.getenv("PYTHONHASHSEED"))
+def main(args: list | None = None) -> None:
+    # Headless commands don't need the graphical interface.
+    if args is None:
+        args = sys.argv[1:]
+    if len(args) > 0 and args[0] in COMMANDS:
+        sys.exit(run_command(args))
 
     parser = ArgumentParser(description="Editor for pTyX and MCQ files.")
     parser.add_argument(
@@ -86,12 +86,15 @@ def main(args: list | None = None, _verify_env=True) -> None:
         else:
             main_window.show()
             print("Application launched.")
+            preload_modules()
             return_code = app.exec()
     except BaseException as e:
         # Warning: SystemExit doesn't seem to been catchable, it's probably already caught
         # at PyQt level, and cause Qt to quit.
         print("Exception catched.")
         raise e
+    if instrumentation.ENABLED:
+        print(instrumentation.format_report())
     print("Bye!")
     sys.exit(return_code)
 
@@ -0,0 +1,311 @@
+"""
+Headless commands of the editor, usable without launching the graphical interface.
+
+Usage examples:
+
+    $ mcq-editor sweep exercise.ex --seeds 1-50 --jobs 4
+    $ mcq-editor preview exercises/ --junit report.xml
+    $ mcq-editor lint exercises/ --format json
+    $ mcq-editor index ~/exercises-library
+    $ mcq-editor duplicates ~/exercises-library --threshold 0.9
+"""
+
+import json
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
+from ptyx.pretty_print import print_error, print_success
+
+from ptyx_mcq_editor.param import DUPLICATES_THRESHOLD, PREVIEW_CACHE_DIR, TRIGRAM_INDEX_PATH
+from ptyx_mcq_editor.tools.file_tools import collect_files
+
+
+def sweep_command(args: Namespace) -> int:
+    from ptyx_mcq_editor.preview.sweep import sweep, merge_pdfs, format_results_table, parse_seeds
+
+    doc_path: Path = args.path
+    if not doc_path.is_file():
+        print_error(f"File not found: '{doc_path}'.")
+        return 2
+    try:
+        doc_ids = parse_seeds(args.seeds)
+    except ValueError:
+        print_error(f"Invalid document numbers: '{args.seeds}'.")
+        return 2
+    if not doc_ids:
+        print_error(f"No document number found in '{args.seeds}'.")
+        return 2
+    code = doc_path.read_text(encoding="utf8")
+    with tempfile.TemporaryDirectory(prefix="mcq-editor-sweep-") as tmp_dir:
+        output_dir = args.output_dir if args.output_dir is not None else Path(tmp_dir)
+        results = sweep(
+            code,
+            doc_path,
+            doc_ids,
+            output_dir,
+            pdf=args.pdf is not None,
+            jobs=args.jobs,
+            verbose=args.verbose,
+        )
+        print(format_results_table(results))
+        if args.pdf is not None:
+            n = merge_pdfs(results, args.pdf)
+            print_success(f"{n} variants merged in '{args.pdf}'.")
+    return 1 if any(result.error for result in results) else 0
+
+
+def preview_command(args: Namespace) -> int:
+    from ptyx_mcq_editor.preview.batch import (
+        compile_previews,
+        write_json_report,
+        write_junit_report,
+        FileReport,
+    )
+
+    try:
+        paths = list(collect_files(args.paths))
+    except FileNotFoundError as e:
+        print_error(str(e))
+        return 2
+    total = len(paths)
+    done = 0
+
+    def feedback(report: FileReport) -> None:
+        nonlocal done
+        done += 1
+        message = f"[{done}/{total}] {report.status.upper():<6} {report.path} ({report.duration:.2f}s)"
+        if report.status == "failed":
+            print_error(f"{message}: {report.error}")
+        else:
+            print(message)
+
+    reports = compile_previews(
+        paths,
+        args.cache_dir,
+        doc_id=args.doc_id,
+        pdf=args.pdf,
+        force=args.force,
+        timeout=args.timeout,
+        jobs=args.jobs,
+        feedback=feedback,
+    )
+    if args.report is not None:
+        write_json_report(reports, args.report)
+    if args.junit is not None:
+        write_junit_report(reports, args.junit)
+    n_failed = sum(1 for report in reports if report.status == "failed")
+    if n_failed == 0:
+        print_success(f"{total} documents successfully compiled.")
+    else:
+        print_error(f"{n_failed} of {total} documents failed to compile.")
+    return 1 if n_failed > 0 else 0
+
+
+def lint_command(args: Namespace) -> int:
+    from ptyx_mcq_editor.tools.python_code_tools import lint_files
+
+    try:
+        paths = list(collect_files(args.paths))
+    except FileNotFoundError as e:
+        print_error(str(e))
+        return 2
+    results = lint_files(paths, jobs=args.jobs)
+    # Rows are 1-based in the output, like in most tools.
+    diagnostics = [
+        {
+            "path": str(path),
+            "row": None if info.row is None else info.row + 1,
+            "end_row": None if info.end_row is None else info.end_row + 1,
+            "col": info.col,
+            "end_col": info.end_col,
+            "code": info.extra.get("ruff-error-code"),
+            "type": info.type,
+            "message": info.message,
+        }
+        for path, errors in results.items()
+        for info in errors
+    ]
+    if args.format == "json":
+        print(json.dumps(diagnostics, indent=2))
+    else:
+        for d in diagnostics:
+            print(f"{d['path']}:{d['row']}:{d['col'] or 1}: {d['code'] or d['type']} {d['message']}")
+        print(f"{len(diagnostics)} errors found in {len(paths)} files.", file=sys.stderr)
+    return 1 if diagnostics else 0
+
+
+def index_command(args: Namespace) -> int:
+    from ptyx_mcq_editor.tools.trigram_index import TrigramIndex
+
+    for directory in args.directories:
+        if not directory.is_dir():
+            print_error(f"Directory not found: '{directory}'.")
+            return 2
+    with TrigramIndex(args.index_path) as index:
+        for directory in args.directories:
+            start = time.perf_counter()
+            updated, removed = index.update(directory)
+            print(
+                f"{directory}: {updated} files indexed, {removed} files removed"
+                f" ({time.perf_counter() - start:.2f}s)."
+            )
+    print_success(f"Index '{args.index_path}' updated.")
+    return 0
+
+
+def duplicates_command(args: Namespace) -> int:
+    from ptyx_mcq_editor.tools.duplicates import find_duplicates
+
+    try:
+        paths = [path for path in collect_files(args.paths) if path.suffix == ".ex"]
+    except FileNotFoundError as e:
+        print_error(str(e))
+        return 2
+    start = time.perf_counter()
+    finder = find_duplicates(paths, threshold=args.threshold, jobs=args.jobs)
+    clusters = finder.clusters()
+    if args.format == "json":
+        print(json.dumps([[str(path) for path in cluster] for cluster in clusters], indent=2))
+    else:
+        for i, cluster in enumerate(clusters, start=1):
+            print(f"Cluster {i} ({len(cluster)} exercises):")
+            for path in cluster:
+                print(f"    {path}")
+        print(
+            f"{len(clusters)} clusters of similar exercises found in {len(paths)} files"
+            f" ({time.perf_counter() - start:.2f}s).",
+            file=sys.stderr,
+        )
+    return 1 if clusters else 0
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="mcq-editor", description="Headless commands of the MCQ editor.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # `sweep` command
+    sweep_parser = subparsers.add_parser(
+        "sweep", help="Compile many variants of the same document, to detect degenerate ones."
+    )
+    sweep_parser.add_argument("path", type=Path, help="The pTyX file to compile (.ptyx or .ex).")
+    sweep_parser.add_argument(
+        "--seeds",
+        default="0-19",
+        help="Documents numbers (`PTYX_NUM` values) to compile, like '1-50' or '1,5,10-20' (default: 0-19).",
+    )
+    sweep_parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Number of worker processes (default: 1)."
+    )
+    sweep_parser.add_argument(
+        "--pdf", type=Path, metavar="PDF_PATH", help="Compile each variant, then merge them in this pdf file."
+    )
+    sweep_parser.add_argument(
+        "--output-dir", type=Path, help="Keep the generated files in this directory (default: discard them)."
+    )
+    sweep_parser.add_argument("-v", "--verbose", action="store_true", help="Display pTyX output.")
+    sweep_parser.set_defaults(func=sweep_command)
+
+    # `preview` command
+    preview_parser = subparsers.add_parser(
+        "preview", help="Compile the previews of many documents, like the editor does."
+    )
+    preview_parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="The .ptyx or .ex files to compile. Directories are searched recursively.",
+    )
+    preview_parser.add_argument(
+        "-j", "--jobs", type=int, help="Number of worker processes (default: number of processors)."
+    )
+    preview_parser.add_argument("--pdf", action="store_true", help="Compile the LaTeX files to pdf too.")
+    preview_parser.add_argument(
+        "--doc-id", type=int, default=0, help="Document number, used by random numbers generator."
+    )
+    preview_parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=PREVIEW_CACHE_DIR,
+        help=f"Directory of the generated files (default: the editor preview cache, {PREVIEW_CACHE_DIR}).",
+    )
+    preview_parser.add_argument(
+        "--force", action="store_true", help="Compile documents even if their preview is up to date."
+    )
+    preview_parser.add_argument(
+        "--timeout", type=float, help="Maximal duration of the pTyX compilation of a document, in seconds."
+    )
+    preview_parser.add_argument("--report", type=Path, metavar="JSON_PATH", help="Write a JSON report.")
+    preview_parser.add_argument("--junit", type=Path, metavar="XML_PATH", help="Write a JUnit XML report.")
+    preview_parser.set_defaults(func=preview_command)
+
+    # `lint` command
+    lint_parser = subparsers.add_parser(
+        "lint", help="Check the python code of many documents, using the same rules as the editor."
+    )
+    lint_parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="The .ptyx or .ex files to check. Directories are searched recursively.",
+    )
+    lint_parser.add_argument(
+        "-j", "--jobs", type=int, help="Number of threads used to read files (default: automatic)."
+    )
+    lint_parser.add_argument(
+        "--format", choices=("text", "json"), default="text", help="Output format (default: text)."
+    )
+    lint_parser.set_defaults(func=lint_command)
+
+    # `index` command
+    index_parser = subparsers.add_parser(
+        "index", help="Update the trigram index used to search directories in the editor."
+    )
+    index_parser.add_argument(
+        "directories", nargs="+", type=Path, help="Directories to index (only modified files are indexed)."
+    )
+    index_parser.add_argument(
+        "--index-path",
+        type=Path,
+        default=TRIGRAM_INDEX_PATH,
+        help=f"Path of the index (default: the editor one, {TRIGRAM_INDEX_PATH}).",
+    )
+    index_parser.set_defaults(func=index_command)
+
+    # `duplicates` command
+    duplicates_parser = subparsers.add_parser(
+        "duplicates", help="Find the clusters of duplicate or near-duplicate exercises."
+    )
+    duplicates_parser.add_argument(
+        "paths", nargs="+", type=Path, help="The .ex files to compare. Directories are searched recursively."
+    )
+    duplicates_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=DUPLICATES_THRESHOLD,
+        help=f"Minimal similarity of near-duplicates, between 0 and 1 (default: {DUPLICATES_THRESHOLD}).",
+    )
+    duplicates_parser.add_argument(
+        "-j", "--jobs", type=int, help="Number of worker processes (default: number of processors)."
+    )
+    duplicates_parser.add_argument(
+        "--format", choices=("text", "json"), default="text", help="Output format (default: text)."
+    )
+    duplicates_parser.set_defaults(func=duplicates_command)
+    return parser
+
+
+COMMANDS = ("sweep", "preview", "lint", "index", "duplicates")
+
+
+def run_command(args: list[str]) -> int:
+    """Run the headless command corresponding to the arguments, and return the exit code."""
+    parsed_args = build_parser().parse_args(args)
+    return parsed_args.func(parsed_args)
+
+
+if __name__ == "__main__":
+    sys.exit(run_command(sys.argv[1:]))
@@ -0,0 +1,141 @@
+import difflib
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer
+from PyQt6.QtWidgets import QMessageBox
+
+from ptyx_mcq_editor.settings import Document
+
+if TYPE_CHECKING:
+    from ptyx_mcq_editor.main_window import McqEditorMainWindow
+
+# Delay (in ms) before handling file system events, since a single write often generates several events.
+DEBOUNCE_DELAY = 200
+# Maximal number of lines of the diff displayed to the user.
+MAX_DIFF_LINES = 500
+
+
+class DocumentWatcher(QObject):
+    """Watch the files of the opened documents, to detect external modifications or deletions.
+
+    The file state (existence, modification time and size) of each document is cached by the document
+    itself (see `Document.refresh_file_state()`), and only refreshed when the file system reports
+    a change, so that reading `Document.is_saved` or `Document.title` never accesses the disk.
+
+    The parent directories are watched too: when a file is replaced (atomic writes, for example),
+    it is no longer watched, and must be added again once it has been recreated.
+    """
+
+    def __init__(self, main_window: "McqEditorMainWindow"):
+        super().__init__(parent=main_window)
+        self.main_window: Final = main_window
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_path_changed)
+        self.watcher.directoryChanged.connect(self._on_path_changed)
+        self._changed_paths: set[Path] = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_DELAY)
+        self._timer.timeout.connect(self.check_documents)
+        # Don't handle new events while the user is asked what to do.
+        self._checking = False
+
+    def update_watched_paths(self) -> None:
+        """Watch the files of all the opened documents, and only them."""
+        paths = [doc.path for doc in Document.all_docs.values() if doc.path is not None]
+        # Only watch existing files (`QFileSystemWatcher` can't watch a missing file).
+        # Use the cached file state, to not access the disk on each user interface update.
+        files = {
+            str(doc.path) for doc in Document.all_docs.values() if doc.path is not None and doc.file_exists
+        }
+        directories = {str(path.parent) for path in paths}
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        expected = files | directories
+        if to_remove := watched - expected:
+            self.watcher.removePaths(list(to_remove))
+        if to_add := expected - watched:
+            # Paths which can't be watched (missing directories...) are simply ignored.
+            self.watcher.addPaths(list(to_add))
+
+    def _on_path_changed(self, path: str) -> None:
+        self._changed_paths.add(Path(path))
+        self._timer.start()
+
+    def check_documents(self) -> None:
+        """Refresh the file state of the documents whose file (or parent directory) changed."""
+        if self._checking:
+            # Retry later.
+            self._timer.start()
+            return
+        changed_paths, self._changed_paths = self._changed_paths, set()
+        handler = self.main_window.file_events_handler
+        self._checking = True
+        try:
+            update_ui = False
+            for doc in list(Document.all_docs.values()):
+                path = doc.path
+                if path is None or (path not in changed_paths and path.parent not in changed_paths):
+                    continue
+                if handler.is_being_saved(doc):
+                    # Its file state will be refreshed once the document is saved.
+                    continue
+                existed = doc.file_exists
+                if doc.refresh_file_state():
+                    update_ui = True
+                    if existed != doc.file_exists:
+                        print(f"File {path} {'created' if doc.file_exists else 'deleted'} externally.")
+                    if doc.file_exists:
+                        self.on_external_modification(doc)
+            self.update_watched_paths()
+            if update_ui:
+                # noinspection PyProtectedMember
+                handler._update_ui()
+        finally:
+            self._checking = False
+
+    def on_external_modification(self, doc: Document) -> None:
+        """Offer to reload the document, displaying the differences with the editor content."""
+        assert doc.path is not None
+        tab = self.main_window.file_events_handler.find_tab(doc)
+        if tab is None or not tab.is_materialized:
+            # The file content will be read when the editor is created.
+            return
+        try:
+            new_content = doc.path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Can't read {doc.path}: {e}")
+            return
+        current_content = tab.editor.text()
+        if new_content == current_content:
+            # Nothing to reload (the file was touched, or the same content was written).
+            return
+        diff = list(
+            difflib.unified_diff(
+                current_content.splitlines(),
+                new_content.splitlines(),
+                "editor",
+                "disk",
+                lineterm="",
+            )
+        )
+        if len(diff) > MAX_DIFF_LINES:
+            diff = diff[:MAX_DIFF_LINES] + [f"[... {len(diff) - MAX_DIFF_LINES} more lines]"]
+        dialog = QMessageBox(self.main_window)
+        dialog.setWindowTitle("File modified")
+        dialog.setIcon(QMessageBox.Icon.Question)
+        text = f"<b>{doc.path.name}</b> has been modified by another program.<br/>Reload it?"
+        if not doc.is_saved:
+            text += "<br/><br/>Warning: your unsaved modifications will be lost."
+        dialog.setText(text)
+        dialog.setDetailedText("\n".join(diff))
+        dialog.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        dialog.setDefaultButton(QMessageBox.StandardButton.Yes)
+        if dialog.exec() == QMessageBox.StandardButton.Yes:
+            # Use `preserve_history`, so that reloading may be undone.
+            tab.reload(content=new_content, preserve_history=True)
+            tab.editor.on_save()
+            doc.is_saved = True
+        else:
+            # The editor content differs from the file content now.
+            doc.is_saved = False
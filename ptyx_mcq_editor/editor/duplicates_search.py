@@ -0,0 +1,108 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, pyqtSignal, QThread
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
+from ptyx_mcq_editor.tools.file_tools import collect_files
+
+if TYPE_CHECKING:
+    from ptyx_mcq_editor.main_window import McqEditorMainWindow
+
+# Maximal number of similar exercises listed in the dialog.
+MAX_DISPLAYED_RESULTS = 20
+
+
+class SimilarExercisesWorker(QObject):
+    """Compare the current exercise with the exercises of a directory, in another thread."""
+
+    def __init__(self, code: str, path: Path | None, directory: Path):
+        super().__init__(None)
+        self.code = code
+        self.path = path
+        self.directory = directory
+
+    # Emit the similar exercises, and their similarity.
+    finished = pyqtSignal(object, name="finished")
+
+    def run(self) -> None:
+        # Imported here, since it is slow to import.
+        from ptyx_mcq_editor.tools.duplicates import find_similar
+
+        results: list[tuple[Path, float]] = []
+        try:
+            current = None if self.path is None else self.path.resolve()
+            paths = [
+                path
+                for path in collect_files([self.directory])
+                if path.suffix == ".ex" and path.resolve() != current
+            ]
+            # Don't fork the editor process: the signatures are computed in this thread.
+            results = find_similar(self.code, paths, jobs=1)
+        finally:
+            self.finished.emit(results)
+
+
+class SimilarExercisesSearch(QObject):
+    """Find the duplicates and near-duplicates of the current exercise in a directory."""
+
+    def __init__(self, main_window: "McqEditorMainWindow") -> None:
+        super().__init__(main_window)
+        self.main_window = main_window
+        # Store worker as attribute, or else it will be garbage-collected.
+        self.worker: SimilarExercisesWorker | None = None
+
+    def search(self) -> None:
+        editor = self.main_window.current_mcq_editor
+        if editor is None:
+            return
+        if self.worker is not None:
+            self.main_window.status_label.setText("Please wait for the end of the current search.")
+            return
+        doc = self.main_window.settings.docs().current_doc
+        path = None if doc is None else doc.path
+        default_directory = self.main_window.settings.current_directory if path is None else path.parent
+        # noinspection PyTypeChecker
+        directory = QFileDialog.getExistingDirectory(
+            self.main_window, "Find duplicates of current file in directory...", str(default_directory)
+        )
+        if not directory:
+            return
+        self.main_window.status_label.setText("Searching for similar exercises...")
+        self.worker = worker = SimilarExercisesWorker(editor.text(), path, Path(directory))
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        worker.finished.connect(self.display_results)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        # noinspection PyUnresolvedReferences
+        thread.started.connect(worker.run)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def display_results(self, results: list[tuple[Path, float]]) -> None:
+        assert self.worker is not None
+        directory = self.worker.directory
+        self.worker = None
+        self.main_window.status_label.setText("")
+        if not results:
+            # noinspection PyTypeChecker
+            QMessageBox.information(
+                self.main_window, "No duplicate found", f"No similar exercise found in '{directory}'."
+            )
+            return
+        lines = [f"{value:4.0%}  {path.relative_to(directory)}" for path, value in results]
+        if len(results) > MAX_DISPLAYED_RESULTS:
+            lines[MAX_DISPLAYED_RESULTS:] = [f"... ({len(results) - MAX_DISPLAYED_RESULTS} more)"]
+        # noinspection PyTypeChecker
+        answer = QMessageBox.question(
+            self.main_window,
+            "Similar exercises found",
+            f"{len(results)} similar exercises found in '{directory}':\n\n"
+            + "\n".join(lines)
+            + "\n\nOpen them?",
+        )
+        if answer == QMessageBox.StandardButton.Yes:
+            self.main_window.file_events_handler.open_doc(
+                paths=[path for path, _ in results[:MAX_DISPLAYED_RESULTS]]
+            )
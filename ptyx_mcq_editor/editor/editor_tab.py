@@ -1,5 +1,6 @@
 from typing import Final
 
+from PyQt6.QtGui import QShowEvent
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
 from ptyx_mcq_editor.enhanced_widget import EnhancedWidget
 
@@ -9,14 +10,47 @@ from ptyx_mcq_editor.editor.editor_widget import EditorWidget, Marker
 
 
 class EditorTab(EnhancedWidget):
+    """A tab containing the editor of a document.
+
+    Creating an editor is slow (file reading, styling, python code checking...),
+    so the editor is only created when it is first needed, usually when the tab is shown.
+    This makes restoring a session with many documents much faster.
+    """
+
     def __init__(self, parent: QWidget, doc: Document, content: str = None):
         super().__init__(parent)
         self.doc: Final[Document] = doc
         self.inner_layout = QVBoxLayout(self)
-        self.editor = EditorWidget(self)
-        self.inner_layout.addWidget(self.editor)
-        self.reload(content=content)
-        self.connect_signals()
+        self._editor: EditorWidget | None = None
+        # Initial content, if the document content must not be read from disk.
+        self._content = content
+        # Title and tooltip currently displayed by the tab bar, to update them only when needed.
+        self.displayed_title: str | None = None
+        self.displayed_tooltip: str | None = None
+
+    @property
+    def is_materialized(self) -> bool:
+        """Return True if the editor has already been created."""
+        return self._editor is not None
+
+    @property
+    def editor(self) -> EditorWidget:
+        """The editor of the document, created on first access."""
+        return self.materialize()
+
+    def materialize(self) -> EditorWidget:
+        """Create the editor, if not already done, and return it."""
+        if self._editor is None:
+            self._editor = EditorWidget(self)
+            self.inner_layout.addWidget(self._editor)
+            self.reload(content=self._content)
+            self._content = None
+            self.connect_signals()
+        return self._editor
+
+    def showEvent(self, event: QShowEvent | None) -> None:
+        self.materialize()
+        super().showEvent(event)
 
     def reload(self, content: str = None, preserve_history=False):
         """Reload file content from disk. History is not preserved by default."""
@@ -1,23 +1,23 @@
 import ast
-import re
+from contextlib import contextmanager
 from enum import IntEnum
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 
 from PyQt6.Qsci import QsciScintilla
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QEvent, QPoint, QTimer
 from PyQt6.QtGui import QFont, QColor, QKeyEvent, QDragEnterEvent, QMouseEvent
 from PyQt6.QtWidgets import QDialog, QFileDialog
-from ptyx.extensions.extended_python import parse_extended_python_code
 from ptyx.errors import PythonBlockError, ErrorInformation, PythonCodeError
 
 from ptyx_mcq_editor.editor.indicator_handlers import Indicators
 from ptyx_mcq_editor.editor.lexer import MyLexer, Mode
 from ptyx_mcq_editor.enhanced_widget import EnhancedWidget
 from ptyx_mcq_editor.generated_ui import dbg_send_scintilla_messages_ui
+from ptyx_mcq_editor.tools.directives_index import LinesIndex, LineKind, STUDENTS_IDS_REGEX
+from ptyx_mcq_editor.tools.instrumentation import instrumented, timed
 from ptyx_mcq_editor.tools.python_code_tools import format_each_python_block, check_each_python_block
 
-
 if TYPE_CHECKING:
     from ptyx_mcq_editor.editor.editor_tab import EditorTab
 
@@ -59,6 +59,8 @@ PYTHON_INDENTED_BLOCK_KEYWORDS = [
 
 
 def analyze_code(code: str) -> SyntaxError | None:
+    from ptyx.extensions.extended_python import parse_extended_python_code
+
     try:
         ast.parse(parse_extended_python_code(code))
     except SyntaxError as e:
@@ -96,22 +98,36 @@ class Marker(IntEnum):
 
 
 MARGIN_COLOR = QColor("#ff888888")
+# Mouse moves are handled at most once per frame (in milliseconds, for 60 frames per second).
+HOVER_THROTTLING_DELAY = 16
 
 
 class EditorWidget(QsciScintilla, EnhancedWidget):
     """Code editor based on QScintilla."""
 
     charHovered = pyqtSignal(int, int, name="charHovered")
+    _id_counter = 0
 
     def __init__(self, parent: "EditorTab"):
         super().__init__(parent)
         self._parent_ = parent
+        # Unique identifier of the editor (contrary to `id()`, it is never reused once the editor is destroyed).
+        self.__class__._id_counter += 1
+        self.editor_id = self._id_counter
         self.status_message: str = ""
-        self._directives_lines: list[int] = []
+        # Include directives, header delimiters... (updated after each modification).
+        self._lines_index = LinesIndex()
+        # Line of the students IDs file path, when its indicators were last updated.
+        self._students_ids_line: int | None = None
         self.last_error_message = ""
         self._errors_info: dict[int, ErrorInformation] = {}
         self.student_ids_path: Path | None = None
-        self.students_info: str = ""
+        # Incremented each time the text changes.
+        # This is used to detect if the text changed during an asynchronous operation, like saving.
+        self.revision: int = 0
+        # If True, the code is not analyzed after each modification (see `suspended_analysis()`).
+        self._analysis_suspended = False
+        self._analysis_pending = False
 
         self.setUtf8(True)  # Set encoding to UTF-8
         font = QFont()
@@ -163,9 +179,17 @@ class EditorWidget(QsciScintilla, EnhancedWidget):
         self.indicators = Indicators(self)
 
         self.charHovered.connect(self.indicators.on_hover)
-
+        # Last position of the mouse pointer, not handled yet, and last hovered position in the text.
+        self._mouse_point: QPoint | None = None
+        self._hovered_position = -1
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(HOVER_THROTTLING_DELAY)
+        self._hover_timer.timeout.connect(self._on_mouse_hover)
+
+        # Don't use `textChanged` signal, which is emitted before `SCN_MODIFIED` is handled.
         # noinspection PyUnresolvedReferences
-        self.textChanged.connect(self.on_text_changed)
+        self.SCN_MODIFIED.connect(self._on_modified)
 
         self.markerDefine("|", Marker.ERROR)
         self.setMarkerBackgroundColor(QColor("red"), Marker.ERROR)
@@ -225,18 +249,33 @@ class EditorWidget(QsciScintilla, EnhancedWidget):
 
     def mouseMoveEvent(self, event: QMouseEvent | None) -> None:
         assert event is not None
+        # Only the last mouse move is handled, once the throttling delay is elapsed.
+        self._mouse_point = event.pos()
+        if not self._hover_timer.isActive():
+            self._hover_timer.start()
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event: QEvent | None) -> None:
+        # The same character may be hovered again when the pointer comes back.
+        self._hovered_position = -1
+        super().leaveEvent(event)
+
+    def _on_mouse_hover(self) -> None:
+        if self._mouse_point is None:
+            return
+        x, y = self._mouse_point.x(), self._mouse_point.y()
+        self._mouse_point = None
+        position = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMPOINTCLOSE, x, y)
+        # Nothing to do if the pointer is still over the same character.
+        if position == self._hovered_position:
+            return
+        self._hovered_position = position
         # Close any existing Calltip.
         self.SendScintilla(QsciScintilla.SCI_CALLTIPCANCEL)
-        # Step 1: Get mouse coordinates
-        point = event.pos()
-        x = point.x()
-        y = point.y()
-        position = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMPOINTCLOSE, x, y)
         # `position` will contain -1 if the mouse's pointer is outside the window or not over the text,
         # else it will be the corresponding position in the text.
         if position != -1:
             self.charHovered.emit(*self.lineIndexFromPosition(position))
-        super().mouseMoveEvent(event)
 
     def contextMenuEvent(self, event):
         point = event.pos()
@@ -367,7 +406,54 @@ class EditorWidget(QsciScintilla, EnhancedWidget):
     #     if new_text != self.text():
     #         self.SendScintilla(QsciScintilla.SCI_SETTEXT, new_text.encode("utf8"))
 
+    @contextmanager
+    def suspended_analysis(self) -> Iterator[None]:
+        """Analyze the code only once at the end of the block, instead of after each modification."""
+        self._analysis_suspended = True
+        try:
+            yield
+        finally:
+            self._analysis_suspended = False
+            if self._analysis_pending:
+                self._analysis_pending = False
+                self.on_text_changed()
+
+    def replace_range(self, start: int, end: int, new_text: bytes) -> None:
+        """Replace the text between positions `start` and `end` (in bytes), as a single undoable action.
+
+        The code is analyzed only once, after the replacement.
+        """
+        with self.suspended_analysis():
+            self.SendScintilla(QsciScintilla.SCI_BEGINUNDOACTION)
+            self.SendScintilla(QsciScintilla.SCI_SETTARGETRANGE, start, end)
+            self.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(new_text), new_text)
+            self.SendScintilla(QsciScintilla.SCI_ENDUNDOACTION)
+
+    def _on_modified(
+        self, position: int, modification_type: int, _text, length: int, lines_added: int, *_
+    ) -> None:
+        """Handle Scintilla `SCN_MODIFIED` notification, emitted after each modification.
+
+        The lines index and the indicators ranges are updated first, since the modified range
+        and the number of added lines are only known at this time.
+        The modified lines are examined again later, in `update_include_indicators()`.
+        """
+        if modification_type & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+            self._lines_index.shift(line, lines_added)
+            # The text under the mouse pointer may have changed.
+            self._hovered_position = -1
+            self.indicators.on_modified(
+                position, length, inserted=bool(modification_type & QsciScintilla.SC_MOD_INSERTTEXT)
+            )
+            self.on_text_changed()
+
+    @instrumented("EditorWidget.on_text_changed")
     def on_text_changed(self) -> None:
+        self.revision += 1
+        if self._analysis_suspended:
+            self._analysis_pending = True
+            return
         self.clear_indicators()
         self.markerDeleteAll(Marker.NEW)
         self.main_window.statusbar.showMessage("")
@@ -382,21 +468,30 @@ class EditorWidget(QsciScintilla, EnhancedWidget):
             msg = (f"{info.type}: " if info.type else "") + info.message
             self.SendScintilla(QsciScintilla.SCI_CALLTIPSHOW, position, msg.encode("utf8"))
 
+    @instrumented("EditorWidget.check_python_code")
     def check_python_code(self):
         self.markerDeleteAll(Marker.ERROR)
         self._errors_info.clear()
-        for error_info in check_each_python_block(self.text()):
+        # Ruff invocation is the most expensive part.
+        with timed("EditorWidget.check_python_code.ruff"):
+            errors_info = check_each_python_block(self.text())
+        for error_info in errors_info:
             self.markerAdd(error_info.row, Marker.ERROR)
             self._errors_info[error_info.row] = error_info
 
-    def on_save(self) -> None:
-        self.autoformat()
+    def on_save(self, content: str | None = None) -> None:
+        """Method called once the editor content has been saved.
+
+        If provided, `content` is the saved content (which may have been autoformatted).
+        """
+        if content is not None:
+            self.setText(content, preserve_history=True)
         # Tell Scintilla that the current editor's state is its new saved state.
         # More information on Scintilla messages: http://www.scintilla.org/ScintillaDoc.html
         self.SendScintilla(QsciScintilla.SCI_SETSAVEPOINT)
 
     def clear_indicators(self) -> None:
-        self.indicators.include_directive.clear()
+        # Include directives indicators are updated incrementally (see `update_include_indicators()`).
         self.indicators.compilation_error.clear()
 
     def dbg_send_scintilla_command(self) -> None:
@@ -426,78 +521,88 @@ class EditorWidget(QsciScintilla, EnhancedWidget):
         line = self.getCursorPosition()[0]
         return self.text(line)
 
-    def _update_students_info(self) -> None:
-        """
-        Update `self.students_info` by reading the CSV file located at `self.student_ids_path`.
-        """
-        count = 0
-        first_line = ""
-        file_line = ""
-        if self.student_ids_path is not None and self.student_ids_path.is_file():
-            with open(self.student_ids_path) as f:
-                for file_line in f:
-                    if file_line := file_line.strip():
-                        count += 1
-                        if first_line == "":
-                            first_line = file_line
-            last_line = file_line
-
-            self.students_info = f"{first_line}\n" if first_line else ""
-            if last_line != first_line:
-                self.students_info += f"⋯\n{file_line}\n"
-            self.students_info += f"{count} students"
+    @property
+    def students_info(self) -> str:
+        """Summary of the students IDs file (the file is read in the background, see `StudentsIdsWatcher`)."""
+        if self.student_ids_path is None:
+            return ""
+        summary = self.main_window.students_ids_watcher.summary(self.student_ids_path)
+        return "Reading students list..." if summary is None else str(summary)
 
+    @instrumented("EditorWidget.update_include_indicators")
     def update_include_indicators(self) -> None:
         """
-        Create Scintilla indicators for include directives.
+        Update Scintilla indicators for include directives, and for the students IDs file path.
 
+        Only the lines modified since the last update are examined again.
         Those indicators can then be clicked to get the corresponding files.
         """
-        n_includes = n_disabled_includes = 0
-        self._directives_lines.clear()
-        i: int
-        line: str
+        index = self._lines_index
+        dirty_lines = index.pop_dirty_lines()
+        # Some dirty lines may have been deleted since.
+        dirty_lines = range(dirty_lines.start, min(dirty_lines.stop, self.lines()))
+        # Ranges of the include directives paths in the dirty lines.
+        ranges: list[tuple[int, int]] = []
         # TODO: once a real pTyX code parser is implemented for an accurate syntax highlighting,
         #  it should be used to detect accurately include directives as well.
-        header_started = header_ended = False
-        for i, line in enumerate(self.text().split("\n")):
-            if line.startswith("===") and all(c == "=" for c in line):
-                if not header_started:
-                    header_started = True
-                else:
-                    header_ended = True
-            if (
-                header_started
-                and not header_ended
-                and (m := re.fullmatch(r"(ids\s*=\s*)(.+)", line)) is not None
-            ):
+        for i in dirty_lines:
+            line = self.text(i).rstrip("\r\n")
+            kind = index.set_line(i, line)
+            if kind in (LineKind.INCLUDE, LineKind.DISABLED_INCLUDE):
+                line_start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, i)
+                prefix_length = 3 if kind == LineKind.INCLUDE else 4
+                ranges.append((line_start + prefix_length, line_start + len(line.encode("utf8"))))
+        if dirty_lines:
+            # Only the indicators which changed in the dirty lines are updated.
+            self.indicators.include_directive.set_ranges(
+                ranges,
+                self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, dirty_lines.start),
+                self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, dirty_lines.stop),
+            )
+
+        ids_line = index.students_ids_line()
+        if ids_line != self._students_ids_line or ids_line in dirty_lines:
+            # Either the header or the students IDs path changed (or lines were inserted before it).
+            self._students_ids_line = ids_line
+            valid_path_ranges: list[tuple[int, int]] = []
+            wrong_path_ranges: list[tuple[int, int]] = []
+            if ids_line is not None:
+                line = self.text(ids_line).rstrip("\r\n")
+                m = STUDENTS_IDS_REGEX.fullmatch(line)
+                assert m is not None
                 path = Path(m.group(2))
                 self.student_ids_path = path
-                col = len(m.group(1))
-                self.indicators.valid_students_path.clear()
-                self.indicators.wrong_students_path.clear()
+                line_start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, ids_line)
+                path_range = (
+                    line_start + len(m.group(1).encode("utf8")),
+                    line_start + len(line.encode("utf8")),
+                )
+                # Start reading the file now, if it is not in cache yet. This watches the file too,
+                # so that indicators are updated if it is created or deleted later.
+                self.main_window.students_ids_watcher.summary(path)
                 if path.is_file():
-                    self.indicators.valid_students_path.apply(i, col, i, len(line))
-                    self._update_students_info()
+                    valid_path_ranges.append(path_range)
                 else:
-                    self.indicators.wrong_students_path.apply(i, col, i, len(line))
-
-            elif line.startswith("-- "):
-                if not line[3:].lstrip().startswith("DIR:"):
-                    self.indicators.include_directive.apply(i, 3, i, len(line))
-                    n_includes += 1
-                self._directives_lines.append(i)
-            elif line.startswith("!-- "):
-                if not line[4:].lstrip().startswith("DIR:"):
-                    self.indicators.include_directive.apply(i, 4, i, len(line))
-                    n_disabled_includes += 1
-                self._directives_lines.append(i)
+                    wrong_path_ranges.append(path_range)
+            self.indicators.valid_students_path.set_ranges(valid_path_ranges)
+            self.indicators.wrong_students_path.set_ranges(wrong_path_ranges)
+
+        n_includes = index.count(LineKind.INCLUDE)
+        n_disabled_includes = index.count(LineKind.DISABLED_INCLUDE)
         if n_includes > 0 or n_disabled_includes > 0:
             self.status_message = f"{n_includes} imports ({n_disabled_includes} disabled)"
         else:
             self.status_message = ""
         self.main_window.file_events_handler.update_status_message()
 
+    def refresh_students_path_indicators(self) -> None:
+        """Update the students IDs path indicators, even if the path didn't change.
+
+        This must be called when the students IDs file is created or deleted.
+        """
+        self._students_ids_line = None
+        self.update_include_indicators()
+
     def replace_line(self, line: int, new_text: str) -> None:
         """Replace a specific range of text in the document."""
         start_pos = self.positionFromLineIndex(line, 0)
@@ -526,11 +631,7 @@ class EditorWidget(QsciScintilla, EnhancedWidget):
                         header_started = True
                     else:
                         header_ended = True
-                if (
-                    header_started
-                    and not header_ended
-                    and (re.fullmatch(r"(ids\s*=\s*)(.+)", line)) is not None
-                ):
+                if header_started and not header_ended and STUDENTS_IDS_REGEX.fullmatch(line) is not None:
                     self.replace_line(i, f"ids = {filename}\n")
 
     def deleteAt(self, line: int, col: int, n: int) -> None:
@@ -578,7 +679,7 @@ class EditorWidget(QsciScintilla, EnhancedWidget):
         (Result will be positive for inserted characters, negative else).
         """
         line = self.text(line_num)
-        if line_num in self._directives_lines:
+        if self._lines_index.is_directive(line_num):
             # Special case: to disable a directive, prefix it with `!`.
             if line.startswith("!"):
                 # Enable directive.
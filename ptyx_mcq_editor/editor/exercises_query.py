@@ -0,0 +1,177 @@
+import sqlite3
+from pathlib import Path
+from time import perf_counter
+
+from PyQt6 import QtWidgets
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, Qt
+from PyQt6.QtWidgets import QFileDialog, QLabel, QLineEdit, QPushButton, QTreeWidget, QTreeWidgetItem
+
+from ptyx_mcq_editor.enhanced_widget import EnhancedWidget
+from ptyx_mcq_editor.param import SEMANTIC_INDEX_PATH
+from ptyx_mcq_editor.tools.semantic_index import SemanticIndex, QueryResult, parse_query
+
+
+class QueryWorker(QObject):
+    """Update the semantic index of the directory in another thread, then query it."""
+
+    def __init__(self, root: Path, query: str):
+        super().__init__(None)
+        self.root = root
+        self.query = query
+
+    # Emit the results (or None if the index is unavailable), and the number of updated files.
+    finished = pyqtSignal(object, int, name="finished")
+
+    def run(self) -> None:
+        results: list[QueryResult] | None = None
+        updated = 0
+        try:
+            with SemanticIndex(SEMANTIC_INDEX_PATH) as index:
+                updated, _ = index.update(self.root)
+                results = index.query(self.query, self.root)
+        except sqlite3.Error as e:
+            print(f"Semantic index unavailable: {e}")
+        finally:
+            self.finished.emit(results, updated)
+
+
+class NumericItem(QTreeWidgetItem):
+    """Tree item sorting the columns containing numbers numerically."""
+
+    def __lt__(self, other: QTreeWidgetItem) -> bool:
+        tree = self.treeWidget()
+        column = tree.sortColumn() if tree is not None else 0
+        if column == 0:
+            return (self.text(0), int(self.text(1))) < (other.text(0), int(other.text(1)))
+        return int(self.text(column)) < int(other.text(column))
+
+
+class ExercisesQueryWidget(QtWidgets.QDockWidget, EnhancedWidget):
+    """Search the questions of a directory by their answers, tags or python symbols."""
+
+    def __init__(self, parent) -> None:
+        super().__init__(parent)
+        # Store worker as attribute, or else it will be garbage-collected.
+        self.worker: QueryWorker | None = None
+        self._query_start = 0.0
+
+    def connect_signals(self):
+        self.query_button.pressed.connect(self.run_query)
+        self.query_field.returnPressed.connect(self.run_query)
+        self.query_browse_button.pressed.connect(self.choose_directory)
+        self.query_results_tree.itemActivated.connect(self.open_result)
+        self.query_results_tree.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+
+    @property
+    def query_field(self) -> QLineEdit:
+        return self.main_window.query_field
+
+    @property
+    def query_directory_field(self) -> QLineEdit:
+        return self.main_window.query_directory_field
+
+    @property
+    def query_browse_button(self) -> QPushButton:
+        return self.main_window.query_browse_button
+
+    @property
+    def query_button(self) -> QPushButton:
+        return self.main_window.query_button
+
+    @property
+    def query_results_tree(self) -> QTreeWidget:
+        return self.main_window.query_results_tree
+
+    @property
+    def query_status_label(self) -> QLabel:
+        return self.main_window.query_status_label
+
+    def toggle_query_dialog(self) -> None:
+        if self.isVisible():
+            self.setVisible(False)
+            return
+        self.setVisible(True)
+        if not self.query_directory_field.text():
+            self.query_directory_field.setText(str(self.main_window.settings.current_directory))
+        self.query_field.setFocus()
+        self.query_field.selectAll()
+
+    def choose_directory(self) -> None:
+        # noinspection PyTypeChecker
+        path_str = QFileDialog.getExistingDirectory(
+            self.main_window, "Query exercises of directory...", self.query_directory_field.text()
+        )
+        if path_str:
+            self.query_directory_field.setText(path_str)
+
+    def run_query(self) -> None:
+        """Update the index of the directory and query it, in another thread."""
+        if self.worker is not None:
+            # The index is being updated, and it would have to be updated again.
+            self.query_status_label.setText("Please wait for the end of the current query.")
+            return
+        query = self.query_field.text()
+        try:
+            parse_query(query)
+        except ValueError as e:
+            self.query_field.setStyleSheet("background-color: #ffe2db")
+            self.query_status_label.setText(str(e))
+            return
+        self.query_field.setStyleSheet("")
+        root = Path(self.query_directory_field.text()).expanduser()
+        if not root.is_dir():
+            self.query_status_label.setText(f"Directory '{root}' not found.")
+            return
+        self.query_results_tree.clear()
+        self.query_status_label.setText("Updating the index...")
+        self._query_start = perf_counter()
+        self.worker = worker = QueryWorker(root, query)
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        worker.finished.connect(self.query_ended)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        # noinspection PyUnresolvedReferences
+        thread.started.connect(worker.run)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def query_ended(self, results: list[QueryResult] | None, updated: int) -> None:
+        root = self.worker.root if self.worker is not None else None
+        self.worker = None
+        if results is None:
+            self.query_status_label.setText("Error: the index is unavailable.")
+            return
+        tree = self.query_results_tree
+        tree.setSortingEnabled(False)
+        for result in results:
+            path = result.path.relative_to(root) if root is not None else result.path
+            item = NumericItem(
+                [
+                    str(path),
+                    str(result.line + 1),
+                    str(result.version + 1),
+                    str(result.answers),
+                    str(result.correct),
+                ]
+            )
+            item.setToolTip(0, str(result.path))
+            item.setData(0, Qt.ItemDataRole.UserRole, result)
+            tree.addTopLevelItem(item)
+        tree.setSortingEnabled(True)
+        tree.resizeColumnToContents(0)
+        duration = perf_counter() - self._query_start
+        self.query_status_label.setText(
+            f"{len(results)} questions found ({updated} files indexed, {duration:.2f} s)."
+        )
+
+    def open_result(self, item: QTreeWidgetItem, column: int = 0) -> None:
+        """Open the file of the question, and go to the question."""
+        result: QueryResult = item.data(0, Qt.ItemDataRole.UserRole)
+        handler = self.main_window.file_events_handler
+        handler.open_doc(paths=[result.path])
+        editor = handler.current_editor()
+        if editor is not None:
+            editor.setCursorPosition(result.line, 0)
+            editor.ensureLineVisible(result.line)
+            editor.setFocus()
@@ -0,0 +1,358 @@
+import re
+import sqlite3
+import threading
+from bisect import bisect
+from pathlib import Path
+from time import perf_counter
+from typing import Literal
+
+from PyQt6 import QtWidgets
+from PyQt6.Qsci import QsciScintilla
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, Qt
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QFileDialog,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+)
+
+from ptyx_mcq_editor.editor.editor_widget import EditorWidget
+from ptyx_mcq_editor.enhanced_widget import EnhancedWidget
+from ptyx_mcq_editor.param import TRIGRAM_INDEX_PATH
+from ptyx_mcq_editor.settings import Document
+from ptyx_mcq_editor.tools.file_tools import collect_files
+from ptyx_mcq_editor.tools.search import (
+    FileMatch,
+    include_tree,
+    search_files,
+    search_pattern,
+    replace_in_file,
+    replace_matches,
+)
+from ptyx_mcq_editor.tools.trigram_index import TrigramIndex
+
+Scope = Literal["includes", "directory"]
+
+
+class FilesSearchWorker(QObject):
+    """Search many files in another thread, reporting the results of each file as soon as available."""
+
+    def __init__(self, root: Path, scope: Scope, regex: re.Pattern[str]):
+        super().__init__(None)
+        self.root = root
+        self.scope = scope
+        self.regex = regex
+        self.cancelled = threading.Event()
+
+    # Emit the path of a file and its matches (only for files containing at least one match).
+    file_searched = pyqtSignal(object, list, name="file_searched")
+    # Emit the number of searched files.
+    finished = pyqtSignal(int, name="finished")
+
+    def search(self) -> None:
+        searched = 0
+        try:
+            if self.scope == "includes":
+                paths = include_tree(self.root)
+            else:
+                paths = self._directory_candidates()
+            for path, matches in search_files(paths, self.regex, cancelled=self.cancelled):
+                searched += 1
+                if matches:
+                    self.file_searched.emit(path, matches)
+        except Exception as e:
+            print(f"Search failed: {type(e).__name__}: {e}")
+        finally:
+            self.finished.emit(searched)
+
+    def _directory_candidates(self) -> list[Path]:
+        """Return the files of the directory which may contain a match, using the trigram index."""
+        try:
+            with TrigramIndex(TRIGRAM_INDEX_PATH) as index:
+                index.update(self.root)
+                return index.candidates(self.regex, self.root)
+        except sqlite3.Error as e:
+            print(f"Trigram index unavailable ({e}), searching all files.")
+            return list(collect_files([self.root]))
+
+
+class FilesSearchWidget(QtWidgets.QDockWidget, EnhancedWidget):
+    """Search and replace across the files included by the current document, or a whole directory."""
+
+    def __init__(self, parent) -> None:
+        super().__init__(parent)
+        # Store worker as attribute, or else it will be garbage-collected.
+        self.worker: FilesSearchWorker | None = None
+        # Results of the last search, for each file.
+        self.results: dict[Path, list[FileMatch]] = {}
+        # Files containing results, sorted (to display them in order, whatever the order they are found in).
+        self._sorted_paths: list[Path] = []
+        # The regex of the last search, and whether the replacement is a regex template,
+        # so that the replacements match the results, even if the search fields were modified since.
+        self._results_regex: re.Pattern[str] | None = None
+        self._results_is_regex = False
+        self._search_start = 0.0
+
+    def connect_signals(self):
+        self.files_search_button.pressed.connect(self.search)
+        self.files_find_field.returnPressed.connect(self.search)
+        self.files_replace_all_button.pressed.connect(self.replace_all)
+        self.files_browse_button.pressed.connect(self.choose_directory)
+        self.files_scope_combo.currentIndexChanged.connect(self._update_scope_widgets)
+        self.files_results_tree.itemActivated.connect(self.open_result)
+        # Results don't match the search fields anymore, so they must not be replaced.
+        self.files_find_field.textChanged.connect(self._disable_replace_all)
+        for checkbox in (self.files_case_checkbox, self.files_whole_checkbox, self.files_regex_checkbox):
+            checkbox.toggled.connect(self._disable_replace_all)
+        self._disable_replace_all()
+        self._update_scope_widgets()
+
+    @property
+    def files_find_field(self) -> QLineEdit:
+        return self.main_window.files_find_field
+
+    @property
+    def files_replace_field(self) -> QLineEdit:
+        return self.main_window.files_replace_field
+
+    @property
+    def files_scope_combo(self) -> QComboBox:
+        return self.main_window.files_scope_combo
+
+    @property
+    def files_directory_field(self) -> QLineEdit:
+        return self.main_window.files_directory_field
+
+    @property
+    def files_browse_button(self) -> QPushButton:
+        return self.main_window.files_browse_button
+
+    @property
+    def files_case_checkbox(self) -> QCheckBox:
+        return self.main_window.files_case_checkbox
+
+    @property
+    def files_whole_checkbox(self) -> QCheckBox:
+        return self.main_window.files_whole_checkbox
+
+    @property
+    def files_regex_checkbox(self) -> QCheckBox:
+        return self.main_window.files_regex_checkbox
+
+    @property
+    def files_search_button(self) -> QPushButton:
+        return self.main_window.files_search_button
+
+    @property
+    def files_replace_all_button(self) -> QPushButton:
+        return self.main_window.files_replace_all_button
+
+    @property
+    def files_results_tree(self) -> QTreeWidget:
+        return self.main_window.files_results_tree
+
+    @property
+    def files_search_status_label(self) -> QLabel:
+        return self.main_window.files_search_status_label
+
+    @property
+    def scope(self) -> Scope:
+        return "includes" if self.files_scope_combo.currentIndex() == 0 else "directory"
+
+    def _disable_replace_all(self) -> None:
+        self.files_replace_all_button.setEnabled(False)
+
+    def _update_scope_widgets(self) -> None:
+        directory_scope = self.scope == "directory"
+        self.files_directory_field.setEnabled(directory_scope)
+        self.files_browse_button.setEnabled(directory_scope)
+
+    def toggle_files_search_dialog(self) -> None:
+        if self.isVisible():
+            self.setVisible(False)
+            return
+        self.setVisible(True)
+        editor = self.main_window.current_mcq_editor
+        if editor is not None and (selected_text := editor.selectedText()) and "\n" not in selected_text:
+            self.files_find_field.setText(selected_text)
+        if not self.files_directory_field.text():
+            self.files_directory_field.setText(str(self.main_window.settings.current_directory))
+        self.files_find_field.setFocus()
+        self.files_find_field.selectAll()
+
+    def choose_directory(self) -> None:
+        # noinspection PyTypeChecker
+        path_str = QFileDialog.getExistingDirectory(
+            self.main_window, "Search in directory...", self.files_directory_field.text()
+        )
+        if path_str:
+            self.files_directory_field.setText(path_str)
+
+    def _regex(self) -> re.Pattern[str] | None:
+        """Return the compiled search regex, or None if it is invalid."""
+        pattern, flags = search_pattern(
+            self.files_find_field.text(),
+            is_regex=self.files_regex_checkbox.isChecked(),
+            case_sensitive=self.files_case_checkbox.isChecked(),
+            whole_words=self.files_whole_checkbox.isChecked(),
+        )
+        try:
+            regex = re.compile(pattern, flags)
+        except re.error as e:
+            self.files_find_field.setStyleSheet("background-color: #ffe2db")
+            self.files_search_status_label.setText(f"Invalid regular expression: {e}")
+            return None
+        self.files_find_field.setStyleSheet("")
+        return regex
+
+    def _root(self) -> Path | None:
+        """Return the document whose includes must be searched, or the directory to search."""
+        if self.scope == "includes":
+            doc = self.main_window.settings.docs().current_doc
+            if doc is None or doc.path is None:
+                self.files_search_status_label.setText("The current document must be saved first.")
+                return None
+            return doc.path
+        directory = Path(self.files_directory_field.text()).expanduser()
+        if not directory.is_dir():
+            self.files_search_status_label.setText(f"Directory '{directory}' not found.")
+            return None
+        return directory
+
+    def cancel_search(self) -> None:
+        if self.worker is not None:
+            self.worker.cancelled.set()
+            self.worker = None
+
+    def search(self) -> None:
+        """Search in all the files, in another thread, and display the results as soon as they are found."""
+        self.cancel_search()
+        self._clear_results()
+        if not self.files_find_field.text():
+            self.files_search_status_label.setText("")
+            return
+        if (regex := self._regex()) is None or (root := self._root()) is None:
+            return
+        self._results_regex = regex
+        self._results_is_regex = self.files_regex_checkbox.isChecked()
+        self.files_search_status_label.setText("Searching...")
+        self._search_start = perf_counter()
+        self.worker = worker = FilesSearchWorker(root, self.scope, regex)
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        # Results of a cancelled search must be ignored.
+        worker.file_searched.connect(
+            lambda path, matches: self.add_results(path, matches) if self.worker is worker else None
+        )
+        worker.finished.connect(
+            lambda searched: self.search_ended(searched) if self.worker is worker else None
+        )
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        # noinspection PyUnresolvedReferences
+        thread.started.connect(worker.search)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def _clear_results(self) -> None:
+        self.results.clear()
+        self._sorted_paths.clear()
+        self.files_results_tree.clear()
+        self._results_regex = None
+        self._disable_replace_all()
+
+    def add_results(self, path: Path, matches: list[FileMatch]) -> None:
+        self.results[path] = matches
+        index = bisect(self._sorted_paths, path)
+        self._sorted_paths.insert(index, path)
+        file_item = QTreeWidgetItem([f"{path.name} ({len(matches)})"])
+        file_item.setToolTip(0, str(path))
+        file_item.setData(0, Qt.ItemDataRole.UserRole, path)
+        for match in matches:
+            match_item = QTreeWidgetItem(file_item, [f"{match.line + 1}: {match.line_text.strip()}"])
+            match_item.setData(0, Qt.ItemDataRole.UserRole, match)
+        self.files_results_tree.insertTopLevelItem(index, file_item)
+
+    def search_ended(self, searched: int) -> None:
+        self.worker = None
+        n_matches = sum(len(matches) for matches in self.results.values())
+        self.files_search_status_label.setText(
+            f"{n_matches} matches in {len(self.results)} files"
+            f" ({searched} files searched in {perf_counter() - self._search_start:.2f} s)."
+        )
+        self.files_replace_all_button.setEnabled(bool(self.results))
+
+    def _open_editor(self, path: Path) -> EditorWidget | None:
+        """Return the editor of the document if it is already opened, else None."""
+        for doc in Document.all_docs.values():
+            if doc.path is not None and doc.path.resolve() == path.resolve():
+                tab = self.main_window.file_events_handler.find_tab(doc)
+                if tab is not None and tab.is_materialized:
+                    return tab.editor
+        return None
+
+    def open_result(self, item: QTreeWidgetItem, column: int = 0) -> None:
+        """Open the file of the search result, and select the matching text."""
+        data = item.data(0, Qt.ItemDataRole.UserRole)
+        path = data if isinstance(data, Path) else data.path
+        handler = self.main_window.file_events_handler
+        handler.open_doc(paths=[path])
+        editor = handler.current_editor()
+        if editor is None or not isinstance(data, FileMatch):
+            return
+        # The column is a number of characters, but Scintilla positions are numbers of bytes.
+        line_position = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, data.line)
+        start = editor.SendScintilla(QsciScintilla.SCI_POSITIONRELATIVE, line_position, data.column)
+        editor.SendScintilla(QsciScintilla.SCI_SETSEL, start, start + data.end - data.start)
+        editor.ensureLineVisible(data.line)
+        editor.setFocus()
+
+    def replace_all(self) -> None:
+        """Replace all the results of the last search.
+
+        Files opened in the editor are modified in the editor (and not saved),
+        the other ones are modified on disk (using atomic writes).
+        """
+        if self.worker is not None:
+            self.files_search_status_label.setText("Please wait for the end of the search.")
+            return
+        # Reuse the regex of the search, since the search fields may have been modified since.
+        if not self.results or (regex := self._results_regex) is None:
+            return
+        n_matches = sum(len(matches) for matches in self.results.values())
+        answer = QMessageBox.question(
+            self.main_window,
+            "Replace in files",
+            f"Replace {n_matches} matches in {len(self.results)} files?\nThis can't be undone for closed files.",
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        is_regex = self._results_is_regex
+        replacement = self.files_replace_field.text()
+        replaced = modified_files = 0
+        errors: list[str] = []
+        for path in self._sorted_paths:
+            try:
+                if (editor := self._open_editor(path)) is not None:
+                    text = editor.text().encode("utf8")
+                    new_text, count = replace_matches(text, regex, replacement, is_regex, 0, len(text))
+                    if count > 0:
+                        editor.replace_range(0, len(text), new_text)
+                else:
+                    count = replace_in_file(path, regex, replacement, is_regex)
+                replaced += count
+                modified_files += count > 0
+            except (OSError, UnicodeDecodeError, re.error) as e:
+                errors.append(f"{path}: {e}")
+        if errors:
+            QMessageBox.warning(
+                self.main_window, "Replace in files", "Some files were not modified:\n" + "\n".join(errors)
+            )
+        # Results are obsolete now.
+        self._clear_results()
+        self.files_search_status_label.setText(f"{replaced} replacements in {modified_files} files.")
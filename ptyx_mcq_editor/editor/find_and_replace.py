@@ -1,17 +1,28 @@
 import re
+from bisect import bisect_left
 from enum import Enum, auto
-from typing import TYPE_CHECKING
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple, Iterable, Iterator
 
 from PyQt6 import QtWidgets
 from PyQt6.Qsci import QsciScintilla
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QCheckBox, QPushButton, QLabel, QLineEdit
 
 from ptyx_mcq_editor.editor.editor_widget import EditorWidget
 from ptyx_mcq_editor.enhanced_widget import EnhancedWidget
+from ptyx_mcq_editor.tools.instrumentation import instrumented
+from ptyx_mcq_editor.tools.search import search_pattern, replace_matches, finditer_bytes
 
 if TYPE_CHECKING:
     pass
 
+# Search results outside the visible part of the document are highlighted by chunks,
+# when the application is idle. This is the maximal duration of a chunk (in seconds).
+HIGHLIGHT_CHUNK_DURATION = 0.01
+# Number of searches whose results are kept in cache.
+MAX_CACHED_SEARCHES = 10
+
 
 class SearchAction(Enum):
     FIND_NEXT = auto()
@@ -19,11 +30,34 @@ class SearchAction(Enum):
     REPLACE = auto()
 
 
+class SearchKey(NamedTuple):
+    """Identify the results of a search, which only change when the document is modified."""
+
+    editor_id: int
+    pattern: str
+    flags: int
+    revision: int
+    # Searched range (the whole document, or the selection).
+    start: int
+    end: int
+
+
 class FindAndReplaceWidget(QtWidgets.QDockWidget, EnhancedWidget):
     def __init__(self, parent) -> None:
         super().__init__(parent)
         self.new_search = True
         self.last_search_action: SearchAction | None = None
+        # Positions (start, end) of the results of the last searches.
+        self._matches_cache: dict[SearchKey, list[tuple[int, int]]] = {}
+        # The search whose results are highlighted (highlighting may still be in progress).
+        self._highlighted_key: SearchKey | None = None
+        # The results remaining to highlight, and the results found so far (if not already in cache).
+        self._pending_matches: Iterator[tuple[int, int]] | None = None
+        self._found_matches: list[tuple[int, int]] | None = None
+        # Search results before this position are already highlighted.
+        self._highlighted_position = 0
+        self._highlight_timer = QTimer(self)
+        self._highlight_timer.timeout.connect(self._highlight_next_chunk)
 
     def connect_signals(self):
         self.replace_all_button.pressed.connect(self.replace_all)
@@ -153,61 +187,195 @@ class FindAndReplaceWidget(QtWidgets.QDockWidget, EnhancedWidget):
             self.current_mcq_editor.positionFromLineIndex(line_to, index_to),
         )
 
-    def highlight_all_find_results(self) -> None:
-        """Highlight all search results."""
-        if self.current_mcq_editor is None:
-            return
+    def _visible_range(self, editor: EditorWidget) -> tuple[int, int]:
+        """Return start and end position of the visible part of the document."""
+        send = editor.SendScintilla
+        first_visible_line = send(QsciScintilla.SCI_GETFIRSTVISIBLELINE)
+        first_line = send(QsciScintilla.SCI_DOCLINEFROMVISIBLE, first_visible_line)
+        last_line = send(
+            QsciScintilla.SCI_DOCLINEFROMVISIBLE, first_visible_line + send(QsciScintilla.SCI_LINESONSCREEN)
+        )
+        return send(QsciScintilla.SCI_POSITIONFROMLINE, first_line), send(
+            QsciScintilla.SCI_GETLINEENDPOSITION, last_line
+        )
+
+    def _stop_highlighting(self) -> None:
+        self._highlight_timer.stop()
+        self._highlighted_key = None
+        self._pending_matches = None
+        self._found_matches = None
         self.find_field.setStyleSheet("")
+
+    def _reset_highlighting(self) -> None:
+        self._stop_highlighting()
         self.clear_search_indicators()
-        if self.isHidden():
+
+    @instrumented("FindAndReplaceWidget.highlight_all_find_results")
+    def highlight_all_find_results(self) -> None:
+        """Highlight all search results.
+
+        Results in the visible part of the document are highlighted immediately, the other ones
+        later, by chunks, when the application is idle (see `_highlight_next_chunk()`).
+
+        Results are cached for each search and each revision of the document,
+        so moving the cursor doesn't trigger a new search.
+
+        Previous results are not cleared first: the search indicators are only updated where
+        the results changed (see `Indicator.set_ranges()`).
+        """
+        editor = self.current_mcq_editor
+        if editor is None:
             return
         to_find = self.find_field.text()
-        if not to_find:
+        if self.isHidden() or not to_find:
+            self._reset_highlighting()
             return
-        text = self.current_mcq_editor.text()
-        # if not self.caseCheckBox.isChecked():
-        #     to_find = to_find.lower()
-        #     text = text.lower()
-        # Scintilla positions correspond to a number of bytes, not a number of characters.
-        to_find_as_bytes = to_find.encode("utf8")
-        text_as_bytes = text.encode("utf8")
-        flags = 0
-        if not self.caseCheckBox.isChecked():
-            flags |= re.IGNORECASE
-        if not self.regexCheckBox.isChecked():
-            to_find_as_bytes = re.escape(to_find_as_bytes)
-        if self.wholeCheckBox.isChecked():
-            to_find_as_bytes = rb"\b" + to_find_as_bytes + rb"\b"
-
-        start = 0
-        end = len(text_as_bytes)
+        pattern, flags = search_pattern(
+            to_find,
+            is_regex=self.regexCheckBox.isChecked(),
+            case_sensitive=self.caseCheckBox.isChecked(),
+            whole_words=self.wholeCheckBox.isChecked(),
+        )
         if self.selectionOnlyCheckBox.isChecked():
             start, end = self.selection_range()
+        else:
+            start, end = 0, editor.length()
+        key = SearchKey(editor.editor_id, pattern, flags, editor.revision, start, end)
+        if key == self._highlighted_key:
+            return
+        self._stop_highlighting()
         try:
-            for match in re.finditer(to_find_as_bytes, text_as_bytes[start:end], flags=flags):
-                self.current_mcq_editor.SendScintilla(
-                    QsciScintilla.SCI_INDICATORFILLRANGE, start + match.start(), match.end() - match.start()
-                )
+            regex = re.compile(pattern, flags)
         except re.error:
+            self.clear_search_indicators()
             self.find_field.setStyleSheet("background-color: #ffe2db")
+            return
+        self._highlighted_key = key
+        self._highlighted_position = start
+        search_marker = editor.indicators.search_marker
+        # Clear the previous results outside the searched range.
+        search_marker.set_ranges([], 0, start)
+        search_marker.set_ranges([], end)
+        visible_start, visible_end = self._visible_range(editor)
+        visible_start, visible_end = max(start, visible_start), min(end, visible_end)
+        visible_matches: Iterable[tuple[int, int]]
+        if (cached_matches := self._matches_cache.get(key)) is not None:
+            visible_matches = cached_matches[
+                bisect_left(cached_matches, (visible_start,)) : bisect_left(cached_matches, (visible_end,))
+            ]
+            self._pending_matches = iter(cached_matches)
+        else:
+            text = editor.text()
+            visible_matches = finditer_bytes(regex, text, visible_start, visible_end)
+            self._pending_matches = finditer_bytes(regex, text, start, end)
+            self._found_matches = []
+        search_marker.set_ranges(visible_matches, visible_start, visible_end)
+        self._highlight_timer.start()
 
         # https://stackoverflow.com/questions/54305745/how-to-unselect-unhighlight-selected-and-highlighted-text-in-qscintilla-editor
 
+    @instrumented("FindAndReplaceWidget._highlight_next_chunk")
+    def _highlight_next_chunk(self) -> None:
+        """Highlight the next search results, during at most `HIGHLIGHT_CHUNK_DURATION` seconds."""
+        editor = self.current_mcq_editor
+        key = self._highlighted_key
+        if (
+            self._pending_matches is None
+            or key is None
+            or editor is None
+            or editor.editor_id != key.editor_id
+            or editor.revision != key.revision
+        ):
+            # The search results are obsolete (the document was modified, or another one was selected).
+            self._highlight_timer.stop()
+            self._highlighted_key = None
+            self._pending_matches = None
+            self._found_matches = None
+            return
+        deadline = perf_counter() + HIGHLIGHT_CHUNK_DURATION
+        chunk: list[tuple[int, int]] = []
+        finished = True
+        for match in self._pending_matches:
+            chunk.append(match)
+            # Don't call `perf_counter()` for each match.
+            if len(chunk) % 100 == 0 and perf_counter() > deadline:
+                finished = False
+                break
+        # All the results between the end of the previous chunk and the end of this one are known.
+        chunk_end = key.end if finished else chunk[-1][1]
+        editor.indicators.search_marker.set_ranges(chunk, self._highlighted_position, chunk_end)
+        self._highlighted_position = chunk_end
+        if self._found_matches is not None:
+            self._found_matches.extend(chunk)
+        if finished:
+            self._highlight_timer.stop()
+            self._pending_matches = None
+            if self._found_matches is not None:
+                if len(self._matches_cache) >= MAX_CACHED_SEARCHES:
+                    # Remove the oldest search.
+                    del self._matches_cache[next(iter(self._matches_cache))]
+                self._matches_cache[key] = self._found_matches
+                self._found_matches = None
+
+    def finish_highlighting(self) -> None:
+        """Highlight immediately all the remaining search results."""
+        while self._pending_matches is not None:
+            self._highlight_next_chunk()
+
     def display_replace_widgets(self, display: bool) -> None:
         self.replace_label.setVisible(display)
         self.replace_field.setVisible(display)
         self.replace_button.setVisible(display)
         self.replace_all_button.setVisible(display)
 
-    def replace_all(self) -> None:
-        if self.current_mcq_editor is not None:
-            # Do NOT reset cursor position (it would discard selection!)
-            # self.current_mcq_editor.setCursorPosition(0, 0)
-            self.current_mcq_editor.SendScintilla(QsciScintilla.SCI_BEGINUNDOACTION)
-            while self.find_and_replace(action=SearchAction.REPLACE):
-                pass
-            self.current_mcq_editor.SendScintilla(QsciScintilla.SCI_ENDUNDOACTION)
-            self.current_mcq_editor.setFocus()
+    @instrumented("FindAndReplaceWidget.replace_all")
+    def replace_all(self) -> int:
+        """Replace all search results in the document (or in the selection), and return their number.
+
+        All the replacements are done at once, as a single undoable modification,
+        and the code is analyzed only once.
+        """
+        editor = self.current_mcq_editor
+        if editor is None:
+            return 0
+        is_regex = self.regexCheckBox.isChecked()
+        pattern, flags = search_pattern(
+            self.find_field.text(),
+            is_regex=is_regex,
+            case_sensitive=self.caseCheckBox.isChecked(),
+            whole_words=self.wholeCheckBox.isChecked(),
+        )
+        selection_only = self.selectionOnlyCheckBox.isChecked()
+        start, end = self.selection_range() if selection_only else (0, editor.length())
+        text = editor.text().encode("utf8")
+        try:
+            new_text, count = replace_matches(
+                text,
+                re.compile(pattern, flags),
+                self.replace_field.text(),
+                is_regex,
+                start,
+                end,
+            )
+        except re.error as e:
+            self.find_field.setStyleSheet("background-color: #ffe2db")
+            self.main_window.statusbar.showMessage(f"Invalid search or replacement: {e}")
+            return 0
+        if count > 0:
+            position = editor.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS)
+            new_end = start + len(new_text)
+            editor.replace_range(start, end, new_text)
+            if selection_only:
+                editor.SendScintilla(QsciScintilla.SCI_SETSEL, start, new_end)
+            elif position >= end:
+                editor.SendScintilla(QsciScintilla.SCI_GOTOPOS, position + new_end - end)
+            elif position > start:
+                # The cursor was inside the modified text.
+                editor.SendScintilla(QsciScintilla.SCI_GOTOPOS, new_end)
+            self.new_search = True
+        self.main_window.statusbar.showMessage(f"{count} occurrence{'s' if count > 1 else ''} replaced.")
+        editor.setFocus()
+        return count
 
     def find_and_replace(self, action: SearchAction) -> bool:
         # Because of `reset_search()` method hack (see comment there),
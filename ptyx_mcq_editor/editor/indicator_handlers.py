@@ -8,13 +8,15 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 from functools import partial
 
-from typing import ClassVar, TYPE_CHECKING, Iterator, Literal
+from typing import ClassVar, TYPE_CHECKING, Iterable, Iterator, Literal
 
 from PyQt6.Qsci import QsciScintilla
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QColor, QCursor
 from PyQt6.QtWidgets import QMenu
 
+from ptyx_mcq_editor.tools.indicator_ranges import IndicatorRanges, Range
+
 if TYPE_CHECKING:
     from ptyx_mcq_editor.editor.editor_widget import EditorWidget
 
@@ -57,6 +59,8 @@ class Indicator(ABC):
 
     def __init__(self, editor: "EditorWidget"):
         self.editor = editor
+        # Ranges of positions where this indicator is currently set in Scintilla.
+        self.ranges = IndicatorRanges()
         for property_name, property_value in asdict(self.styling).items():
             if property_value is not None:
                 sci_code = getattr(QsciScintilla, "SCI_INDICSET" + property_name.upper().replace("_", ""))
@@ -78,24 +82,30 @@ class Indicator(ABC):
 
     def apply(self, start_line: int, start_col: int, end_line: int, end_col: int) -> None:
         """Apply this indicator from position `start` to position `end`."""
-        self.editor.fillIndicatorRange(start_line, start_col, end_line, end_col, self.num)
+        start = self.editor.positionFromLineIndex(start_line, start_col)
+        end = self.editor.positionFromLineIndex(end_line, end_col)
+        self.set_ranges([(start, end)], start, end)
 
-    # def apply(self, start: int, end: int) -> None:
-    #     """Apply this indicator from position `start` to position `end`."""
-    #     send = self.editor.SendScintilla
-    #     send(QsciScintilla.SCI_SETINDICATORCURRENT, self.num)
-    #     send(QsciScintilla.SCI_SETINDICATORVALUE, self.num)
-    #     send(QsciScintilla.SCI_INDICATORFILLRANGE, start, end - start)
+    def set_ranges(self, ranges: Iterable[Range], start: int = 0, end: int | None = None) -> None:
+        """Apply this indicator to the given ranges of positions, and clear it elsewhere between `start` and `end`.
 
-    # def apply_to_line(self, line: int, start: int = 0, end: int | None = None) -> None:
-    #     """Apply this indicator from index `start` to index `end` to line `line`."""
-    #     if end is None:
-    #         end = len(self.editor.text(line))
-    #     self.editor.fillIndicatorRange(line, start, line, end, self.num)
+        Only the differences with the current ranges are sent to Scintilla, so the ranges
+        which didn't change are not repainted.
+        """
+        to_clear, to_fill = self.ranges.diff(ranges, start, end)
+        if not to_clear and not to_fill:
+            return
+        send = self.editor.SendScintilla
+        send(QsciScintilla.SCI_SETINDICATORCURRENT, self.num)
+        for range_start, range_end in to_clear:
+            send(QsciScintilla.SCI_INDICATORCLEARRANGE, range_start, range_end - range_start)
+            self.ranges.clear(range_start, range_end)
+        for range_start, range_end in to_fill:
+            send(QsciScintilla.SCI_INDICATORFILLRANGE, range_start, range_end - range_start)
+            self.ranges.fill(range_start, range_end)
 
     def clear(self) -> None:
-        last_line = self.editor.lines() - 1
-        self.editor.clearIndicatorRange(0, 0, last_line, len(self.editor.text(last_line)), self.num)
+        self.set_ranges([])
 
 
 class SearchMarker(Indicator):
@@ -265,9 +275,30 @@ class Indicators:
     def __iter__(self) -> Iterator[Indicator]:
         return iter(self.indicators_by_num.values())
 
+    def on_modified(self, position: int, length: int, inserted: bool) -> None:
+        """Update the ranges of all indicators, after `length` bytes were inserted or deleted at `position`.
+
+        Scintilla moves the indicators itself, so this must be called after each modification of the document.
+        """
+        for indicator in self:
+            if inserted:
+                indicator.ranges.on_insert(position, length)
+            else:
+                indicator.ranges.on_delete(position, length)
+
     # def find(self, num: int) -> Indicator:
     #     return self._reverse_search[num]
 
+    def indicators_at(self, position: int) -> list[Indicator]:
+        """Return the indicators set at the given position.
+
+        A single Scintilla query returns all of them, as a bitmask of their numbers.
+        """
+        bitmask = self.editor.SendScintilla(QsciScintilla.SCI_INDICATORALLONFOR, position)
+        if bitmask == 0:
+            return []
+        return [indicator for num, indicator in self.indicators_by_num.items() if bitmask & (1 << num)]
+
     def _save_modifiers(self, _, __, keys):
         self._modifiers = keys
 
@@ -284,13 +315,12 @@ class Indicators:
         ctrl_pressed = self._modifiers & Qt.KeyboardModifier.ControlModifier
         shift_pressed = self._modifiers & Qt.KeyboardModifier.ShiftModifier
         handler_called = False
-        for indicator in self:
-            if indicator.is_present_at(position):
-                # print(indicator.__class__.__name__, "detected.")
-                getattr(indicator, redirect_to)(
-                    line=line, index=index, ctrl_pressed=ctrl_pressed, shift_pressed=shift_pressed
-                )
-                handler_called = True
+        for indicator in self.indicators_at(position):
+            # print(indicator.__class__.__name__, "detected.")
+            getattr(indicator, redirect_to)(
+                line=line, index=index, ctrl_pressed=ctrl_pressed, shift_pressed=shift_pressed
+            )
+            handler_called = True
 
         if redirect_to == "on_left_click" and shift_pressed:
             # Scintilla select text as a side effect when clicking with shift key pressed.
@@ -1,12 +1,14 @@
 import builtins
 import re
 from enum import IntEnum, auto, Enum
+from functools import cache
 from keyword import iskeyword
 from typing import NamedTuple, TYPE_CHECKING
 
 from PyQt6.Qsci import QsciLexerCustom, QsciScintilla
 from PyQt6.QtGui import QColor, QFont
-from ptyx.context import GLOBAL_CONTEXT
+
+from ptyx_mcq_editor.tools.instrumentation import instrumented
 
 if TYPE_CHECKING:
     from ptyx_mcq_editor.editor.editor_widget import EditorWidget
@@ -29,12 +31,7 @@ def get_all_tags() -> tuple[set[str], set[str]]:
     return tags_with_a_python_arg, tags_set - tags_with_a_python_arg
 
 
-TAGS_WITH_A_PYTHON_ARG, OTHER_TAGS = get_all_tags()
-OTHER_TAGS.add("#")
-
 PYTHON_BUILTINS = set(vars(builtins))
-PTYX_BUILTINS = set(GLOBAL_CONTEXT)
-ALL_BUILTINS = PYTHON_BUILTINS | PTYX_BUILTINS
 
 
 CONFIG_KEYS = {
@@ -174,46 +171,72 @@ VAR_NAME = r"#(?:\[[^]]+\])?[A-Za-z_][A-Za-z0-9_]*"
 #            #[option1, ...]VAR_NAME
 VAR_NAME_REGEX = re.compile(VAR_NAME)
 
-# Test in https://regex101.com/
-TOKENS_REGEX = re.compile(
-    "|".join(
-        [
-            r"^\.{4,}\n",  # start of a python code section: ...........
-            "|".join(
-                f"#{tag}\\{{" for tag in TAGS_WITH_A_PYTHON_ARG
-            ),  # Tags who accept a python argument, like #IF{.
-            VAR_NAME,  # pTyX tag or variable: #TAG_NAME
-            "^-- DIR: .*\n",  # change directory directive
-            "^-- ",  # include directive
-            "^!-- .*\n",  # disabled include directive
-            "^={3,}\n",  # header delimiter: ===
-            "^<{3,}\n",  # MCQ start: <<<
-            "^>{3,}\n",  # MCQ end: >>>
-            "|".join(f"^{key}\\s*=" for key in CONFIG_KEYS),  # configuration keys
-            "^# .*$",  # whole line comment
-            " # .*$",  # comment at the end of a line
-            "#[-+*=?#]",  # special pTyX tags: #+, #-, #*, #=, #?, ##
-            r"#\{",  # starts a pTyX expression: #{
-            "^[-+!] ",  # an answer (incorrect, correct or disabled)
-            r"^\?\{",  # a conditional answer (whose truth value depends on the condition)
-            r"\\\\",  # \\ (to parse python strings, it's easier to consider it as a single token)
-            r"\\'",  # \' (to parse python strings, it's easier to consider it as a single token)
-            r'\\"',  # \" (to parse python strings, it's easier to consider it as a single token)
-            r"^OR[ \t]*\n",  # OR (introduce another version of an exercise)
-            r"\\[a-zA-Z]+",  # LaTeX macro: \macro
-            r"\\(?:%|{|})",  # Escape %, {, } in LaTeX
-            "'{3}",  # '''
-            '"{3}',  # """
-            r"\n",  # \n
-            r"[ \t]+",  # space or tab (don't include newlines!)
-            r"\w+",  # potential variable names or number
-            r"\.\d+",  # number (float)
-            r"\d+\.?",  # number (float)
-            r"\W",  # non-alphanumeric symbol
-        ]
-    ),
-    flags=re.MULTILINE,
-)
+
+class Lexicon(NamedTuple):
+    """Tags and builtins recognized by the lexer, and the regex used to split the code into tokens."""
+
+    tags_with_a_python_arg: frozenset[str]
+    other_tags: frozenset[str]
+    builtins: frozenset[str]
+    tokens_regex: re.Pattern[str]
+
+
+@cache
+def get_lexicon() -> Lexicon:
+    """Return the lexicon of the lexer.
+
+    It is built on first use only: collecting the tags and the builtins requires
+    to import pTyX and pTyX-MCQ compilers, which is slow (see also `preload_modules()`).
+    """
+    from ptyx.context import GLOBAL_CONTEXT
+
+    tags_with_a_python_arg, other_tags = get_all_tags()
+    # Test in https://regex101.com/
+    tokens_regex = re.compile(
+        "|".join(
+            [
+                r"^\.{4,}\n",  # start of a python code section: ...........
+                "|".join(
+                    f"#{tag}\\{{" for tag in tags_with_a_python_arg
+                ),  # Tags who accept a python argument, like #IF{.
+                VAR_NAME,  # pTyX tag or variable: #TAG_NAME
+                "^-- DIR: .*\n",  # change directory directive
+                "^-- ",  # include directive
+                "^!-- .*\n",  # disabled include directive
+                "^={3,}\n",  # header delimiter: ===
+                "^<{3,}\n",  # MCQ start: <<<
+                "^>{3,}\n",  # MCQ end: >>>
+                "|".join(f"^{key}\\s*=" for key in CONFIG_KEYS),  # configuration keys
+                "^# .*$",  # whole line comment
+                " # .*$",  # comment at the end of a line
+                "#[-+*=?#]",  # special pTyX tags: #+, #-, #*, #=, #?, ##
+                r"#\{",  # starts a pTyX expression: #{
+                "^[-+!] ",  # an answer (incorrect, correct or disabled)
+                r"^\?\{",  # a conditional answer (whose truth value depends on the condition)
+                r"\\\\",  # \\ (to parse python strings, it's easier to consider it as a single token)
+                r"\\'",  # \' (to parse python strings, it's easier to consider it as a single token)
+                r'\\"',  # \" (to parse python strings, it's easier to consider it as a single token)
+                r"^OR[ \t]*\n",  # OR (introduce another version of an exercise)
+                r"\\[a-zA-Z]+",  # LaTeX macro: \macro
+                r"\\(?:%|{|})",  # Escape %, {, } in LaTeX
+                "'{3}",  # '''
+                '"{3}',  # """
+                r"\n",  # \n
+                r"[ \t]+",  # space or tab (don't include newlines!)
+                r"\w+",  # potential variable names or number
+                r"\.\d+",  # number (float)
+                r"\d+\.?",  # number (float)
+                r"\W",  # non-alphanumeric symbol
+            ]
+        ),
+        flags=re.MULTILINE,
+    )
+    return Lexicon(
+        frozenset(tags_with_a_python_arg),
+        frozenset(other_tags | {"#"}),
+        frozenset(PYTHON_BUILTINS | set(GLOBAL_CONTEXT)),
+        tokens_regex,
+    )
 
 
 class MyLexer(QsciLexerCustom):
@@ -256,6 +279,7 @@ class MyLexer(QsciLexerCustom):
             return Style(style).name
         return ""
 
+    @instrumented("MyLexer.styleText")
     def styleText(self, start: int, end: int) -> None:
         """Style portion of text from `start` to `end`.
 
@@ -275,7 +299,8 @@ class MyLexer(QsciLexerCustom):
         # ---------------------
 
         # 'token_list' is a list of tuples: (token_name, token_len)
-        token_list: list[str] = TOKENS_REGEX.findall(text)
+        lexicon = get_lexicon()
+        token_list: list[str] = lexicon.tokens_regex.findall(text)
 
         # 4. Style the text
         # ------------------
@@ -294,7 +319,7 @@ class MyLexer(QsciLexerCustom):
         for i, token in enumerate(token_list):
             assert isinstance(token, str), token
             old_mode_value = mode
-            style, mode = self._get_token_style_and_mode(token, mode, style, previous_mode)
+            style, mode = self._get_token_style_and_mode(token, mode, style, previous_mode, lexicon)
             if mode != old_mode_value:
                 previous_mode = old_mode_value
             # In setStyling, the length is the number of bytes, not the number of unicode characters !
@@ -303,7 +328,7 @@ class MyLexer(QsciLexerCustom):
 
     @staticmethod
     def _get_token_style_and_mode(
-        token: str, mode: Mode, style: Style, previous_mode: Mode
+        token: str, mode: Mode, style: Style, previous_mode: Mode, lexicon: Lexicon
     ) -> tuple[Style, Mode]:
         if style == Style.PTYX_COMMENT:
             if token == "\n":
@@ -360,7 +385,7 @@ class MyLexer(QsciLexerCustom):
                 mode = Mode.PYTHON_STRING
             elif iskeyword(token) or token in ("let", "case", "match"):
                 style = Style.PYTHON_KEYWORD
-            elif token in ALL_BUILTINS:
+            elif token in lexicon.builtins:
                 style = Style.PYTHON_BUILTIN
             elif token.strip(".").isdigit():
                 style = Style.PYTHON_INT
@@ -371,9 +396,9 @@ class MyLexer(QsciLexerCustom):
         elif token.startswith("#"):
             if token[1:].startswith(" "):
                 style = Style.PTYX_COMMENT
-            elif token[1:] in OTHER_TAGS:
+            elif token[1:] in lexicon.other_tags:
                 style = Style.PTYX_TAG
-            elif token[1:-1] in TAGS_WITH_A_PYTHON_ARG:
+            elif token[1:-1] in lexicon.tags_with_a_python_arg:
                 style = Style.PTYX_TAG
                 mode = Mode.EXPRESSION
             elif token == "#{":
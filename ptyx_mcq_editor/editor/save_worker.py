@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ptyx_mcq_editor.tools.file_tools import atomic_write
+from ptyx_mcq_editor.tools.python_code_tools import format_each_python_block
+
+
+@dataclass
+class SaveResult:
+    """Result of a save operation, sent back to the main thread."""
+
+    doc_id: int
+    path: Path
+    # The saved content, once formatted.
+    content: str
+    # Editor revision when the content was snapshotted.
+    revision: int
+    is_copy: bool = False
+    error: str = ""
+
+
+class SaveWorker(QObject):
+    """Format a snapshot of the document content, then write it on disk.
+
+    This may be slow (ruff is launched to format python code, and the disk may be a network one),
+    so it is done in another thread by default, leaving the user interface responsive.
+    """
+
+    finished = pyqtSignal(SaveResult, name="finished")
+
+    def __init__(
+        self, doc_id: int, content: str, path: Path, revision: int, is_copy: bool = False, autoformat=True
+    ):
+        super().__init__(None)
+        self.doc_id = doc_id
+        self.content = content
+        self.path = path
+        self.revision = revision
+        self.is_copy = is_copy
+        self.autoformat = autoformat
+
+    def save(self) -> None:
+        result = SaveResult(self.doc_id, self.path, self.content, self.revision, is_copy=self.is_copy)
+        try:
+            if self.autoformat:
+                result.content = format_each_python_block(self.content)
+            atomic_write(self.path, result.content)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        self.finished.emit(result)
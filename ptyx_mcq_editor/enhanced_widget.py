@@ -1,22 +1,65 @@
 from typing import TYPE_CHECKING
 
+from PyQt6.QtCore import QObject, QEvent
 from PyQt6.QtWidgets import QWidget
 
+from ptyx_mcq_editor.tools.instrumentation import instrumented
+
 if TYPE_CHECKING:
     from ptyx_mcq_editor.main_window import McqEditorMainWindow
 
 
+class _ParentChangeFilter(QObject):
+    """Event filter clearing the cached main windows of a widget and its descendants when it is reparented.
+
+    An event filter is used (and not `QWidget.event()`), since `EnhancedWidget` is mostly used
+    as a mixin, after a Qt class which would shadow its `event()` method.
+    """
+
+    # noinspection PyMethodOverriding
+    def eventFilter(self, obj: QObject | None, event: QEvent | None) -> bool:
+        if event is not None and event.type() == QEvent.Type.ParentChange and obj is not None:
+            clear_main_window_cache(obj)
+        return False
+
+
+def clear_main_window_cache(widget: QObject) -> None:
+    """Clear the cached main window of the widget (if any) and of all its descendants."""
+    if isinstance(widget, EnhancedWidget):
+        widget._main_window_cache = None
+    for child in widget.findChildren(EnhancedWidget):
+        child._main_window_cache = None
+
+
+_parent_change_filter: _ParentChangeFilter | None = None
+
+
 class EnhancedWidget(QWidget):
+    _main_window_cache: "McqEditorMainWindow | None" = None
+
+    @instrumented("EnhancedWidget._get_main_window")
     def _get_main_window(self) -> "McqEditorMainWindow":
         from ptyx_mcq_editor.main_window import McqEditorMainWindow
 
+        global _parent_change_filter
+        if _parent_change_filter is None:
+            _parent_change_filter = _ParentChangeFilter()
         widget: QWidget = self
         while widget.parent() is not None:
+            # Watch the reparenting of all the ancestors, to clear the cached main window if needed.
+            # (Installing the same filter twice has no effect.)
+            widget.installEventFilter(_parent_change_filter)
             widget = widget.parent()  # type: ignore
         assert isinstance(widget, McqEditorMainWindow), widget
         return widget
 
-    # TODO: use a cache ?
     @property
+    @instrumented("EnhancedWidget.main_window")
     def main_window(self):
-        return self._get_main_window()
+        """The main window containing this widget.
+
+        It is cached, and the cache is cleared whenever the widget (or one of its ancestors) is reparented.
+        """
+        if self._main_window_cache is None:
+            self._main_window_cache = self._get_main_window()
+        return self._main_window_cache
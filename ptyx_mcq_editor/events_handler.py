@@ -3,17 +3,19 @@ from functools import wraps
 from pathlib import Path
 from typing import TYPE_CHECKING, Final, Sequence, Callable, Iterator
 
-from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtCore import QObject, Qt, pyqtSignal, QThread, QCoreApplication
 from PyQt6.QtGui import QDragEnterEvent
 from PyQt6.QtWidgets import QMessageBox, QFileDialog, QDialog, QDialogButtonBox
 from ptyx_mcq.other_commands.template import get_template_path
-from ptyx_mcq.other_commands.update import update_exercises
 
 from ptyx_mcq_editor.editor.editor_tab import EditorTab
 from ptyx_mcq_editor.editor.editor_widget import EditorWidget
+from ptyx_mcq_editor.editor.save_worker import SaveWorker, SaveResult
 from ptyx_mcq_editor.generated_ui import ask_for_saving_ui
 import ptyx_mcq_editor.param as param
 from ptyx_mcq_editor.settings import Document, Settings, Side, DocumentHasNoPath, SamePath
+from ptyx_mcq_editor.tools.instrumentation import instrumented
+from ptyx_mcq_editor.tools.reconciliation import reconcile, Remove, Move, Insert
 
 if TYPE_CHECKING:
     from ptyx_mcq_editor.main_window import McqEditorMainWindow
@@ -116,6 +118,8 @@ class FileEventsHandler(QObject):
         super().__init__(parent=main_window)
         self.main_window: Final = main_window
         self.freeze_update_ui: bool = False  # See update_ui() decorator docstring.
+        # Asynchronous saves in progress, by document id.
+        self._pending_saves: dict[int, tuple[QThread, SaveWorker]] = {}
         # self.file_missing.connect(self.create_missing_file)
 
     @update_ui
@@ -148,66 +152,74 @@ class FileEventsHandler(QObject):
     #      UI synchronization with settings
     # ==========================================
 
+    @instrumented("FileEventsHandler._update_ui")
     def _update_ui(self) -> None:
         """Update window and tab titles according to settings data.
 
         Assure synchronization between ui and settings."""
-        for side in Side:
-            docs = self.settings.docs(side)
-            tabs = self.book(side)
-            tab_bar = tabs.tabBar()
-            # print(f"Before: {side}: {docs.current_index=}, {len(docs)=}")
-            assert tab_bar is not None
-            # Synchronize tabs with docs, starting from the first doc.
-            # 1. For each document, if `i` is its position:
-            #    Test if there is a tab at a position `j >= i` corresponding to it.
-            #       - If `j == i`, nothing to do.
-            #       - If `j > i`, move tab from `j` to `i`.
-            #       - If there is no such tab, create it at position `i`.
-            # 2. When all docs have been handled, all remaining tabs must be removed.
-            # 3. Finally, set the index of the current tab to match the current document.
-            for i, doc in enumerate(docs):
-                # Assertion for step `i`: the docs and tabs are synchronized until index `i-1`.
-                for j in range(i, tabs.count()):
-                    widget = tabs.widget(j)
-                    assert isinstance(widget, EditorTab)
-                    if widget.doc is doc:
-                        if j != i:
-                            # Move matching tab to index i.
-                            tab_bar.moveTab(j, i)
-                        break
-                else:
-                    tabs.new_tab(doc, index=i)
-                tabs.setTabText(i, doc.title)
-            # Remove any remaining tab.
-            # We must start from the last one, to not change remaining tabs positions when destroying another one!
-            for j in range(tabs.count() - 1, len(docs) - 1, -1):
-                widget = tabs.widget(j)
-                tabs.removeTab(j)
-                widget.destroy()  # type: ignore
-
-            # Update current index.
-            if len(docs) > 0:
-                current_index = docs.current_index
-                if param.DEBUG:
-                    print(f"{side}: {docs.current_index=}")
-                assert current_index is not None
-                tabs.setCurrentIndex(current_index)
-            else:
-                if param.DEBUG:
-                    print(f"{side}: no document to select.")
-            # Set tooltips on tabs.
-            for i, doc in enumerate(docs):
-                tabs.tabBar().setTabToolTip(i, str(doc.path))  # type: ignore
+        # Tabs changes must not be handled as user events (see `on_tab_moved()` for example).
+        current_freeze_value = self.freeze_update_ui
+        self.freeze_update_ui = True
+        try:
+            for side in Side:
+                self._synchronize_tabs(side)
+        finally:
+            self.freeze_update_ui = current_freeze_value
 
         if len(docs := self.settings.docs()) > 0:
             self.main_window.setWindowTitle(f"{param.WINDOW_TITLE} - {docs.current_doc.title}")
         else:
             self.main_window.setWindowTitle(param.WINDOW_TITLE)
+        self.main_window.document_watcher.update_watched_paths()
         self.update_status_message()
         self.ui_updated.emit()
         print("UI updated.")
 
+    def _synchronize_tabs(self, side: Side) -> None:
+        docs = self.settings.docs(side)
+        tabs = self.book(side)
+        tab_bar = tabs.tabBar()
+        assert tab_bar is not None
+        # Synchronize tabs with docs, using a minimal list of insertions, moves and removals.
+        widgets: dict[int, EditorTab] = {}
+        for j in range(tabs.count()):
+            widget = tabs.widget(j)
+            assert isinstance(widget, EditorTab)
+            widgets[widget.doc.doc_id] = widget
+        documents = {doc.doc_id: doc for doc in docs}
+        for operation in reconcile(list(widgets), list(documents)):
+            match operation:
+                case Remove(index=j):
+                    widget = tabs.widget(j)
+                    tabs.removeTab(j)
+                    widget.destroy()  # type: ignore
+                case Move(from_index=j, to_index=i):
+                    tab_bar.moveTab(j, i)
+                case Insert(index=i, key=doc_id):
+                    tabs.new_tab(documents[doc_id], index=i)
+        # Only update the titles and tooltips which changed.
+        for i, doc in enumerate(docs):
+            widget = tabs.widget(i)
+            assert isinstance(widget, EditorTab) and widget.doc is doc
+            if widget.displayed_title != (title := doc.title):
+                tabs.setTabText(i, title)
+                widget.displayed_title = title
+            if widget.displayed_tooltip != (tooltip := str(doc.path)):
+                tab_bar.setTabToolTip(i, tooltip)
+                widget.displayed_tooltip = tooltip
+
+        # Update current index.
+        if len(docs) > 0:
+            current_index = docs.current_index
+            if param.DEBUG:
+                print(f"{side}: {docs.current_index=}")
+            assert current_index is not None
+            if tabs.currentIndex() != current_index:
+                tabs.setCurrentIndex(current_index)
+        else:
+            if param.DEBUG:
+                print(f"{side}: no document to select.")
+
     # ----------------------------------------------
     #      Settings synchronization on events
     # ==============================================
@@ -302,17 +314,21 @@ class FileEventsHandler(QObject):
         return True
 
     @update_ui
-    def save_doc(self, side: Side = None, index: int = None) -> bool:
+    def save_doc(self, side: Side = None, index: int = None, *, asynchronous: bool = False) -> bool:
         doc = self.settings.docs(side).doc(index)
-        return self.save_doc_as(side, index, None if doc is None else doc.path)
+        return self.save_doc_as(side, index, None if doc is None else doc.path, asynchronous=asynchronous)
 
     @update_ui
-    def save_doc_copy(self, side: Side = None, index: int = None, path: Path = None) -> bool:
-        return self.save_doc_as(side, index, path, mode=SaveMode.COPY)
+    def save_doc_copy(
+        self, side: Side = None, index: int = None, path: Path = None, *, asynchronous: bool = False
+    ) -> bool:
+        return self.save_doc_as(side, index, path, mode=SaveMode.COPY, asynchronous=asynchronous)
 
     @update_ui
-    def rename_doc(self, side: Side = None, index: int = None, path: Path = None) -> bool:
-        return self.save_doc_as(side, index, path, mode=SaveMode.RENAME)
+    def rename_doc(
+        self, side: Side = None, index: int = None, path: Path = None, *, asynchronous: bool = False
+    ) -> bool:
+        return self.save_doc_as(side, index, path, mode=SaveMode.RENAME, asynchronous=asynchronous)
 
     @update_ui
     def change_doc_state(self, doc: Document, is_saved: bool) -> bool:
@@ -327,8 +343,13 @@ class FileEventsHandler(QObject):
         path: Path = None,
         *,
         mode: SaveMode = SaveMode.NORMAL,
+        asynchronous: bool = False,
     ) -> bool:
-        """Save document. Return True if document was saved, else False."""
+        """Save document. Return True if document was saved, else False.
+
+        If `asynchronous` is True, the document content is formatted and written in another thread,
+        and True is returned as soon as the saving started.
+        """
         if index is None:
             index = self.settings.docs(side).current_index
         saved = False
@@ -372,15 +393,101 @@ class FileEventsHandler(QObject):
                     try:
                         if mode == SaveMode.RENAME:
                             doc.rename(path)
-                        doc.write(tab.editor.text(), path=path, is_copy=(mode == SaveMode.COPY))
-                        tab.editor.on_save()
-                        saved = True
+                        path = doc.get_write_path(path)
+                        worker = SaveWorker(
+                            doc.doc_id,
+                            tab.editor.text(),
+                            path,
+                            tab.editor.revision,
+                            is_copy=(mode == SaveMode.COPY),
+                        )
+                        if asynchronous:
+                            self._start_save_thread(worker)
+                            saved = True
+                        else:
+                            # Wait for any previous saving of this document, to not mix them up.
+                            self.wait_for_pending_saves()
+                            result: list[SaveResult] = []
+                            worker.finished.connect(result.append)
+                            worker.save()
+                            saved = self.on_doc_saved(doc, result[0])
+                            if not saved:
+                                path = None
                     except (IOError, DocumentHasNoPath, SamePath) as e:
                         # TODO: Custom message
                         print(e)
                         path = None
         return saved
 
+    def _start_save_thread(self, worker: SaveWorker) -> None:
+        if worker.doc_id in self._pending_saves:
+            # The document is already being saved: the previous save must be finished first.
+            self.wait_for_pending_saves()
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        # Store worker and thread, or else they will be garbage-collected.
+        self._pending_saves[worker.doc_id] = (thread, worker)
+        worker.finished.connect(self.on_save_thread_finished)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        # noinspection PyUnresolvedReferences
+        thread.started.connect(worker.save)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def on_save_thread_finished(self, result: SaveResult) -> None:
+        self._pending_saves.pop(result.doc_id, None)
+        doc = Document.all_docs.get(result.doc_id)
+        if doc is None:
+            print(f"Document {result.doc_id} has been closed while saving it.")
+        else:
+            self.on_doc_saved(doc, result)
+
+    def is_being_saved(self, doc: Document) -> bool:
+        return doc.doc_id in self._pending_saves
+
+    def wait_for_pending_saves(self) -> None:
+        """Wait until all the asynchronous saves are finished."""
+        while self._pending_saves:
+            thread, _ = next(iter(self._pending_saves.values()))
+            # Don't block on `thread.wait()`: the events must be processed,
+            # since the `finished` signal of the worker is queued in this thread.
+            thread.wait(10)
+            QCoreApplication.processEvents()
+
+    @update_ui
+    def on_doc_saved(self, doc: Document, result: SaveResult) -> bool:
+        """Update the document and its editor once the document content has been written on disk.
+
+        Return True if the document was successfully saved, False else.
+        """
+        if result.error:
+            print(result.error)
+            QMessageBox.critical(
+                self.main_window, "Saving failed", f"Unable to save document {doc.title}:\n{result.error}"
+            )
+            return False
+        doc.on_written(result.path, is_copy=result.is_copy)
+        tab = self.find_tab(doc)
+        if tab is not None and not result.is_copy:
+            if tab.editor.revision == result.revision:
+                # Editor content did not change while saving, so display the formatted content.
+                tab.editor.on_save(result.content)
+            else:
+                # Editor content changed while saving, so the saved content is already obsolete.
+                doc.is_saved = False
+        return True
+
+    def find_tab(self, doc: Document) -> EditorTab | None:
+        """Return the tab containing the given document, if any."""
+        for side in Side:
+            book = self.book(side)
+            for i in range(book.count()):
+                tab = book.widget(i)
+                if isinstance(tab, EditorTab) and tab.doc is doc:
+                    return tab
+        return None
+
     @update_ui
     def close_doc(self, side: Side = None, index: int = None) -> bool:
         """Close given document if it is saved, else ask user what to do.
@@ -461,6 +568,7 @@ class FileEventsHandler(QObject):
 
         Return True if we can quit program, or False is user canceled action.
         """
+        self.wait_for_pending_saves()
         unsaved_docs: dict[tuple[Side, int], str] = {
             (side, index): doc.title
             for side in Side
@@ -491,6 +599,9 @@ class FileEventsHandler(QObject):
     # ============================
 
     def update_ptyx_imports(self):
+        # Imported here, since it is slow to import.
+        from ptyx_mcq.other_commands.update import update_exercises
+
         if (current_doc := self.settings.docs().current_doc) is not None and self.save_doc():
             path = current_doc.path
             assert path is not None
@@ -1,9 +1,10 @@
 from typing import TYPE_CHECKING
 
 from PyQt6 import QtWidgets
-from PyQt6.QtCore import QPoint, Qt
+from PyQt6.QtCore import QPoint, Qt, QTimer
 from PyQt6.QtWidgets import QMenu
 
+import ptyx_mcq_editor.param as param
 from ptyx_mcq_editor.editor.editor_tab import EditorTab
 from ptyx_mcq_editor.settings import Side, Document
 from ptyx_mcq_editor.enhanced_widget import EnhancedWidget
@@ -18,6 +19,10 @@ if TYPE_CHECKING:
     from ptyx_mcq_editor.main_window import McqEditorMainWindow
 
 
+# Delay (in ms) before creating the editor of another tab in the background.
+WARM_UP_DELAY = 100
+
+
 class FilesBook(QtWidgets.QTabWidget, EnhancedWidget):
     """This class is aimed at containing all the opened files.
 
@@ -33,6 +38,11 @@ class FilesBook(QtWidgets.QTabWidget, EnhancedWidget):
         self.setTabsClosable(True)
         self.setMovable(True)
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        # Used to create the editors of the next tabs in the background (see `warm_up()`).
+        self._warm_up_timer = QTimer(self)
+        self._warm_up_timer.setSingleShot(True)
+        self._warm_up_timer.setInterval(WARM_UP_DELAY)
+        self._warm_up_timer.timeout.connect(self.warm_up)
 
     def finish_initialization(self, side: Side) -> None:
         self.side = side
@@ -40,6 +50,7 @@ class FilesBook(QtWidgets.QTabWidget, EnhancedWidget):
         handler = self.main_window.file_events_handler
         self.tabCloseRequested.connect(lambda index: handler.close_doc(side=side, index=index))
         self.currentChanged.connect(lambda index: handler.on_tab_selected(side=side, index=index))
+        self.currentChanged.connect(lambda index: self._warm_up_timer.start())
 
         # TODO: For drag-and-dropping a tab from one widget to another one:
         #  https://forum.qt.io/topic/67542/drag-tabs-between-qtabwidgets/5
@@ -81,6 +92,25 @@ class FilesBook(QtWidgets.QTabWidget, EnhancedWidget):
         self.insertTab(index, EditorTab(self, doc, content=content), doc.title)
         # self.setCurrentIndex(self.count() - 1)
 
+    def warm_up(self) -> None:
+        """Create the editor of one of the tabs near the current one, if not already done.
+
+        Only one editor is created at a time, to keep the user interface responsive:
+        the method is called again later if there are other editors to create.
+        """
+        current_index = self.currentIndex()
+        if current_index == -1:
+            return
+        # Next tabs first, then previous ones.
+        indexes = [current_index + i for i in range(1, param.WARM_UP_TABS + 1)]
+        indexes += [current_index - i for i in range(1, param.WARM_UP_TABS + 1)]
+        for index in (i for i in indexes if 0 <= i < self.count()):
+            tab = self.widget(index)
+            if isinstance(tab, EditorTab) and not tab.is_materialized:
+                tab.materialize()
+                self._warm_up_timer.start()
+                return
+
     def close_tab(self, index: int) -> None:
         widget = self.widget(index)
         if widget is not None and widget.close():
@@ -157,6 +157,117 @@ class Ui_MainWindow(object):
         self.verticalLayout_2.addItem(spacerItem2)
         self.search_dock.setWidget(self.dockWidgetContents_2)
         MainWindow.addDockWidget(QtCore.Qt.DockWidgetArea(2), self.search_dock)
+        self.files_search_dock = FilesSearchWidget(parent=MainWindow)
+        self.files_search_dock.setObjectName("files_search_dock")
+        self.dockWidgetContents_3 = QtWidgets.QWidget()
+        self.dockWidgetContents_3.setObjectName("dockWidgetContents_3")
+        self.verticalLayout_4 = QtWidgets.QVBoxLayout(self.dockWidgetContents_3)
+        self.verticalLayout_4.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.files_search_fields = QtWidgets.QFormLayout()
+        self.files_search_fields.setObjectName("files_search_fields")
+        self.files_find_label = QtWidgets.QLabel(parent=self.dockWidgetContents_3)
+        self.files_find_label.setObjectName("files_find_label")
+        self.files_search_fields.setWidget(0, QtWidgets.QFormLayout.ItemRole.LabelRole, self.files_find_label)
+        self.files_find_field = QtWidgets.QLineEdit(parent=self.dockWidgetContents_3)
+        self.files_find_field.setObjectName("files_find_field")
+        self.files_search_fields.setWidget(0, QtWidgets.QFormLayout.ItemRole.FieldRole, self.files_find_field)
+        self.files_replace_label = QtWidgets.QLabel(parent=self.dockWidgetContents_3)
+        self.files_replace_label.setObjectName("files_replace_label")
+        self.files_search_fields.setWidget(1, QtWidgets.QFormLayout.ItemRole.LabelRole, self.files_replace_label)
+        self.files_replace_field = QtWidgets.QLineEdit(parent=self.dockWidgetContents_3)
+        self.files_replace_field.setObjectName("files_replace_field")
+        self.files_search_fields.setWidget(1, QtWidgets.QFormLayout.ItemRole.FieldRole, self.files_replace_field)
+        self.files_scope_label = QtWidgets.QLabel(parent=self.dockWidgetContents_3)
+        self.files_scope_label.setObjectName("files_scope_label")
+        self.files_search_fields.setWidget(2, QtWidgets.QFormLayout.ItemRole.LabelRole, self.files_scope_label)
+        self.files_scope_layout = QtWidgets.QHBoxLayout()
+        self.files_scope_layout.setObjectName("files_scope_layout")
+        self.files_scope_combo = QtWidgets.QComboBox(parent=self.dockWidgetContents_3)
+        self.files_scope_combo.setObjectName("files_scope_combo")
+        self.files_scope_combo.addItem("")
+        self.files_scope_combo.addItem("")
+        self.files_scope_layout.addWidget(self.files_scope_combo)
+        self.files_directory_field = QtWidgets.QLineEdit(parent=self.dockWidgetContents_3)
+        self.files_directory_field.setObjectName("files_directory_field")
+        self.files_scope_layout.addWidget(self.files_directory_field)
+        self.files_browse_button = QtWidgets.QPushButton(parent=self.dockWidgetContents_3)
+        self.files_browse_button.setObjectName("files_browse_button")
+        self.files_scope_layout.addWidget(self.files_browse_button)
+        self.files_search_fields.setLayout(2, QtWidgets.QFormLayout.ItemRole.FieldRole, self.files_scope_layout)
+        self.verticalLayout_4.addLayout(self.files_search_fields)
+        self.files_options_layout = QtWidgets.QHBoxLayout()
+        self.files_options_layout.setObjectName("files_options_layout")
+        self.files_case_checkbox = QtWidgets.QCheckBox(parent=self.dockWidgetContents_3)
+        self.files_case_checkbox.setChecked(True)
+        self.files_case_checkbox.setObjectName("files_case_checkbox")
+        self.files_options_layout.addWidget(self.files_case_checkbox)
+        self.files_whole_checkbox = QtWidgets.QCheckBox(parent=self.dockWidgetContents_3)
+        self.files_whole_checkbox.setObjectName("files_whole_checkbox")
+        self.files_options_layout.addWidget(self.files_whole_checkbox)
+        self.files_regex_checkbox = QtWidgets.QCheckBox(parent=self.dockWidgetContents_3)
+        self.files_regex_checkbox.setObjectName("files_regex_checkbox")
+        self.files_options_layout.addWidget(self.files_regex_checkbox)
+        spacerItem3 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.files_options_layout.addItem(spacerItem3)
+        self.files_search_button = QtWidgets.QPushButton(parent=self.dockWidgetContents_3)
+        self.files_search_button.setObjectName("files_search_button")
+        self.files_options_layout.addWidget(self.files_search_button)
+        self.files_replace_all_button = QtWidgets.QPushButton(parent=self.dockWidgetContents_3)
+        self.files_replace_all_button.setObjectName("files_replace_all_button")
+        self.files_options_layout.addWidget(self.files_replace_all_button)
+        self.verticalLayout_4.addLayout(self.files_options_layout)
+        self.files_results_tree = QtWidgets.QTreeWidget(parent=self.dockWidgetContents_3)
+        self.files_results_tree.setHeaderHidden(True)
+        self.files_results_tree.setObjectName("files_results_tree")
+        self.verticalLayout_4.addWidget(self.files_results_tree)
+        self.files_search_status_label = QtWidgets.QLabel(parent=self.dockWidgetContents_3)
+        self.files_search_status_label.setText("")
+        self.files_search_status_label.setObjectName("files_search_status_label")
+        self.verticalLayout_4.addWidget(self.files_search_status_label)
+        self.files_search_dock.setWidget(self.dockWidgetContents_3)
+        MainWindow.addDockWidget(QtCore.Qt.DockWidgetArea(2), self.files_search_dock)
+        self.query_dock = ExercisesQueryWidget(parent=MainWindow)
+        self.query_dock.setObjectName("query_dock")
+        self.dockWidgetContents_4 = QtWidgets.QWidget()
+        self.dockWidgetContents_4.setObjectName("dockWidgetContents_4")
+        self.verticalLayout_5 = QtWidgets.QVBoxLayout(self.dockWidgetContents_4)
+        self.verticalLayout_5.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout_5.setObjectName("verticalLayout_5")
+        self.query_fields = QtWidgets.QFormLayout()
+        self.query_fields.setObjectName("query_fields")
+        self.query_label = QtWidgets.QLabel(parent=self.dockWidgetContents_4)
+        self.query_label.setObjectName("query_label")
+        self.query_fields.setWidget(0, QtWidgets.QFormLayout.ItemRole.LabelRole, self.query_label)
+        self.query_field = QtWidgets.QLineEdit(parent=self.dockWidgetContents_4)
+        self.query_field.setObjectName("query_field")
+        self.query_fields.setWidget(0, QtWidgets.QFormLayout.ItemRole.FieldRole, self.query_field)
+        self.query_directory_label = QtWidgets.QLabel(parent=self.dockWidgetContents_4)
+        self.query_directory_label.setObjectName("query_directory_label")
+        self.query_fields.setWidget(1, QtWidgets.QFormLayout.ItemRole.LabelRole, self.query_directory_label)
+        self.query_directory_layout = QtWidgets.QHBoxLayout()
+        self.query_directory_layout.setObjectName("query_directory_layout")
+        self.query_directory_field = QtWidgets.QLineEdit(parent=self.dockWidgetContents_4)
+        self.query_directory_field.setObjectName("query_directory_field")
+        self.query_directory_layout.addWidget(self.query_directory_field)
+        self.query_browse_button = QtWidgets.QPushButton(parent=self.dockWidgetContents_4)
+        self.query_browse_button.setObjectName("query_browse_button")
+        self.query_directory_layout.addWidget(self.query_browse_button)
+        self.query_button = QtWidgets.QPushButton(parent=self.dockWidgetContents_4)
+        self.query_button.setObjectName("query_button")
+        self.query_directory_layout.addWidget(self.query_button)
+        self.query_fields.setLayout(1, QtWidgets.QFormLayout.ItemRole.FieldRole, self.query_directory_layout)
+        self.verticalLayout_5.addLayout(self.query_fields)
+        self.query_results_tree = QtWidgets.QTreeWidget(parent=self.dockWidgetContents_4)
+        self.query_results_tree.setRootIsDecorated(False)
+        self.query_results_tree.setObjectName("query_results_tree")
+        self.verticalLayout_5.addWidget(self.query_results_tree)
+        self.query_status_label = QtWidgets.QLabel(parent=self.dockWidgetContents_4)
+        self.query_status_label.setText("")
+        self.query_status_label.setObjectName("query_status_label")
+        self.verticalLayout_5.addWidget(self.query_status_label)
+        self.query_dock.setWidget(self.dockWidgetContents_4)
+        MainWindow.addDockWidget(QtCore.Qt.DockWidgetArea(2), self.query_dock)
         self.publish_toolbar = PublishToolBar(parent=MainWindow)
         self.publish_toolbar.setObjectName("publish_toolbar")
         MainWindow.addToolBar(QtCore.Qt.ToolBarArea.TopToolBarArea, self.publish_toolbar)
@@ -194,10 +305,20 @@ class Ui_MainWindow(object):
         icon = QtGui.QIcon.fromTheme("edit-find-replace")
         self.actionReplace.setIcon(icon)
         self.actionReplace.setObjectName("actionReplace")
+        self.actionFind_in_files = QtGui.QAction(parent=MainWindow)
+        icon = QtGui.QIcon.fromTheme("edit-find")
+        self.actionFind_in_files.setIcon(icon)
+        self.actionFind_in_files.setObjectName("actionFind_in_files")
+        self.actionQuery_exercises = QtGui.QAction(parent=MainWindow)
+        self.actionQuery_exercises.setObjectName("actionQuery_exercises")
+        self.actionFind_duplicates = QtGui.QAction(parent=MainWindow)
+        self.actionFind_duplicates.setObjectName("actionFind_duplicates")
         self.actionNone = QtGui.QAction(parent=MainWindow)
         self.actionNone.setObjectName("actionNone")
         self.action_Send_Qscintilla_Command = QtGui.QAction(parent=MainWindow)
         self.action_Send_Qscintilla_Command.setObjectName("action_Send_Qscintilla_Command")
+        self.action_Performance_Statistics = QtGui.QAction(parent=MainWindow)
+        self.action_Performance_Statistics.setObjectName("action_Performance_Statistics")
         self.action_Close = QtGui.QAction(parent=MainWindow)
         icon = QtGui.QIcon.fromTheme("window-close")
         self.action_Close.setIcon(icon)
@@ -259,9 +380,13 @@ class Ui_MainWindow(object):
         self.menuCompilation.addAction(self.action_Pdf)
         self.menuCompilation.addAction(self.actionPublish)
         self.menu_Tools.addAction(self.action_Add_MCQ_Editor_to_start_menu)
+        self.menu_Tools.addAction(self.actionQuery_exercises)
+        self.menu_Tools.addAction(self.actionFind_duplicates)
         self.menu_Edit.addAction(self.actionFind)
         self.menu_Edit.addAction(self.actionReplace)
+        self.menu_Edit.addAction(self.actionFind_in_files)
         self.menuDebug.addAction(self.action_Send_Qscintilla_Command)
+        self.menuDebug.addAction(self.action_Performance_Statistics)
         self.menuImports.addAction(self.action_Update_imports)
         self.menuImports.addAction(self.action_Add_folder)
         self.menuImports.addAction(self.action_Open_file_from_current_import_line)
@@ -279,6 +404,11 @@ class Ui_MainWindow(object):
         self.menubar.addAction(self.menu_help.menuAction())
         self.findLabel.setBuddy(self.find_field)
         self.replace_label.setBuddy(self.replace_field)
+        self.files_find_label.setBuddy(self.files_find_field)
+        self.files_replace_label.setBuddy(self.files_replace_field)
+        self.files_scope_label.setBuddy(self.files_scope_combo)
+        self.query_label.setBuddy(self.query_field)
+        self.query_directory_label.setBuddy(self.query_directory_field)
 
         self.retranslateUi(MainWindow)
         self.left_tab_widget.setCurrentIndex(-1)
@@ -327,6 +457,33 @@ class Ui_MainWindow(object):
         self.next_button.setToolTip(_translate("MainWindow", "Find next occurence (F3)"))
         self.next_button.setText(_translate("MainWindow", "&Next"))
         self.next_button.setShortcut(_translate("MainWindow", "F3"))
+        self.files_search_dock.setWindowTitle(_translate("MainWindow", "Find in files"))
+        self.files_find_label.setText(_translate("MainWindow", "Fi&nd"))
+        self.files_replace_label.setText(_translate("MainWindow", "Re&place with"))
+        self.files_scope_label.setText(_translate("MainWindow", "Search &in"))
+        self.files_scope_combo.setItemText(0, _translate("MainWindow", "Files included by the current document"))
+        self.files_scope_combo.setItemText(1, _translate("MainWindow", "Directory"))
+        self.files_directory_field.setPlaceholderText(_translate("MainWindow", "Directory to search (recursively)"))
+        self.files_browse_button.setText(_translate("MainWindow", "&Browse..."))
+        self.files_case_checkbox.setText(_translate("MainWindow", "&Case sensitive"))
+        self.files_whole_checkbox.setText(_translate("MainWindow", "&Whole words only"))
+        self.files_regex_checkbox.setText(_translate("MainWindow", "R&egular Expression"))
+        self.files_search_button.setText(_translate("MainWindow", "&Search"))
+        self.files_replace_all_button.setText(_translate("MainWindow", "Replace &All"))
+        self.files_results_tree.headerItem().setText(0, _translate("MainWindow", "Results"))
+        self.query_dock.setWindowTitle(_translate("MainWindow", "Query exercises"))
+        self.query_label.setText(_translate("MainWindow", "&Query"))
+        self.query_field.setPlaceholderText(_translate("MainWindow", "answers>6, correct=0 -tag:ANSWERS_LIST, uses:a, defines:f, path:algebra..."))
+        self.query_directory_label.setText(_translate("MainWindow", "&Directory"))
+        self.query_directory_field.setPlaceholderText(_translate("MainWindow", "Directory of the exercises (searched recursively)"))
+        self.query_browse_button.setText(_translate("MainWindow", "&Browse..."))
+        self.query_button.setText(_translate("MainWindow", "&Search"))
+        self.query_results_tree.setSortingEnabled(True)
+        self.query_results_tree.headerItem().setText(0, _translate("MainWindow", "File"))
+        self.query_results_tree.headerItem().setText(1, _translate("MainWindow", "Line"))
+        self.query_results_tree.headerItem().setText(2, _translate("MainWindow", "Version"))
+        self.query_results_tree.headerItem().setText(3, _translate("MainWindow", "Answers"))
+        self.query_results_tree.headerItem().setText(4, _translate("MainWindow", "Correct"))
         self.publish_toolbar.setWindowTitle(_translate("MainWindow", "toolBar"))
         self.action_Open.setText(_translate("MainWindow", "&Open"))
         self.action_Open.setShortcut(_translate("MainWindow", "Ctrl+O"))
@@ -346,8 +503,14 @@ class Ui_MainWindow(object):
         self.actionFind.setShortcut(_translate("MainWindow", "Ctrl+F"))
         self.actionReplace.setText(_translate("MainWindow", "&Replace"))
         self.actionReplace.setShortcut(_translate("MainWindow", "Ctrl+H"))
+        self.actionFind_in_files.setText(_translate("MainWindow", "Find in f&iles"))
+        self.actionFind_in_files.setShortcut(_translate("MainWindow", "Ctrl+Alt+F"))
+        self.actionQuery_exercises.setText(_translate("MainWindow", "&Query exercises..."))
+        self.actionQuery_exercises.setShortcut(_translate("MainWindow", "Ctrl+Alt+Q"))
+        self.actionFind_duplicates.setText(_translate("MainWindow", "Find &duplicates of current file..."))
         self.actionNone.setText(_translate("MainWindow", "EMPTY"))
         self.action_Send_Qscintilla_Command.setText(_translate("MainWindow", "&Send Qscintilla Command"))
+        self.action_Performance_Statistics.setText(_translate("MainWindow", "&Performance Statistics"))
         self.action_Close.setText(_translate("MainWindow", "&Close"))
         self.action_Close.setShortcut(_translate("MainWindow", "Ctrl+W"))
         self.action_Empty_file.setText(_translate("MainWindow", "&Empty file"))
@@ -374,6 +537,8 @@ class Ui_MainWindow(object):
         self.actionSave_copy.setShortcut(_translate("MainWindow", "Ctrl+Alt+Shift+S"))
         self.actionRename_move.setText(_translate("MainWindow", "Ren&ame"))
         self.actionRename_move.setShortcut(_translate("MainWindow", "Ctrl+Alt+S"))
+from ptyx_mcq_editor.editor.exercises_query import ExercisesQueryWidget
+from ptyx_mcq_editor.editor.files_search import FilesSearchWidget
 from ptyx_mcq_editor.editor.find_and_replace import FindAndReplaceWidget
 from ptyx_mcq_editor.files_book import FilesBook
 from ptyx_mcq_editor.preview.tab_widget import CompilationTabs
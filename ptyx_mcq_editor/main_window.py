@@ -1,27 +1,28 @@
 #!/usr/bin/python3
 import shutil
 from argparse import Namespace
-from base64 import urlsafe_b64encode
 from pathlib import Path
 from tempfile import mkdtemp
 from typing import Final, Literal
 
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QCloseEvent, QIcon, QDropEvent, QDragEnterEvent
-from PyQt6.QtWidgets import QMainWindow, QMessageBox, QLabel
+from PyQt6.QtWidgets import QMainWindow, QMessageBox, QLabel, QDialog, QFileDialog, QTableWidgetItem
 
+from ptyx_mcq_editor.document_watcher import DocumentWatcher
+from ptyx_mcq_editor.editor.duplicates_search import SimilarExercisesSearch
 from ptyx_mcq_editor.editor.editor_widget import EditorWidget
 from ptyx_mcq_editor.events_handler import FileEventsHandler
+from ptyx_mcq_editor.generated_ui import dbg_performance_ui
 from ptyx_mcq_editor.generated_ui.main_ui import Ui_MainWindow
-from ptyx_mcq_editor.param import ICON_PATH
+from ptyx_mcq_editor.param import ICON_PATH, PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_SIZE
+from ptyx_mcq_editor.preview.compiler import get_preview_path, prune_preview_cache
 from ptyx_mcq_editor.settings import Settings, Side
+from ptyx_mcq_editor.students_ids_watcher import StudentsIdsWatcher
+from ptyx_mcq_editor.tools import instrumentation
 from ptyx_mcq_editor.tools.desktop_shortcut import install_desktop_shortcut
 
 
-def path_hash(path: Path | str) -> str:
-    return urlsafe_b64encode(hash(str(path)).to_bytes(8, signed=True)).decode("ascii").rstrip("=")
-
-
 class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
     # restore_session_signal = pyqtSignal(name="restore_session_signal")
     # new_session_signal = pyqtSignal(name="new_session_signal")
@@ -32,6 +33,9 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
         # to get at least the recent files list.
         self.settings = Settings.load_settings()
         self.file_events_handler = FileEventsHandler(self)
+        self.document_watcher = DocumentWatcher(self)
+        self.students_ids_watcher = StudentsIdsWatcher(self)
+        self.duplicates_search = SimilarExercisesSearch(self)
         self.setupUi(self)
         self.books = {Side.LEFT: self.left_tab_widget, Side.RIGHT: self.right_tab_widget}
         for side, book in self.books.items():
@@ -42,6 +46,8 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
         # -----------------
         self.tmp_dir = Path(mkdtemp(prefix="mcq-editor-"))
         print("created temporary directory", self.tmp_dir)
+        PREVIEW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        prune_preview_cache(PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_SIZE)
         # self.ui_updates_enabled = True
 
         # -----------------
@@ -53,6 +59,8 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
             self.setWindowIcon(QIcon(str(ICON_PATH)))
 
         self.search_dock.setVisible(False)
+        self.files_search_dock.setVisible(False)
+        self.query_dock.setVisible(False)
         # self.publish_dock.setVisible(False)
         self.setCorner(Qt.Corner.TopRightCorner, Qt.DockWidgetArea.RightDockWidgetArea)
 
@@ -73,6 +81,8 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
         # -------------------
         self.connect_menu_signals()
         self.search_dock.connect_signals()
+        self.files_search_dock.connect_signals()
+        self.query_dock.connect_signals()
 
         self.file_events_handler.finalize([Path(path) for path in args.paths] if args is not None else [])
 
@@ -88,7 +98,7 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
             event.ignore()
 
     # noinspection PyMethodOverriding
-    def dropEvent(self, event: QDropEvent):  # type:ignore
+    def dropEvent(self, event: QDropEvent):  # type: ignore
         # Retrieve the URLs of dropped files
         mimedata = event.mimeData()
         assert mimedata is not None
@@ -107,9 +117,13 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
         self.action_Empty_file.triggered.connect(lambda: handler.new_doc(side=None, content=None))
         self.action_Mcq_ptyx_file.triggered.connect(lambda: handler.new_mcq_ptyx_doc(side=None))
         self.action_Open.triggered.connect(lambda: handler.open_doc(side=None))
-        self.action_Save.triggered.connect(lambda: handler.save_doc(side=None, index=None))
-        self.actionSave_as.triggered.connect(lambda: handler.save_doc_as(side=None, index=None))
-        self.actionSave_copy.triggered.connect(lambda: handler.save_doc_copy(side=None, index=None))
+        self.action_Save.triggered.connect(lambda: handler.save_doc(side=None, index=None, asynchronous=True))
+        self.actionSave_as.triggered.connect(
+            lambda: handler.save_doc_as(side=None, index=None, asynchronous=True)
+        )
+        self.actionSave_copy.triggered.connect(
+            lambda: handler.save_doc_copy(side=None, index=None, asynchronous=True)
+        )
         self.actionRename_move.triggered.connect(lambda: handler.rename_doc(side=None, index=None))
         self.action_Close.triggered.connect(lambda: handler.close_doc(side=None, index=None))
         self.actionN_ew_Session.triggered.connect(lambda: handler.new_session())
@@ -136,6 +150,8 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
 
         # *** 'Tools' menu ***
         self.action_Add_MCQ_Editor_to_start_menu.triggered.connect(self.add_desktop_menu_entry)
+        self.actionQuery_exercises.triggered.connect(self.query_dock.toggle_query_dialog)
+        self.actionFind_duplicates.triggered.connect(self.duplicates_search.search)
 
         # *** 'Edit' menu ***
         self.actionFind.triggered.connect(
@@ -144,9 +160,11 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
         self.actionReplace.triggered.connect(
             lambda: self.search_dock.toggle_find_and_replace_dialog(replace=True)
         )
+        self.actionFind_in_files.triggered.connect(self.files_search_dock.toggle_files_search_dialog)
 
         # *** 'Debug' menu ***
         self.action_Send_Qscintilla_Command.triggered.connect(self.dbg_send_scintilla_command)
+        self.action_Performance_Statistics.triggered.connect(self.dbg_display_performance_statistics)
 
     # noinspection PyMethodOverriding
     def closeEvent(self, event: QCloseEvent | None) -> None:
@@ -215,7 +233,83 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
         if self.current_mcq_editor is not None:
             self.current_mcq_editor.dbg_send_scintilla_command()
 
-    def get_temp_path(self, suffix: Literal["tex", "pdf"], doc_path: Path = None) -> Path | None:
+    def dbg_display_performance_statistics(self) -> None:
+        """Display the statistics collected by the instrumentation of the hot code paths."""
+        dialog = QDialog(self)
+        ui = dbg_performance_ui.Ui_Dialog()
+        ui.setupUi(dialog)
+        headers = [
+            "Code path",
+            "Calls",
+            "Total (ms)",
+            "Mean (µs)",
+            "p50 (µs)",
+            "p95 (µs)",
+            "p99 (µs)",
+            "Max (µs)",
+        ]
+        ui.table.setColumnCount(len(headers))
+        ui.table.setHorizontalHeaderLabels(headers)
+
+        def refresh() -> None:
+            if not instrumentation.ENABLED:
+                ui.status_label.setText(
+                    "Instrumentation is disabled. Set the MCQ_EDITOR_PROFILE environment variable"
+                    " to enable it, then restart the editor:\n$ MCQ_EDITOR_PROFILE=1 mcq-editor"
+                )
+            else:
+                ui.status_label.setText(f"{len(instrumentation.get_events())} calls recorded.")
+            stats = instrumentation.get_stats()
+            ui.table.setSortingEnabled(False)
+            ui.table.setRowCount(len(stats))
+            for row, (name, stat) in enumerate(stats.items()):
+                values = [
+                    stat.count,
+                    1000 * stat.total,
+                    1e6 * stat.mean,
+                    1e6 * stat.percentile(50),
+                    1e6 * stat.percentile(95),
+                    1e6 * stat.percentile(99),
+                    1e6 * stat.max,
+                ]
+                ui.table.setItem(row, 0, QTableWidgetItem(name))
+                for column, value in enumerate(values, start=1):
+                    item = QTableWidgetItem()
+                    # Use `setData()` instead of `setText()`, so that columns are sorted numerically.
+                    item.setData(Qt.ItemDataRole.DisplayRole, round(value, 2))
+                    ui.table.setItem(row, column, item)
+            ui.table.setSortingEnabled(True)
+            ui.table.sortByColumn(2, Qt.SortOrder.DescendingOrder)
+            ui.table.resizeColumnsToContents()
+
+        def reset() -> None:
+            instrumentation.reset()
+            refresh()
+
+        def export() -> None:
+            path, _ = QFileDialog.getSaveFileName(
+                dialog, "Export Chrome trace", "mcq-editor-trace.json", "Trace files (*.json)"
+            )
+            if path:
+                n = instrumentation.export_chrome_trace(Path(path))
+                ui.status_label.setText(f"{n} calls exported to {path}.")
+
+        ui.refreshButton.clicked.connect(refresh)
+        ui.resetButton.clicked.connect(reset)
+        ui.exportButton.clicked.connect(export)
+        refresh()
+        dialog.show()
+
+    def get_preview_dir(self, doc_path: Path) -> Path:
+        """Get the directory where the preview files of the document are generated.
+
+        Previews of the documents saved on disk are kept in a persistent cache (of bounded size),
+        shared with the `mcq-editor preview` command.
+        Previews of new documents (which have no path yet) are temporary.
+        """
+        return PREVIEW_CACHE_DIR if doc_path.is_absolute() else self.tmp_dir
+
+    def get_temp_path(self, suffix: Literal["tex", "pdf", "ptyx-log"], doc_path: Path = None) -> Path | None:
         """Get the path of a temporary file corresponding to the current document."""
         if doc_path is None:
             doc = self.settings.current_doc
@@ -224,4 +318,4 @@ class McqEditorMainWindow(QMainWindow, Ui_MainWindow):
             doc_path = doc.path
             if doc_path is None:
                 doc_path = Path(f"new-doc-{doc.doc_id}")
-        return self.tmp_dir / f"{'' if doc_path is None else doc_path.stem}-{path_hash(doc_path)}.{suffix}"
+        return get_preview_path(self.get_preview_dir(doc_path), doc_path, suffix)
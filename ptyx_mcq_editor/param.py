@@ -1,5 +1,7 @@
 from pathlib import Path
 
+import platformdirs
+
 RESSOURCES_PATH = Path(__file__).resolve().parent.parent / "ressources"
 ICON_PATH = RESSOURCES_PATH / "mcq-editor.svg"
 WINDOW_TITLE = "MCQ Editor"
@@ -8,5 +10,22 @@ SHELL_COMMAND = "mcq-editor"
 DESKTOP_FILE_NAME = "ptyx-mcq-editor.desktop"
 ICON_NAME = "mcq-editor.svg"
 ICON_DIR = Path("~/.local/share/icons/hicolor/scalable/apps/").expanduser()
+# Previews of the documents saved on disk (shared with `mcq-editor preview` command).
+PREVIEW_CACHE_DIR = platformdirs.user_cache_path("mcq-editor") / "preview"
+# Maximal size of the previews cache, in bytes (the least recently generated previews are removed first).
+PREVIEW_CACHE_MAX_SIZE = 500_000_000
+# Number of tabs following the current one, and of tabs preceding it, whose editor is created
+# in the background when the application is idle (editors are otherwise created when their tab
+# is first shown).
+# Set it to 0 to disable this.
+WARM_UP_TABS = 3
+# History of the durations of the compilation stages (one JSON object per line).
+COMPILATION_HISTORY_PATH = platformdirs.user_state_path("mcq-editor") / "compilation-history.jsonl"
+# Trigram index of the searched directories (shared with `mcq-editor index` command).
+TRIGRAM_INDEX_PATH = platformdirs.user_cache_path("mcq-editor") / "trigram-index.sqlite"
+# Default minimal similarity of near-duplicate exercises (see `tools/duplicates.py`), between 0 and 1.
+DUPLICATES_THRESHOLD = 0.8
+# Index of the answers, tags and python symbols of the questions of the queried directories.
+SEMANTIC_INDEX_PATH = platformdirs.user_cache_path("mcq-editor") / "semantic-index.sqlite"
 
 # TODO: use platformdirs instead?
@@ -0,0 +1,228 @@
+"""
+Headless compilation of the previews of many documents.
+
+This runs the same pipeline as the editor preview (see `PreviewCompilerWorker`),
+for all the exercises of one or several directories, using several processes.
+
+The generated files are stored in the editor preview cache, so the previews
+are immediately available when opening the documents in the editor.
+"""
+
+import contextlib
+import io
+import json
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from hashlib import blake2b
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator, Iterable, Literal, Any, Callable
+from xml.etree import ElementTree
+
+from ptyx.compilation import compile_latex_to_pdf
+from ptyx.latex_generator import Compiler
+
+from ptyx_mcq_editor.preview.compiler import (
+    format_error,
+    get_preview_path,
+    inject_labels,
+    prepare_preview_code,
+)
+from ptyx_mcq_editor.tools.processes import compilation_context
+from ptyx_mcq_editor.tools.search import include_tree
+
+# Only the end of the log is kept in the reports, for failed compilations.
+MAX_LOG_LENGTH = 5000
+
+Status = Literal["passed", "failed", "cached"]
+
+
+@dataclass
+class FileReport:
+    """Result of the preview compilation of a single file."""
+
+    path: str
+    status: Status
+    # Duration in seconds.
+    duration: float = 0.0
+    error: str = ""
+    log: str = ""
+
+
+def _included_files_stamps(doc_path: Path) -> list[tuple[str, int, int]]:
+    """Return the path, the modification time (in ns) and the size of every file included by the document.
+
+    An included file may change while the document itself doesn't, so those must be part of the cache key.
+    """
+    stamps: list[tuple[str, int, int]] = []
+    for path in include_tree(doc_path)[1:]:
+        try:
+            stat = path.stat()
+        except OSError:
+            # The file was removed since the include tree was read.
+            continue
+        stamps.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+def _cache_key(code: str, options: dict[str, Any], pdf: bool, doc_path: Path) -> str:
+    data = json.dumps([code, options, pdf, _included_files_stamps(doc_path)], sort_keys=True, default=str)
+    return blake2b(data.encode("utf8"), digest_size=16).hexdigest()
+
+
+@contextlib.contextmanager
+def _time_limit(timeout: float | None) -> Iterator[None]:
+    """Raise a `TimeoutError` if the block is not executed within `timeout` seconds.
+
+    Only supported on Unix (elsewhere, there is no time limit).
+    """
+    if not timeout or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def handler(signum, frame):
+        raise TimeoutError(f"Compilation took more than {timeout} seconds.")
+
+    previous_handler = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def compile_preview_file(
+    doc_path: Path,
+    cache_dir: Path,
+    doc_id: int = 0,
+    pdf: bool = False,
+    force: bool = False,
+    timeout: float | None = None,
+) -> FileReport:
+    """Compile the preview of the document, like the editor does.
+
+    The preview files are generated in `cache_dir`, using the same names as the editor.
+    If the previous preview was generated from the same code with the same options,
+    and the included files didn't change, nothing is done (unless `force` is True).
+    """
+    doc_path = doc_path.resolve()
+    start = perf_counter()
+    with io.StringIO() as log:
+        try:
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                code, options = prepare_preview_code(
+                    inject_labels(doc_path.read_text(encoding="utf8")), doc_path
+                )
+                options["PTYX_NUM"] = doc_id
+                key = _cache_key(code, options, pdf, doc_path)
+                key_file = get_preview_path(cache_dir, doc_path, "key")
+                latex_file = get_preview_path(cache_dir, doc_path, "tex")
+                pdf_file = get_preview_path(cache_dir, doc_path, "pdf")
+                if (
+                    not force
+                    and key_file.is_file()
+                    and key_file.read_text(encoding="utf8") == key
+                    and latex_file.is_file()
+                    and (not pdf or pdf_file.is_file())
+                ):
+                    return FileReport(str(doc_path), "cached", perf_counter() - start)
+                key_file.unlink(missing_ok=True)
+                # Change current directory to the parent directory of the ptyx file.
+                # This allows for relative paths in include directives when compiling.
+                with _time_limit(timeout), contextlib.chdir(doc_path.parent):
+                    latex = Compiler().parse(code=code, **options)
+                latex_file.write_text(latex, encoding="utf8")
+                if pdf:
+                    info = compile_latex_to_pdf(latex_file, dest=cache_dir, quiet=True)
+                    if info.errors:
+                        raise RuntimeError("LaTeX: " + "; ".join(info.errors))
+                key_file.write_text(key, encoding="utf8")
+            return FileReport(str(doc_path), "passed", perf_counter() - start)
+        except Exception as e:
+            return FileReport(
+                str(doc_path),
+                "failed",
+                perf_counter() - start,
+                format_error(e),
+                log.getvalue()[-MAX_LOG_LENGTH:],
+            )
+
+
+def compile_previews(
+    paths: Iterable[Path],
+    cache_dir: Path,
+    *,
+    doc_id: int = 0,
+    pdf: bool = False,
+    force: bool = False,
+    timeout: float | None = None,
+    jobs: int | None = None,
+    feedback: Callable[[FileReport], Any] | None = None,
+) -> list[FileReport]:
+    """Compile the previews of all the given documents, using `jobs` processes.
+
+    `feedback` is called in the main process each time a document has been handled.
+    Reports are returned in the same order as the documents.
+    """
+    paths = list(paths)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    ctx = compilation_context()
+    reports: dict[Path, FileReport] = {}
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as executor:
+        futures = {
+            executor.submit(compile_preview_file, path, cache_dir, doc_id, pdf, force, timeout): path
+            for path in paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                # The worker process itself failed (it may have been killed, for example).
+                report = FileReport(str(path.resolve()), "failed", error=format_error(e))
+            reports[path] = report
+            if feedback is not None:
+                feedback(report)
+    return [reports[path] for path in paths]
+
+
+def write_json_report(reports: list[FileReport], path: Path) -> None:
+    data = {
+        "summary": {
+            status: sum(1 for report in reports if report.status == status)
+            for status in ("passed", "failed", "cached")
+        },
+        "duration": sum(report.duration for report in reports),
+        "files": [asdict(report) for report in reports],
+    }
+    path.write_text(json.dumps(data, indent=2), encoding="utf8")
+
+
+def write_junit_report(reports: list[FileReport], path: Path) -> None:
+    """Write a JUnit XML report, understood by most continuous integration tools."""
+    testsuite = ElementTree.Element(
+        "testsuite",
+        name="mcq-editor preview",
+        tests=str(len(reports)),
+        failures=str(sum(1 for report in reports if report.status == "failed")),
+        skipped=str(sum(1 for report in reports if report.status == "cached")),
+        time=f"{sum(report.duration for report in reports):.3f}",
+    )
+    for report in reports:
+        file_path = Path(report.path)
+        testcase = ElementTree.SubElement(
+            testsuite,
+            "testcase",
+            classname=str(file_path.parent),
+            name=file_path.name,
+            time=f"{report.duration:.3f}",
+        )
+        if report.status == "failed":
+            failure = ElementTree.SubElement(testcase, "failure", message=report.error)
+            failure.text = report.log
+        elif report.status == "cached":
+            ElementTree.SubElement(testcase, "skipped", message="Preview already up to date.")
+    ElementTree.indent(testsuite)
+    ElementTree.ElementTree(testsuite).write(path, encoding="utf-8", xml_declaration=True)
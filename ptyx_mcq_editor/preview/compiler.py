@@ -1,41 +1,110 @@
 import contextlib
 import pickle
+import re
 from base64 import urlsafe_b64encode
-from multiprocessing import Process, Queue
+from hashlib import blake2b
+from multiprocessing import Queue
+from multiprocessing.process import BaseProcess
 from multiprocessing.queues import Queue as QueueType
 from pathlib import Path
 from traceback import print_exception
-from typing import Literal, TypedDict, NotRequired, Any
+from typing import Literal, TypedDict, NotRequired, Any, TYPE_CHECKING
 
 from PyQt6.QtCore import QObject, pyqtSignal
 
-from ptyx.compilation import compile_latex_to_pdf, SingleFileCompilationInfo
-from ptyx.errors import PtyxDocumentCompilationError
-from ptyx.extensions.extended_python import main
-from ptyx.latex_generator import Compiler
+from ptyx.errors import PtyxDocumentCompilationError, PythonCodeError
 from ptyx.pretty_print import red, yellow
 
-from ptyx_mcq.make.exercises_parsing import wrap_exercise
 from ptyx_mcq.tools.misc import CaptureLog
 
+from ptyx_mcq_editor.tools.compilation_trace import CompilationTrace
+from ptyx_mcq_editor.tools.processes import compilation_context
+
+# pTyX compiler and LaTeX related modules are imported only when needed,
+# since they are slow to import (see `preload_modules()`).
+if TYPE_CHECKING:
+    from ptyx.compilation import SingleFileCompilationInfo
+
 
 class PreviewCompilerWorkerInfo(TypedDict):
     code: str
     doc_path: Path
-    compilation_info: NotRequired[SingleFileCompilationInfo]
+    compilation_info: NotRequired["SingleFileCompilationInfo"]
     error: NotRequired[BaseException]
     info: NotRequired[str]
     log: str
+    trace: CompilationTrace
 
 
 def path_hash(path: Path | str) -> str:
-    return urlsafe_b64encode(hash(str(path)).to_bytes(8, signed=True)).decode("ascii").rstrip("=")
+    """Return a short hash of the path.
+
+    Contrary to `hash()`, the result doesn't depend on the process, so the preview files
+    generated by another process (see `mcq-editor preview` command) can be found.
+    """
+    digest = blake2b(str(path).encode("utf8"), digest_size=8).digest()
+    return urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+
+def get_preview_path(directory: Path, doc_path: Path, suffix: str) -> Path:
+    """Return the path of a preview file (`.tex`, `.pdf`...) of the given document."""
+    return directory / f"{doc_path.stem}-{path_hash(doc_path)}.{suffix}"
+
+
+# The name of a preview file, up to the path hash (LaTeX may generate files with several suffixes,
+# like `.synctex.gz`).
+_PREVIEW_NAME_REGEX = re.compile(r"^(.*-[\w-]{11})\.")
+
+
+def prune_preview_cache(directory: Path, max_size: int) -> int:
+    """Remove the least recently generated previews, until the size of the cache is at most `max_size` bytes.
+
+    All the files of a preview (`.tex`, `.pdf`, `.key`...) are removed together.
+    Return the number of removed files.
+    """
+    # For each preview: its files, their total size and their latest modification time.
+    previews: dict[str, tuple[list[Path], int, float]] = {}
+    total_size = 0
+    for path in directory.iterdir():
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if not path.is_file():
+            continue
+        name = m.group(1) if (m := _PREVIEW_NAME_REGEX.match(path.name)) else path.name
+        files, size, mtime = previews.get(name, ([], 0, 0.0))
+        files.append(path)
+        previews[name] = files, size + stat.st_size, max(mtime, stat.st_mtime)
+        total_size += stat.st_size
+    removed = 0
+    for files, size, _ in sorted(previews.values(), key=lambda preview: preview[2]):
+        if total_size <= max_size:
+            break
+        for path in files:
+            path.unlink(missing_ok=True)
+            removed += 1
+        total_size -= size
+    return removed
+
+
+def format_error(error: BaseException) -> str:
+    """Return a short description of the error, for reports.
+
+    Only strings are sent back to the main process, since exceptions may not be picklable.
+    """
+    if isinstance(error, PythonCodeError):
+        info = error.info
+        return (f"<{info.type}> " if info.type else "") + info.message
+    return f"{type(error).__name__}: {error}".strip()
 
 
 def inject_labels(code: str) -> str:
     """Inject a unique label in each python code snippet.
 
     This make identification and highlighting easier when some python code fails."""
+    from ptyx.extensions.extended_python import main
+
     # It is much easier to parse extended python code first,
     # so as to convert `....\n[xxx]\n....` blocks into `#PYTHON\n[xxx]\n#END_PYTHON` blocks.
     # So, we will call `main(code)` first.
@@ -45,11 +114,41 @@ def inject_labels(code: str) -> str:
     )
 
 
+def prepare_preview_code(code: str, doc_path: Path) -> tuple[str, dict[str, Any]]:
+    """Return the pTyX code to compile for a preview, and the corresponding compilation options.
+
+    A single exercise (`.ex` file) is wrapped inside a minimal pTyX document.
+    Labels should have already been injected in python blocks (see `inject_labels()`).
+
+    Note that the document number (`PTYX_NUM`) is not set.
+    """
+    from ptyx_mcq.make.exercises_parsing import wrap_exercise
+
+    options: dict[str, Any] = {"MCQ_KEEP_ALL_VERSIONS": True, "PTYX_WITH_ANSWERS": True}
+    if doc_path.suffix == ".ex":
+        code = wrap_exercise(code, doc_path)
+        options["MCQ_REMOVE_HEADER"] = True
+        options["MCQ_PREVIEW_MODE"] = True
+    else:
+        options["MCQ_DISPLAY_QUESTION_TITLE"] = True
+    return code, options
+
+
 def compile_code(queue: QueueType, code: str, options: dict[str, Any]) -> None:
-    """Compile code from another process, using queue to give back information."""
+    """Compile code from another process, using queue to give back information.
+
+    The trace of the compilation is sent first, then the generated LaTeX code.
+    """
+    from ptyx.latex_generator import Compiler
+
+    trace = CompilationTrace()
+    trace.mark("process_started")
     try:
         compiler = Compiler()
-        latex = compiler.parse(code=code, **options)
+        with trace.stage("Compiler.parse"):
+            latex = compiler.parse(code=code, **options)
+        trace.mark("sent")
+        queue.put(trace)
         queue.put(latex)
     except BaseException as e:
         pickle_incompatibility = False
@@ -86,16 +185,19 @@ class PreviewCompilerWorker(QObject):
         assert self.doc_path is not None
         self.pdf = pdf
         self.tmp_dir = tmp_dir
+        self.trace = CompilationTrace()
 
     finished = pyqtSignal(dict, name="finished")
-    process_started = pyqtSignal(Process, QueueType, name="process_started")
+    process_started = pyqtSignal(BaseProcess, QueueType, name="process_started")
     # progress = pyqtSignal(int)
 
     def get_temp_path(self, suffix: Literal["tex", "pdf"]) -> Path:
         """Get the path of a temporary file corresponding to the current document."""
-        return self.tmp_dir / f"{self.doc_path.stem}-{path_hash(self.doc_path)}.{suffix}"
+        return get_preview_path(self.tmp_dir, self.doc_path, suffix)
 
     def compile_latex(self):
+        from ptyx.compilation import compile_latex_to_pdf
+
         latex_file = self.get_temp_path("tex")
         compilation_info = compile_latex_to_pdf(latex_file, dest=self.main_window.tmp_dir)
         self.finished.emit(compilation_info)
@@ -104,13 +206,20 @@ class PreviewCompilerWorker(QObject):
         return self.doc_path.suffix == ".ex"
 
     def generate(self) -> None:
-        return_data: PreviewCompilerWorkerInfo = {"code": self.code, "doc_path": self.doc_path, "log": ""}
+        return_data: PreviewCompilerWorkerInfo = {
+            "code": self.code,
+            "doc_path": self.doc_path,
+            "log": "",
+            "trace": self.trace,
+        }
         # log: CaptureLog | str = "Error, log couldn't be captured!"
         with CaptureLog() as log:
             try:
                 return_data = self._generate()
             finally:
                 return_data["log"] = log.getvalue()
+                # Always share the trace, even if the compilation failed.
+                return_data["trace"] = self.trace
                 print("End of task: emit 'finished' event.")
                 self.finished.emit(return_data)
 
@@ -120,6 +229,8 @@ class PreviewCompilerWorker(QObject):
         If `doc_path` is None, the LaTeX file corresponds to the current edited document.
         Else, `doc_path` must point to a .ptyx or .ex file.
         """
+        from ptyx.compilation import compile_latex_to_pdf
+
         # main_window = self.main_window
         # doc = main_window.settings.current_doc
         # editor = main_window.current_mcq_editor
@@ -127,29 +238,36 @@ class PreviewCompilerWorker(QObject):
         # if doc is None or editor is None or latex_path is None:
         #     return
         # code = editor.text() if doc_path is None else doc_path.read_text(encoding="utf8")
-        code = inject_labels(self.code)
-        return_data: PreviewCompilerWorkerInfo = {"code": code, "doc_path": self.doc_path, "log": "No log."}
-        options = {"MCQ_KEEP_ALL_VERSIONS": True, "PTYX_WITH_ANSWERS": True, "PTYX_NUM": self.doc_id}
+        trace = self.trace
+        with trace.stage("inject_labels"):
+            code = inject_labels(self.code)
+        return_data: PreviewCompilerWorkerInfo = {
+            "code": code,
+            "doc_path": self.doc_path,
+            "log": "No log.",
+            "trace": trace,
+        }
+        with trace.stage("wrap_exercise" if self._is_single_exercise() else "prepare_preview_code"):
+            code, options = prepare_preview_code(code, self.doc_path)
+        options["PTYX_NUM"] = self.doc_id
         if self._is_single_exercise():
             print("\n == Exercise detected. == \n")
-            code = wrap_exercise(code, self.doc_path)
-            options["MCQ_REMOVE_HEADER"] = True
-            options["MCQ_PREVIEW_MODE"] = True
             print("Temporary pTyX file code:")
             print("\n" + 5 * "---✂---")
             print(code)
             print(5 * "---✂---" + "\n")
-        else:
-            options["MCQ_DISPLAY_QUESTION_TITLE"] = True
         # Change current directory to the parent directory of the ptyx file.
         # This allows for relative paths in include directives when compiling.
         with contextlib.chdir(self.doc_path.parent):
-            queue: Queue = Queue()
-            process = Process(target=compile_code, args=(queue, code, options))
+            # The hash seed is disabled in the compilation process, to improve reproducibility.
+            ctx = compilation_context()
+            queue: Queue = ctx.Queue()
+            process: BaseProcess = ctx.Process(target=compile_code, args=(queue, code, options))  # type: ignore
             # Share process with main thread, to enable user to kill it if needed.
             # This may prove useful if there is an infinite loop in user code
             # for example.
             self.process_started.emit(process, queue)
+            trace.mark("process_start")
             process.start()
             print(f"Waiting for process {process.pid}")
             # Do *NOT* join process while there is still data in the queue.
@@ -157,7 +275,11 @@ class PreviewCompilerWorker(QObject):
             # https://stackoverflow.com/questions/31665328/python-3-multiprocessing-queue-deadlock-when-calling-join-before-the-queue-is-em
             # process.join()  <- So, don't do this!
             print(f"End of process {process.pid}")
-        match queue.get():
+        while isinstance(retrieved := queue.get(), CompilationTrace):
+            trace.merge_process_trace(retrieved)
+        trace.mark("received")
+        trace.add_interval("queue_transfer", "sent", "received")
+        match retrieved:
             case str(latex):
                 pass
             case BaseException() as e:
@@ -172,7 +294,12 @@ class PreviewCompilerWorker(QObject):
         print("Process data successfully recovered.")
 
         latex_file = self.get_temp_path("tex")
-        latex_file.write_text(latex, encoding="utf8")
+        # The preview may be generated from unsaved code, or for another document number,
+        # so the key of the preview generated by `mcq-editor preview` (if any) is not valid anymore.
+        get_preview_path(self.tmp_dir, self.doc_path, "key").unlink(missing_ok=True)
+        with trace.stage("tex_write"):
+            latex_file.write_text(latex, encoding="utf8")
         if self.pdf:
-            return_data["compilation_info"] = compile_latex_to_pdf(latex_file, dest=self.tmp_dir)
+            with trace.stage("compile_latex_to_pdf"):
+                return_data["compilation_info"] = compile_latex_to_pdf(latex_file, dest=self.tmp_dir)
         return return_data
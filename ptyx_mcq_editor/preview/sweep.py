@@ -0,0 +1,183 @@
+"""
+Compile many variants of the same document, to detect degenerate ones.
+
+A randomized exercise is compiled for a whole range of documents numbers (`PTYX_NUM`).
+The pTyX code is parsed only once for each worker process, then the syntax tree
+is reused to generate the LaTeX code of every variant.
+"""
+
+import contextlib
+import io
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from hashlib import blake2b
+from pathlib import Path
+from time import perf_counter
+
+from ptyx.compilation import compile_latex_to_pdf, join_files_if_needed
+from ptyx.compilation_options import CompilationOptions
+from ptyx.latex_generator import Compiler
+
+from ptyx_mcq_editor.preview.compiler import format_error, inject_labels, prepare_preview_code
+from ptyx_mcq_editor.tools.processes import compilation_context
+
+
+@dataclass
+class SeedResult:
+    """The result of the compilation of a single variant."""
+
+    doc_id: int
+    # Duration in seconds (LaTeX generation, and pdf compilation if any).
+    duration: float = 0.0
+    error: str = ""
+    latex_hash: str = ""
+    pdf_path: Path | None = None
+    # Number of the first variant with exactly the same LaTeX code, if any.
+    duplicate_of: int | None = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "ERROR"
+        elif self.duplicate_of is not None:
+            return "DUPLICATE"
+        return "OK"
+
+
+def parse_seeds(spec: str) -> list[int]:
+    """Convert a string like "1-5,8,10-12" into the corresponding list of documents numbers.
+
+    >>> parse_seeds("1-3,8")
+    [1, 2, 3, 8]
+    """
+    doc_ids: list[int] = []
+    for part in spec.split(","):
+        if not (part := part.strip()):
+            continue
+        start, sep, end = part.partition("-")
+        if sep:
+            doc_ids.extend(range(int(start), int(end) + 1))
+        else:
+            doc_ids.append(int(start))
+    # Remove duplicates, but keep order.
+    return list(dict.fromkeys(doc_ids))
+
+
+def compile_seeds(
+    code: str, doc_path: Path, doc_ids: list[int], output_dir: Path, pdf: bool = False, verbose: bool = False
+) -> list[SeedResult]:
+    """Compile all the given variants in the current process.
+
+    The pTyX code is parsed only once, and the syntax tree is reused for all the variants.
+    The LaTeX files (and the pdf files, if `pdf` is True) are generated in `output_dir`.
+    """
+    results: list[SeedResult] = []
+    # pTyX is quite verbose, so discard its output by default.
+    log = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    # Change current directory to the parent directory of the ptyx file.
+    # This allows for relative paths in include directives when compiling.
+    with log, contextlib.chdir(doc_path.parent):
+        compiler = Compiler()
+        try:
+            code, options = prepare_preview_code(inject_labels(code), doc_path)
+            compiler.load(code=code)
+        except Exception as e:
+            return [SeedResult(doc_id, error=format_error(e)) for doc_id in doc_ids]
+        for doc_id in doc_ids:
+            result = SeedResult(doc_id)
+            start = perf_counter()
+            try:
+                latex = compiler.get_latex(**options, PTYX_NUM=doc_id)
+                result.latex_hash = blake2b(latex.encode("utf8"), digest_size=16).hexdigest()
+                latex_file = output_dir / f"{doc_path.stem}-{doc_id}.tex"
+                latex_file.write_text(latex, encoding="utf8")
+                if pdf:
+                    info = compile_latex_to_pdf(latex_file, dest=output_dir, quiet=True)
+                    if info.errors:
+                        result.error = "LaTeX: " + "; ".join(info.errors)
+                    else:
+                        result.pdf_path = info.dest
+            except Exception as e:
+                result.error = format_error(e)
+            result.duration = perf_counter() - start
+            results.append(result)
+    return results
+
+
+def sweep(
+    code: str,
+    doc_path: Path,
+    doc_ids: list[int],
+    output_dir: Path,
+    *,
+    pdf: bool = False,
+    jobs: int = 1,
+    verbose: bool = False,
+) -> list[SeedResult]:
+    """Compile the document for each given document number.
+
+    Variants are sharded between `jobs` worker processes, each one parsing the code only once.
+
+    Results are sorted by document number, and variants generating exactly the same LaTeX code
+    as a previous one are marked as duplicates.
+    """
+    doc_ids = list(doc_ids)
+    jobs = max(1, min(jobs, len(doc_ids)))
+    # Use contiguous shards, so that each process compiles a range of variants.
+    size, remainder = divmod(len(doc_ids), jobs)
+    shards: list[list[int]] = []
+    start = 0
+    for i in range(jobs):
+        end = start + size + (1 if i < remainder else 0)
+        shards.append(doc_ids[start:end])
+        start = end
+    # Workers change their current directory, so relative paths must be resolved first.
+    output_dir = output_dir.resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    ctx = compilation_context()
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as executor:
+        futures = [
+            executor.submit(compile_seeds, code, doc_path.resolve(), shard, output_dir, pdf, verbose)
+            for shard in shards
+            if shard
+        ]
+        results = [result for future in futures for result in future.result()]
+    results.sort(key=lambda result: result.doc_id)
+    first_doc_id_for_hash: dict[str, int] = {}
+    for result in results:
+        if result.latex_hash:
+            result.duplicate_of = first_doc_id_for_hash.setdefault(result.latex_hash, result.doc_id)
+            if result.duplicate_of == result.doc_id:
+                result.duplicate_of = None
+    return results
+
+
+def merge_pdfs(results: list[SeedResult], dest: Path) -> int:
+    """Merge the pdf files of all the successfully compiled variants into `dest`.
+
+    Return the number of merged variants.
+    """
+    pdf_list = [result.pdf_path for result in results if result.pdf_path is not None]
+    if len(pdf_list) == 1:
+        shutil.copyfile(pdf_list[0], dest)
+    elif len(pdf_list) > 1:
+        join_files_if_needed(dest, pdf_list, CompilationOptions(cat=True))
+    return len(pdf_list)
+
+
+def format_results_table(results: list[SeedResult]) -> str:
+    """Return a plain text table of the results, one line per variant."""
+    lines = [f"{'Doc ID':>8}  {'Status':<9}  {'Time (ms)':>9}  Details"]
+    for result in results:
+        if result.error:
+            details = result.error.splitlines()[0]
+        elif result.duplicate_of is not None:
+            details = f"same LaTeX code as doc {result.duplicate_of}"
+        else:
+            details = ""
+        lines.append(f"{result.doc_id:>8}  {result.status:<9}  {1000 * result.duration:>9.1f}  {details}")
+    n_errors = sum(1 for result in results if result.error)
+    n_duplicates = sum(1 for result in results if result.duplicate_of is not None)
+    lines.append(f"{len(results)} variants compiled: {n_errors} errors, {n_duplicates} duplicates.")
+    return "\n".join(lines)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from multiprocessing import Process
+from multiprocessing.process import BaseProcess
 from multiprocessing.queues import Queue as QueueType
 from pathlib import Path
 
@@ -16,6 +16,7 @@ from ptyx_mcq_editor.preview.pdf_viewer import PdfViewer
 
 from ptyx_mcq_editor.preview.latex_viewer import LatexViewer
 from ptyx_mcq_editor.param import RESSOURCES_PATH
+from ptyx_mcq_editor.tools.compilation_trace import append_to_history
 
 
 class Animation:
@@ -50,7 +51,7 @@ class CurrentCompilationInfo:
 
     is_running: bool
     doc_path: Path | None = None
-    process: Process | None = None
+    process: BaseProcess | None = None
     target: QWidget | None = None
     queue: QueueType | None = None
 
@@ -139,7 +140,7 @@ class CompilationTabs(QTabWidget, EnhancedWidget):
             self._run_compilation(
                 code=code,
                 doc_path=doc_path,
-                tmp_dir=self.main_window.tmp_dir,
+                tmp_dir=self.main_window.get_preview_dir(doc_path),
                 target_widget=target_widget,
                 pdf=pdf,
                 _use_another_thread=True,
@@ -193,7 +194,7 @@ class CompilationTabs(QTabWidget, EnhancedWidget):
                 # on another tab in the while. It's safer to recalculate the index.
                 self.compilation_ended()
 
-    def set_current_process(self, process: Process, queue: QueueType):
+    def set_current_process(self, process: BaseProcess, queue: QueueType):
         assert self.current_compilation_info.is_running
         target = self.current_compilation_info.target
         doc_path = self.current_compilation_info.doc_path
@@ -217,11 +218,18 @@ class CompilationTabs(QTabWidget, EnhancedWidget):
         # self.compilation_ended()
 
     def display_result(self, info: PreviewCompilerWorkerInfo) -> None:
-        self.log_viewer.setText(info["log"])
-        self.log_viewer.write_log(info["doc_path"])
-        if (error := info.get("error")) is None:
-            self.update_tabs(doc_path=info["doc_path"])
-        else:
+        trace = info["trace"]
+        doc_path = info["doc_path"]
+        error = info.get("error")
+        if error is None:
+            self.latex_viewer.load(doc_path=doc_path)
+            with trace.stage("pdf_load"):
+                self.pdf_viewer.load(doc_path=doc_path)
+        # Display the duration of each stage at the end of the log.
+        self.log_viewer.setText(f"{info['log']}\n{trace.format()}\n")
+        self.log_viewer.write_log(doc_path)
+        append_to_history(trace, "preview", doc_path, failed=error is not None)
+        if error is not None:
             self.main_window.current_mcq_editor.display_error(code=info["code"], error=error)
 
     def update_tabs(self, doc_path: Path | None = None) -> None:
@@ -1,56 +1,74 @@
 import contextlib
-import multiprocessing
-import os
 import pickle
 from dataclasses import dataclass
-from multiprocessing import Process, Queue
+from multiprocessing import Queue
+from multiprocessing.process import BaseProcess
 from multiprocessing.queues import Queue as QueueType
 from pathlib import Path
 from traceback import print_exception
-from typing import TypedDict, NotRequired
+from typing import TypedDict, NotRequired, TYPE_CHECKING
 
 from PyQt6.QtCore import QObject, pyqtSignal
 
-from ptyx.compilation import make_files, MultipleFilesCompilationInfo, CompilationProgress
 from ptyx.errors import PtyxDocumentCompilationError
 from ptyx.pretty_print import red, yellow, print_info
-from ptyx_mcq.make.make_command import DEFAULT_PTYX_MCQ_COMPILATION_OPTIONS, generate_config_file
 from ptyx_mcq.parameters import CONFIG_FILE_EXTENSION
 from ptyx_mcq.tools.misc import CaptureLog
 
+from ptyx_mcq_editor.tools.compilation_trace import CompilationTrace
+from ptyx_mcq_editor.tools.processes import compilation_context
+
+# pTyX compiler is imported only when needed, since it is slow to import (see `preload_modules()`).
+if TYPE_CHECKING:
+    from ptyx.compilation import MultipleFilesCompilationInfo, CompilationProgress
+
 
 @dataclass
 class ProcessInfo:
-    process: Process
+    process: BaseProcess
     queue: QueueType
 
 
 class CompilerWorkerInfo(TypedDict):
     doc_path: Path
-    compilation_info: NotRequired[MultipleFilesCompilationInfo]
+    compilation_info: NotRequired["MultipleFilesCompilationInfo"]
     error: NotRequired[BaseException]
     info: NotRequired[str]
     log: str
+    trace: CompilationTrace
 
 
 def compile_file(ptyx_filename: Path, number_of_documents: int, queue: QueueType) -> None:
-    """Compile code from another process, using queue to give back information to the main process."""
+    """Compile code from another process, using queue to give back information to the main process.
+
+    The trace of the compilation is sent just before the compilation information.
+    """
+    trace = CompilationTrace()
+    trace.mark("process_started")
 
-    def feedback(progress: CompilationProgress):
+    def feedback(progress: "CompilationProgress"):
         queue.put(progress)
 
     try:
-        compilation_info, compiler = make_files(
-            ptyx_filename,
-            number_of_documents=number_of_documents,
-            options=DEFAULT_PTYX_MCQ_COMPILATION_OPTIONS,
-            feedback_func=feedback,
-        )
+        # Imported here, so that import errors are sent to the main process too.
+        from ptyx.compilation import make_files
+        from ptyx_mcq.make.make_command import DEFAULT_PTYX_MCQ_COMPILATION_OPTIONS, generate_config_file
+
+        with trace.stage("make_files"):
+            compilation_info, compiler = make_files(
+                ptyx_filename,
+                number_of_documents=number_of_documents,
+                options=DEFAULT_PTYX_MCQ_COMPILATION_OPTIONS,
+                feedback_func=feedback,
+            )
         # Don't forget to generate config file!
-        generate_config_file(compiler)
+        with trace.stage("generate_config_file"):
+            generate_config_file(compiler)
         config_file = ptyx_filename.with_suffix(CONFIG_FILE_EXTENSION)
         assert config_file.is_file()
         print_info(f"Configuration file generated: '{config_file}'.")
+        trace.mark("sent")
+        queue.put(trace)
         queue.put(compilation_info)
     except BaseException as e:
         # An error occurred, we will share it with the main process if we can.
@@ -87,10 +105,12 @@ class CompilerWorker(QObject):
         self.doc_path = doc_path
         self.number_of_documents = number_of_documents
         assert self.doc_path is not None
+        self.trace = CompilationTrace()
 
     finished = pyqtSignal(dict, name="finished")
     process_started = pyqtSignal(ProcessInfo, name="process_started")
-    progress_update = pyqtSignal(CompilationProgress, name="progress_update")
+    # Emit `CompilationProgress` instances.
+    progress_update = pyqtSignal(object, name="progress_update")
 
     # def compile_latex(self):
     #     latex_file = self.get_temp_path("tex")
@@ -98,13 +118,15 @@ class CompilerWorker(QObject):
     #     self.finished.emit(compilation_info)
 
     def generate(self) -> None:
-        return_data: CompilerWorkerInfo = {"doc_path": self.doc_path, "log": ""}
+        return_data: CompilerWorkerInfo = {"doc_path": self.doc_path, "log": "", "trace": self.trace}
         # log: CaptureLog | str = "Error, log couldn't be captured!"
         with CaptureLog() as log:
             try:
                 return_data = self._generate()
             finally:
                 return_data["log"] = log.getvalue()
+                # Always share the trace, even if the compilation failed.
+                return_data["trace"] = self.trace
                 print("End of task: emit 'finished' event.")
                 self.finished.emit(return_data)
 
@@ -114,6 +136,8 @@ class CompilerWorker(QObject):
         If `doc_path` is None, the LaTeX file corresponds to the current edited document.
         Else, `doc_path` must point to a .ptyx or .ex file.
         """
+        from ptyx.compilation import MultipleFilesCompilationInfo, CompilationProgress
+
         # main_window = self.main_window
         # doc = main_window.settings.current_doc
         # editor = main_window.current_mcq_editor
@@ -121,17 +145,15 @@ class CompilerWorker(QObject):
         # if doc is None or editor is None or latex_path is None:
         #     return
         # code = editor.text() if doc_path is None else doc_path.read_text(encoding="utf8")
-        return_data: CompilerWorkerInfo = {"doc_path": self.doc_path, "log": "No log."}
+        trace = self.trace
+        return_data: CompilerWorkerInfo = {"doc_path": self.doc_path, "log": "No log.", "trace": trace}
         # Change current directory to the parent directory of the ptyx file.
         # This allows for relative paths in include directives when compiling.
         with contextlib.chdir(self.doc_path.parent):
-            # Improve reproducibility, by disabling python hash seed.
-            # https://stackoverflow.com/questions/52044045/os-environment-variable-reading-in-a-spawned-process
-            # https://docs.python.org/3/library/multiprocessing.html#multiprocessing-start-methods
-            os.environ["PYTHONHASHSEED"] = "0"
-            ctx = multiprocessing.get_context("spawn")
+            # The hash seed is disabled in the compilation process, to improve reproducibility.
+            ctx = compilation_context()
             queue: Queue = ctx.Queue()
-            process: Process = ctx.Process(  # type: ignore
+            process: BaseProcess = ctx.Process(  # type: ignore
                 target=compile_file,
                 args=(
                     self.doc_path,
@@ -143,6 +165,7 @@ class CompilerWorker(QObject):
             # This may prove useful if there is an infinite loop in user code
             # for example.
             self.process_started.emit(ProcessInfo(process, queue))
+            trace.mark("process_start")
             process.start()
             print(f"Waiting for process {process.pid}")
             # Do *NOT* join process while there is still data in the queue.
@@ -150,10 +173,15 @@ class CompilerWorker(QObject):
             # https://stackoverflow.com/questions/31665328/python-3-multiprocessing-queue-deadlock-when-calling-join-before-the-queue-is-em
             # process.join()  <- So, don't do this!
             print(f"End of process {process.pid}")
-            while isinstance(retrieved := queue.get(), CompilationProgress):
+            while isinstance(retrieved := queue.get(), (CompilationProgress, CompilationTrace)):
+                if isinstance(retrieved, CompilationTrace):
+                    trace.merge_process_trace(retrieved)
+                    continue
                 assert isinstance(retrieved, CompilationProgress)  # for PyCharm
                 print(yellow(f"{retrieved.compiled_pdf_docs}/{retrieved.target} ({retrieved.state})"))
                 self.progress_update.emit(retrieved)
+            trace.mark("received")
+            trace.add_interval("queue_transfer", "sent", "received")
         match retrieved:
             case MultipleFilesCompilationInfo() as info:
                 return_data["compilation_info"] = info
@@ -4,16 +4,17 @@ import webbrowser
 from pathlib import Path
 from typing import cast, TYPE_CHECKING
 
-import psutil
 from PyQt6.QtCore import QThread
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import QToolBar, QSpinBox, QLabel, QPushButton, QWidget, QProgressBar
-from ptyx.compilation import CompilationProgress, CompilationState
 
 from ptyx_mcq_editor.enhanced_widget import EnhancedWidget
 from ptyx_mcq_editor.publish.compiler import CompilerWorker, ProcessInfo, CompilerWorkerInfo
+from ptyx_mcq_editor.tools.compilation_trace import append_to_history
 
 if typing.TYPE_CHECKING:
+    from ptyx.compilation import CompilationProgress
+
     from ptyx_mcq_editor.main_window import McqEditorMainWindow
 
 
@@ -121,7 +122,9 @@ class PublishToolBar(QToolBar, EnhancedWidget):
         """Value must be a float between 0 and 1."""
         self.progress_bar.setValue(round(1000 * value))
 
-    def update_progress(self, progress: CompilationProgress) -> None:
+    def update_progress(self, progress: "CompilationProgress") -> None:
+        from ptyx.compilation import CompilationState
+
         # Empirically, add :
         #  * +15% of time to generate LaTeX code.
         #  * +5% of time for merging generated pdf.
@@ -189,6 +192,8 @@ class PublishToolBar(QToolBar, EnhancedWidget):
         self.current_process_info = process
 
     def abort_thread(self):
+        import psutil
+
         process = self.current_process_info.process
         assert process is not None
         id_ = process.pid
@@ -214,10 +219,13 @@ class PublishToolBar(QToolBar, EnhancedWidget):
         return self.parent().compilation_tabs.log_viewer
 
     def display_result(self, info: CompilerWorkerInfo) -> None:
-        self.log_viewer.setText(info["log"])
+        error = info.get("error")
+        # Display the duration of each stage at the end of the log.
+        self.log_viewer.setText(f"{info['log']}\n{info['trace'].format()}\n")
         self.log_viewer.write_log(info["doc_path"])
+        append_to_history(info["trace"], "publish", info["doc_path"], failed=error is not None)
         self.last_compiled_doc_path = info["doc_path"]
-        if (error := info.get("error")) is None:
+        if error is None:
             # self.update_tabs(doc_path=info["doc_path"])
             pass
             # TODO: Display some feedback to user.
@@ -7,6 +7,8 @@ from typing import Iterator, Any
 import platformdirs
 from tomli_w import dumps
 
+from ptyx_mcq_editor.tools.file_tools import atomic_write
+
 CONFIG_PATH = Path(platformdirs.user_config_path("mcq-editor") / "config.toml")
 MAX_RECENT_FILES = 12
 
@@ -48,6 +50,11 @@ class Document:
         self._doc_id = self._id_counter
         self._is_saved = True
         self._path = path.resolve() if path is not None else path
+        # Modification time and size of the file, as last seen by the editor (None if there is no file).
+        # Reading the file state on disk on each access would be too slow, so it is cached,
+        # and refreshed by the documents watcher when the file changes.
+        self._file_stamp: tuple[int, int] | None = None
+        self.refresh_file_state()
         self.__class__.all_docs[self.doc_id] = self
 
     def __str__(self):
@@ -64,9 +71,14 @@ class Document:
     def doc_id(self) -> int:
         return self._doc_id
 
+    @property
+    def file_exists(self) -> bool:
+        """Return True if the document file exists (according to the last known file state)."""
+        return self._file_stamp is not None
+
     @property
     def is_saved(self) -> bool:
-        return self._is_saved and (self.path is None or self.path.is_file())
+        return self._is_saved and (self.path is None or self.file_exists)
 
     @is_saved.setter
     def is_saved(self, value: bool):
@@ -91,12 +103,45 @@ class Document:
             self.path.rename(path)
         # Update the document's path.
         self._path = path
+        self.refresh_file_state()
+
+    def refresh_file_state(self) -> bool:
+        """Read again the state of the document file on disk (existence, modification time and size).
+
+        Return True if the file changed since the last time its state was read.
+        """
+        stamp: tuple[int, int] | None = None
+        if self.path is not None:
+            try:
+                stat = self.path.stat()
+                stamp = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+        changed = stamp != self._file_stamp
+        self._file_stamp = stamp
+        return changed
 
     def _assert_unicity(self, path: Path) -> None:
         """Raise a `SamePath` error if the path matches an already opened document."""
         if any(path == doc.path for doc in self.__class__.all_docs.values() if doc is not self):
             raise SamePath("Can't save the document with the same path as an already opened one.")
 
+    def get_write_path(self, path: Path = None) -> Path:
+        """Return the path where the document content should be written.
+
+        If no path is provided, return the document path, or raise `DocumentHasNoPath` error
+        if none has been given before.
+        Raise `SamePath` error if the path matches any already opened document.
+        """
+        if path is None:
+            path = self._path
+        else:
+            # Two opened documents can't have the same path.
+            self._assert_unicity(path)
+        if path is None:
+            raise DocumentHasNoPath("Can't save document, no path set.")
+        return path
+
     def write(self, content: str, path: Path = None, is_copy: bool = False) -> None:
         """Write provided document content on given path.
 
@@ -108,18 +153,21 @@ class Document:
 
         If `is_copy` is `True`, the document path will not change.
         """
-        if path is None:
-            path = self._path
-        else:
-            # Two opened documents can't have the same path.
-            self._assert_unicity(path)
-            if not is_copy:
-                self._path = path
-        if path is None:
-            raise DocumentHasNoPath("Can't save document, no path set.")
-        with open(path, "w", encoding="utf8") as f:
-            f.write(content)
-        self._is_saved = True
+        path = self.get_write_path(path)
+        atomic_write(path, content)
+        self.on_written(path, is_copy=is_copy)
+
+    def on_written(self, path: Path, is_copy: bool = False) -> None:
+        """Update the document state, once its content has been written on `path`.
+
+        This is used when the content was written by another thread (see `write()` for the parameters).
+        """
+        if not is_copy:
+            self._path = path
+            self._is_saved = True
+            # Store the new file state, so that the documents watcher does not consider this writing
+            # as an external modification.
+            self.refresh_file_state()
 
     def on_close(self) -> None:
         self.__class__.all_docs.pop(self.doc_id)
@@ -0,0 +1,139 @@
+import csv
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QThread, QTimer, pyqtSignal
+
+from ptyx_mcq_editor.document_watcher import DEBOUNCE_DELAY
+from ptyx_mcq_editor.editor.editor_tab import EditorTab
+from ptyx_mcq_editor.tools.students_ids import FileStamp, StudentsSummary, file_stamp, read_students_summary
+
+if TYPE_CHECKING:
+    from ptyx_mcq_editor.main_window import McqEditorMainWindow
+
+
+class StudentsSummaryWorker(QObject):
+    """Read the students IDs files which changed since they were last read, in another thread."""
+
+    def __init__(self, stamps: dict[Path, FileStamp | None]):
+        super().__init__(None)
+        # The stamps of the files when they were last read (None if they were never read).
+        self.stamps = stamps
+
+    # Emit the new stamp and summary of each file which changed (the stamp is None if the file doesn't exist).
+    finished = pyqtSignal(object, name="finished")
+
+    def run(self) -> None:
+        results: dict[Path, tuple[FileStamp | None, StudentsSummary]] = {}
+        try:
+            for path, previous_stamp in self.stamps.items():
+                stamp = file_stamp(path)
+                if stamp is not None and stamp == previous_stamp:
+                    continue
+                summary = StudentsSummary(missing=True)
+                if stamp is not None:
+                    try:
+                        summary = read_students_summary(path)
+                    except (OSError, UnicodeDecodeError, csv.Error) as e:
+                        summary = StudentsSummary(errors=(f"Can't read file: {e}",), errors_count=1)
+                results[path] = (stamp, summary)
+        finally:
+            self.finished.emit(results)
+
+
+class StudentsIdsWatcher(QObject):
+    """Cache the summaries of the students IDs files, and watch those files to keep the summaries up to date.
+
+    Those files may be large, or on a network share, so they are never read in the main thread:
+    a file is read in the background the first time its summary is requested, then only when
+    the file system reports a change and its modification time or size changed.
+    """
+
+    def __init__(self, main_window: "McqEditorMainWindow"):
+        super().__init__(parent=main_window)
+        self.main_window: Final = main_window
+        self._summaries: dict[Path, StudentsSummary] = {}
+        self._stamps: dict[Path, FileStamp | None] = {}
+        # Files to read (again) once the current worker has finished.
+        self._to_read: set[Path] = set()
+        # Store worker as attribute, or else it will be garbage-collected.
+        self.worker: StudentsSummaryWorker | None = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_path_changed)
+        self.watcher.directoryChanged.connect(self._on_path_changed)
+        self._changed_paths: set[Path] = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_DELAY)
+        self._timer.timeout.connect(self._check_changed_paths)
+
+    def summary(self, path: Path) -> StudentsSummary | None:
+        """Return the summary of the students IDs file, or None if it has not been read yet.
+
+        If the file doesn't exist, the summary says so (see `StudentsSummary.missing`).
+
+        The file is then read in the background.
+        """
+        path = path.absolute()
+        if path not in self._stamps:
+            self._stamps[path] = None
+            self._read([path])
+        return self._summaries.get(path)
+
+    def _read(self, paths: list[Path]) -> None:
+        self._to_read.update(paths)
+        if self.worker is not None or not self._to_read:
+            # Pending files will be read once the current worker has finished.
+            return
+        stamps = {path: self._stamps.get(path) for path in self._to_read}
+        self._to_read.clear()
+        self.worker = worker = StudentsSummaryWorker(stamps)
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        worker.finished.connect(self._on_read)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        # noinspection PyUnresolvedReferences
+        thread.started.connect(worker.run)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def _on_read(self, results: dict[Path, tuple[FileStamp | None, StudentsSummary]]) -> None:
+        self.worker = None
+        for path, (stamp, summary) in results.items():
+            self._stamps[path] = stamp
+            self._summaries[path] = summary
+        self._update_watched_paths()
+        if results:
+            self._refresh_editors()
+        self._read([])
+
+    def _refresh_editors(self) -> None:
+        """Update the students IDs path indicators of the editors, since some files changed (or were created or deleted)."""
+        for book in self.main_window.books.values():
+            for i in range(book.count()):
+                tab = book.widget(i)
+                if isinstance(tab, EditorTab) and tab.is_materialized:
+                    tab.editor.refresh_students_path_indicators()
+
+    def _update_watched_paths(self) -> None:
+        """Watch the students IDs files, and their parent directories (to detect replaced files)."""
+        files = {str(path) for path, stamp in self._stamps.items() if stamp is not None}
+        directories = {str(path.parent) for path in self._stamps}
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        expected = files | directories
+        if to_remove := watched - expected:
+            self.watcher.removePaths(list(to_remove))
+        if to_add := expected - watched:
+            # Paths which can't be watched (missing directories...) are simply ignored.
+            self.watcher.addPaths(list(to_add))
+
+    def _on_path_changed(self, path: str) -> None:
+        self._changed_paths.add(Path(path))
+        self._timer.start()
+
+    def _check_changed_paths(self) -> None:
+        """Read again the files which changed (or whose parent directory changed)."""
+        changed_paths, self._changed_paths = self._changed_paths, set()
+        # Files whose stamp didn't change won't be read again (see `StudentsSummaryWorker.run()`).
+        self._read([path for path in self._stamps if path in changed_paths or path.parent in changed_paths])
@@ -0,0 +1,104 @@
+"""
+Timing of the successive stages of a compilation (preview or publication).
+
+Compilations run in another process: this process measures its own stages, then sends
+its trace through the result queue, before the result itself. Wall-clock timestamps
+(`time.time()`) are used to measure intervals across the process boundary, like
+the process spawn or the transfer of the result through the queue.
+
+Each trace is displayed at the end of the compilation log, and appended to a local
+JSONL history file, to make performance regressions visible.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator, Literal
+
+from ptyx_mcq_editor.param import COMPILATION_HISTORY_PATH
+
+# When the history file exceeds this size (in bytes), it is renamed with a `.1` suffix
+# (replacing any previous one), and a new history file is started.
+MAX_HISTORY_SIZE = 5_000_000
+
+
+@dataclass
+class CompilationTrace:
+    """Durations (in seconds) of the stages of a compilation, in chronological order."""
+
+    stages: dict[str, float] = field(default_factory=dict)
+    # Wall-clock timestamps, comparable between processes.
+    marks: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure the duration of the block, as the stage `name`."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def add(self, name: str, duration: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + duration
+
+    def mark(self, name: str) -> None:
+        """Store the current wall-clock time."""
+        self.marks[name] = time.time()
+
+    def add_interval(self, name: str, start_mark: str, end_mark: str) -> None:
+        """Add the stage `name`, lasting from the mark `start_mark` to the mark `end_mark`.
+
+        Nothing is done if a mark is missing (if the compilation failed, for example).
+        """
+        if start_mark in self.marks and end_mark in self.marks:
+            self.add(name, max(self.marks[end_mark] - self.marks[start_mark], 0.0))
+
+    def merge_process_trace(self, process_trace: "CompilationTrace") -> None:
+        """Merge the trace of the compilation process, which must have marked `process_started`."""
+        self.marks.update(process_trace.marks)
+        self.add_interval("process_spawn", "process_start", "process_started")
+        for name, duration in process_trace.stages.items():
+            self.add(name, duration)
+
+    @property
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+    def format(self) -> str:
+        """Return a human-readable summary, to be displayed in the log."""
+        lines = ["Compilation stages:"]
+        for name, duration in self.stages.items():
+            lines.append(f"  {name:<25} {1000 * duration:>10.1f} ms")
+        lines.append(f"  {'total':<25} {1000 * self.total:>10.1f} ms")
+        return "\n".join(lines)
+
+
+def append_to_history(
+    trace: CompilationTrace,
+    kind: Literal["preview", "publish"],
+    doc_path: Path,
+    failed: bool,
+    history_path: Path = COMPILATION_HISTORY_PATH,
+) -> None:
+    """Append the trace to the JSONL history file (one JSON object per line)."""
+    entry = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "kind": kind,
+        "doc_path": str(doc_path),
+        "status": "failed" if failed else "passed",
+        "total": trace.total,
+        "stages": trace.stages,
+    }
+    try:
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        if history_path.is_file() and history_path.stat().st_size > MAX_HISTORY_SIZE:
+            history_path.replace(history_path.with_name(history_path.name + ".1"))
+        with open(history_path, "a", encoding="utf8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Can't write compilation history in {history_path}: {e}")
@@ -0,0 +1,170 @@
+"""
+Index of the lines of a pTyX document having a special meaning for the editor:
+include directives, header delimiters and students IDs file path.
+
+The index is updated incrementally: after each modification of the document,
+the lines following the modified ones are just shifted, and only the modified lines
+have to be examined again (see `LinesIndex.shift()`).
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from enum import Enum
+from typing import Iterable
+
+STUDENTS_IDS_REGEX = re.compile(r"(ids\s*=\s*)(.+)")
+
+
+class LineKind(Enum):
+    INCLUDE = "include"
+    DISABLED_INCLUDE = "disabled include"
+    # `-- DIR: path` directives (enabled or not), setting the directory of the next includes.
+    DIRECTORY = "directory"
+    # `=====` lines, delimiting the header.
+    DELIMITER = "delimiter"
+    # `ids = path` lines (only meaningful inside the header).
+    STUDENTS_IDS = "students IDs"
+
+
+DIRECTIVES_KINDS = (LineKind.INCLUDE, LineKind.DISABLED_INCLUDE, LineKind.DIRECTORY)
+
+
+def classify_line(line: str) -> LineKind | None:
+    """Return the kind of the line, or None for ordinary lines."""
+    line = line.rstrip("\r\n")
+    if line.startswith("-- "):
+        return LineKind.DIRECTORY if line[3:].lstrip().startswith("DIR:") else LineKind.INCLUDE
+    if line.startswith("!-- "):
+        return LineKind.DIRECTORY if line[4:].lstrip().startswith("DIR:") else LineKind.DISABLED_INCLUDE
+    if line.startswith("===") and all(c == "=" for c in line):
+        return LineKind.DELIMITER
+    if STUDENTS_IDS_REGEX.fullmatch(line) is not None:
+        return LineKind.STUDENTS_IDS
+    return None
+
+
+class LinesIndex:
+    """Sorted index of the special lines of a document, with their kind.
+
+    When the document is modified, `shift()` must be called: it updates the numbers
+    of the following lines, and marks the modified lines as dirty.
+    Dirty lines must then be examined again, using `pop_dirty_lines()` and `set_line()`.
+    """
+
+    def __init__(self) -> None:
+        # Sorted numbers of the special lines, and their kinds.
+        self._lines: list[int] = []
+        self._kinds: list[LineKind] = []
+        self._counts: Counter[LineKind] = Counter()
+        # Lines to examine again, from `_dirty_start` to `_dirty_end` included.
+        self._dirty_start: int | None = None
+        self._dirty_end = 0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def count(self, kind: LineKind) -> int:
+        return self._counts[kind]
+
+    def kind(self, line: int) -> LineKind | None:
+        i = bisect_left(self._lines, line)
+        return self._kinds[i] if i < len(self._lines) and self._lines[i] == line else None
+
+    def lines(self, kind: LineKind, start: int = 0, end: int | None = None) -> list[int]:
+        """Return the lines of this kind, from line `start` to line `end` (included)."""
+        i = bisect_left(self._lines, start)
+        j = len(self._lines) if end is None else bisect_right(self._lines, end)
+        return [line for line, line_kind in zip(self._lines[i:j], self._kinds[i:j]) if line_kind == kind]
+
+    def is_directive(self, line: int) -> bool:
+        return self.kind(line) in DIRECTIVES_KINDS
+
+    def header(self) -> tuple[int, int | None] | None:
+        """Return the first and last lines of the header (the last one is None if the header is not closed).
+
+        The header starts after the first `=====` line, and ends with the second one.
+        """
+        delimiters = self.lines(LineKind.DELIMITER)
+        if not delimiters:
+            return None
+        return delimiters[0] + 1, delimiters[1] - 1 if len(delimiters) > 1 else None
+
+    def students_ids_line(self) -> int | None:
+        """Return the line of the header defining the students IDs file, if any (the last one wins)."""
+        header = self.header()
+        if header is None:
+            return None
+        ids_lines = self.lines(LineKind.STUDENTS_IDS, *header)
+        return ids_lines[-1] if ids_lines else None
+
+    def reset(self, lines: Iterable[str]) -> None:
+        """Index all the lines of the document."""
+        self._lines.clear()
+        self._kinds.clear()
+        self._counts.clear()
+        self._dirty_start = None
+        for i, line in enumerate(lines):
+            if (kind := classify_line(line)) is not None:
+                self._lines.append(i)
+                self._kinds.append(kind)
+                self._counts[kind] += 1
+
+    def set_line(self, line: int, text: str) -> LineKind | None:
+        """Examine again the line `line`, and return its kind."""
+        kind = classify_line(text)
+        i = bisect_left(self._lines, line)
+        if i < len(self._lines) and self._lines[i] == line:
+            self._counts[self._kinds[i]] -= 1
+            if kind is None:
+                del self._lines[i], self._kinds[i]
+            else:
+                self._kinds[i] = kind
+        elif kind is not None:
+            self._lines.insert(i, line)
+            self._kinds.insert(i, kind)
+        if kind is not None:
+            self._counts[kind] += 1
+        return kind
+
+    def shift(self, line: int, lines_added: int) -> None:
+        """Update the index after a modification of the document starting at line `line`.
+
+        If `lines_added` is negative, lines `line + 1` to `line - lines_added` have been deleted
+        (and merged into line `line`). Else, `lines_added` lines have been inserted after line `line`.
+        """
+        # Lines modified, before and after the modification.
+        old_end = line + max(0, -lines_added)
+        new_end = line + max(0, lines_added)
+        i = bisect_left(self._lines, line)
+        j = bisect_right(self._lines, old_end)
+        for kind in self._kinds[i:j]:
+            self._counts[kind] -= 1
+        # The modified lines will be examined again.
+        del self._lines[i:j], self._kinds[i:j]
+        if lines_added:
+            self._lines[i:] = [following_line + lines_added for following_line in self._lines[i:]]
+        # Update dirty lines too.
+        if self._dirty_start is None:
+            self._dirty_start, self._dirty_end = line, new_end
+        else:
+            dirty_end = self._dirty_end
+            if dirty_end > old_end:
+                dirty_end += lines_added
+            elif dirty_end > line:
+                # The end of the dirty lines has been deleted.
+                dirty_end = line
+            if self._dirty_start > old_end:
+                self._dirty_start += lines_added
+            elif self._dirty_start > line:
+                self._dirty_start = line
+            self._dirty_start = min(self._dirty_start, line)
+            self._dirty_end = max(dirty_end, new_end)
+
+    def pop_dirty_lines(self) -> range:
+        """Return the lines modified since the last call, which must be examined again."""
+        if self._dirty_start is None:
+            return range(0)
+        dirty_lines = range(self._dirty_start, self._dirty_end + 1)
+        self._dirty_start = None
+        return dirty_lines
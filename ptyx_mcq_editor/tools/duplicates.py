@@ -0,0 +1,220 @@
+"""
+Detection of duplicate and near-duplicate exercises, using MinHash and locality-sensitive hashing (LSH).
+
+The code of each exercise is normalized (whitespace is collapsed, comments of python blocks are removed...),
+then split into shingles (sequences of `SHINGLE_SIZE` consecutive tokens). The MinHash signature
+of the set of shingles is computed using one permutation hashing: each shingle is hashed once,
+its hash selects one of the `SIGNATURE_SIZE` bins of the signature, and each bin keeps its minimal hash.
+The proportion of equal bins in two signatures estimates the Jaccard similarity of the exercises.
+
+To avoid comparing every pair of exercises, signatures are split into `BANDS` bands:
+only exercises sharing at least one band are compared (locality-sensitive hashing).
+So, files are processed in a single streaming pass, in time roughly proportional to their number.
+"""
+
+import operator
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import Iterable, Iterator, Callable
+
+from ptyx_mcq_editor.param import DUPLICATES_THRESHOLD
+
+SIGNATURE_SIZE = 128
+# With 16 bands of 8 bins, pairs are compared with a probability > 50% as soon as their similarity
+# is above (1/16)^(1/8) ≈ 0.7, and > 99% above 0.9.
+BANDS = 16
+SHINGLE_SIZE = 4
+
+TOKEN_REGEX = re.compile(r"\w+|[^\w\s]")
+# Only the lowest bits of the hash of a shingle are used: the first ones select the bin,
+# the next 32 ones are the value of the shingle in this bin.
+_BIN_BITS = SIGNATURE_SIZE.bit_length() - 1
+_HASH_MASK = (1 << (_BIN_BITS + 32)) - 1
+assert SIGNATURE_SIZE == 1 << _BIN_BITS and SIGNATURE_SIZE % BANDS == 0
+
+Signature = tuple[int, ...]
+
+
+@cache
+def _probes() -> list[list[int]]:
+    """For each bin, return the (fixed) order in which other bins are used to fill it if it is empty.
+
+    Built on first use, since it is slow to build (and `random` slow to import).
+    """
+    import random
+
+    return [random.Random(i).sample(range(SIGNATURE_SIZE), SIGNATURE_SIZE) for i in range(SIGNATURE_SIZE)]
+
+
+# Comments of python blocks (ignoring `#` inside strings would require a real parser, for little benefit).
+COMMENT_REGEX = re.compile(r"#[^'\"\n]*$", re.MULTILINE)
+
+
+def _normalize_python_block(*, start: str, end: str, content: str) -> str:
+    from ptyx.extensions.extended_python import parse_extended_python_line
+
+    try:
+        content = "\n".join(parse_extended_python_line(line) for line in content.split("\n"))
+    except SyntaxError:
+        pass
+    content = COMMENT_REGEX.sub("", content).replace("'", '"')
+    # Spaces don't matter, since only tokens are compared.
+    return f"\n{start.strip()}\n{content}\n{end.strip()}\n"
+
+
+def normalize_code(code: str) -> str:
+    """Return a normalized version of the code of an exercise, to compare it with other exercises.
+
+    Whitespace is collapsed, and in python blocks, comments are removed,
+    quotes are normalized and ptyx extended syntax (`let` lines) is translated.
+    """
+    from ptyx.extensions.extended_python import parse_code_block
+
+    return " ".join(parse_code_block(code, _normalize_python_block).split())
+
+
+def signature(code: str) -> Signature | None:
+    """Return the MinHash signature of the exercise, or None if it is too short to be compared."""
+    tokens = TOKEN_REGEX.findall(normalize_code(code))
+    if len(tokens) < SHINGLE_SIZE:
+        return None
+    # Hash each token once. Unlike hashes of strings, Python hashes of tuples of integers
+    # are not randomized, so signatures may be computed in other processes.
+    hashes = [zlib.crc32(token.encode("utf8")) for token in tokens]
+    shingles = zip(*(hashes[i:] for i in range(SHINGLE_SIZE)))
+    # In the same bin, hashes are ordered as their values: the last one written, the minimal one, is kept.
+    mask = SIGNATURE_SIZE - 1
+    values = {
+        h & mask: h >> _BIN_BITS for h in sorted((hash(s) & _HASH_MASK for s in shingles), reverse=True)
+    }
+    # Densification: an empty bin takes the value of another bin, chosen using a sequence of bins
+    # specific to this bin (probing them in a fixed order would propagate the same values
+    # to the consecutive empty bins, and make the bands of short exercises too similar).
+    bins = [values.get(i, -1) for i in range(SIGNATURE_SIZE)]
+    probes = _probes()
+    for i, value in enumerate(bins):
+        if value == -1:
+            for j in probes[i]:
+                if j in values:
+                    bins[i] = values[j]
+                    break
+    return tuple(bins)
+
+
+def similarity(signature1: Signature, signature2: Signature) -> float:
+    """Return an estimation of the Jaccard similarity of the exercises of these signatures."""
+    return sum(map(operator.eq, signature1, signature2)) / SIGNATURE_SIZE
+
+
+def _bands(sig: Signature) -> list[tuple[int, Signature]]:
+    rows = SIGNATURE_SIZE // BANDS
+    return [(i, sig[i * rows : (i + 1) * rows]) for i in range(BANDS)]
+
+
+def _read_signature(path: Path) -> Signature | None:
+    try:
+        return signature(path.read_text(encoding="utf8"))
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Can't read {path}: {e}")
+        return None
+
+
+@dataclass
+class DuplicatesFinder:
+    """Find the clusters of similar exercises, adding the exercises one at a time."""
+
+    threshold: float = DUPLICATES_THRESHOLD
+    # Exercises are identified by their index in `paths`.
+    paths: list[Path] = field(default_factory=list)
+    signatures: list[Signature] = field(default_factory=list)
+    # Pairs of similar exercises, and their similarity.
+    # Pairs of exercises already in the same cluster are not compared, so this is not exhaustive:
+    # it only links all the exercises of each cluster.
+    pairs: dict[tuple[int, int], float] = field(default_factory=dict)
+    _buckets: dict[tuple[int, Signature], list[int]] = field(default_factory=dict)
+    # Union-find structure of the clusters.
+    _parent: list[int] = field(default_factory=list)
+
+    def _root(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            # Path halving, to keep the trees flat.
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def add(self, path: Path, sig: Signature | None) -> None:
+        if sig is None:
+            return
+        new = len(self.paths)
+        self.paths.append(path)
+        self.signatures.append(sig)
+        self._parent.append(new)
+        buckets = [self._buckets.setdefault(band, []) for band in _bands(sig)]
+        for other in sorted({other for bucket in buckets for other in bucket}):
+            root, other_root = self._root(new), self._root(other)
+            if root != other_root and (value := similarity(sig, self.signatures[other])) >= self.threshold:
+                self.pairs[(other, new)] = value
+                self._parent[root] = other_root
+        # Every exercise is kept, even if an exercise of the same cluster is already in the bucket:
+        # similarity is not transitive, so a new exercise may be similar to this one only.
+        for bucket in buckets:
+            bucket.append(new)
+
+    def clusters(self) -> list[list[Path]]:
+        """Return the clusters of similar exercises (each one sorted, and the largest ones first)."""
+        clusters: dict[int, list[Path]] = {}
+        for i, path in enumerate(self.paths):
+            clusters.setdefault(self._root(i), []).append(path)
+        return sorted(
+            (sorted(cluster) for cluster in clusters.values() if len(cluster) > 1), key=lambda c: (-len(c), c)
+        )
+
+
+def _signatures(paths: list[Path], jobs: int | None) -> Iterator[Signature | None]:
+    """Generate the signatures of the exercises, computed using `jobs` processes."""
+    if jobs == 1:
+        yield from map(_read_signature, paths)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            yield from executor.map(_read_signature, paths, chunksize=64)
+
+
+def find_duplicates(
+    paths: Iterable[Path],
+    threshold: float = DUPLICATES_THRESHOLD,
+    jobs: int | None = None,
+    feedback: Callable[[Path], None] | None = None,
+) -> DuplicatesFinder:
+    """Compare all the exercises, in a single streaming pass, and return the finder with the results.
+
+    Signatures are computed using `jobs` processes (default: the number of processors).
+    `feedback` is called each time an exercise has been handled.
+    """
+    finder = DuplicatesFinder(threshold)
+    paths = list(paths)
+    for path, sig in zip(paths, _signatures(paths, jobs)):
+        finder.add(path, sig)
+        if feedback is not None:
+            feedback(path)
+    return finder
+
+
+def find_similar(
+    code: str, paths: Iterable[Path], threshold: float = DUPLICATES_THRESHOLD, jobs: int | None = None
+) -> list[tuple[Path, float]]:
+    """Return the exercises similar to `code`, and their similarity, the most similar first."""
+    sig = signature(code)
+    if sig is None:
+        return []
+    paths = list(paths)
+    results = [
+        (path, value)
+        for path, other in zip(paths, _signatures(paths, jobs))
+        if other is not None and (value := similarity(sig, other)) >= threshold
+    ]
+    return sorted(results, key=lambda result: (-result[1], result[0]))
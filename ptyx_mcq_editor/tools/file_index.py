@@ -0,0 +1,126 @@
+"""
+Base class of the persistent indexes of the exercises (see `trigram_index.py` and `semantic_index.py`).
+
+An index is a SQLite database, storing some data for each `.ptyx` and `.ex` file of the indexed directories.
+It is updated incrementally: only the files whose modification time or size changed since
+the last update are indexed again.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from ptyx_mcq_editor.tools.file_tools import collect_files
+
+FILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+class FileIndex:
+    """Index of the `.ptyx` and `.ex` files of some directories, stored in a SQLite database.
+
+    Subclasses must implement `_index_file()`, to store the data of a file.
+    The rows of their tables should reference `files(id)` with `ON DELETE CASCADE`,
+    so that they are removed with the file.
+    """
+
+    # Tables of the index (besides the `files` table).
+    SCHEMA = ""
+    # Increment it whenever the schema or the indexed data change: the index will be rebuilt.
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # The index may be used by several threads (or editor instances) simultaneously.
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version != self.SCHEMA_VERSION:
+            # The index is only a cache: rebuild it from scratch.
+            with self.connection:
+                tables = self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                for (table,) in tables.fetchall():
+                    self.connection.execute(f'DROP TABLE "{table}"')
+        self.connection.executescript(FILES_SCHEMA + self.SCHEMA)
+        # Enable it only now, so that tables may be dropped in any order.
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def __enter__(self) -> "FileIndex":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @staticmethod
+    def _prefix(root: Path) -> str:
+        return os.path.join(str(root.resolve()), "")
+
+    def _indexed_files(self, root: Path) -> dict[str, tuple[int, int, int]]:
+        """Return the indexed files of the directory, with their id, modification time and size."""
+        # Don't use LIKE, since paths may contain `%` or `_`.
+        prefix = self._prefix(root)
+        rows = self.connection.execute(
+            "SELECT path, id, mtime_ns, size FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+        )
+        return {path: (file_id, mtime_ns, size) for path, file_id, mtime_ns, size in rows}
+
+    def _remove_file(self, file_id: int) -> None:
+        self._forget_file(file_id)
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def update(self, root: Path) -> tuple[int, int]:
+        """Update the index of the directory `root`, indexing only the modified files.
+
+        Return the number of (re)indexed files, and the number of files removed from the index.
+        """
+        indexed = self._indexed_files(root)
+        updated = 0
+        with self.connection:
+            for path in collect_files([root.resolve()]):
+                previous = indexed.pop(str(path), None)
+                try:
+                    stat = path.stat()
+                    if previous is not None and previous[1:] == (stat.st_mtime_ns, stat.st_size):
+                        continue
+                    content = path.read_bytes()
+                except OSError as e:
+                    print(f"Can't index {path}: {e}")
+                    if previous is not None:
+                        # Remove it from the index, since it may be outdated.
+                        indexed[str(path)] = previous
+                    continue
+                if previous is not None:
+                    self._remove_file(previous[0])
+                file_id = self.connection.execute(
+                    "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                    (str(path), stat.st_mtime_ns, stat.st_size),
+                ).lastrowid
+                assert file_id is not None
+                self._index_file(file_id, content)
+                updated += 1
+            # Remaining files don't exist anymore.
+            for file_id, _, _ in indexed.values():
+                self._remove_file(file_id)
+            self._end_update()
+        return updated, len(indexed)
+
+    def _index_file(self, file_id: int, content: bytes) -> None:
+        """Store the data of the file."""
+        raise NotImplementedError
+
+    def _forget_file(self, file_id: int) -> None:
+        """Called before removing a file from the index (its rows are then removed automatically)."""
+
+    def _end_update(self) -> None:
+        """Called at the end of an update, before committing it."""
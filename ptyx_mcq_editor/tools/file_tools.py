@@ -0,0 +1,52 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# The umask can only be read by changing it, which would affect all the threads:
+# read it once, on import (files are written from other threads).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def collect_files(paths: Iterable[Path], extensions: tuple[str, ...] = (".ptyx", ".ex")) -> Iterator[Path]:
+    """Return given paths, replacing any directory with all the .ptyx and .ex files it contains.
+
+    Contrary to `events_handler.get_files()`, directories are searched recursively.
+
+    Raise `FileNotFoundError` if a path does not exist.
+    """
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.suffix in extensions and p.is_file())
+        elif path.is_file():
+            yield path
+        else:
+            raise FileNotFoundError(f"File '{path}' does not exist.")
+
+
+def atomic_write(path: Path, content: str, encoding: str = "utf8") -> None:
+    """Write `content` on `path`, without ever leaving a partially written file.
+
+    The content is first written to a temporary file in the same directory,
+    flushed to disk, then the temporary file replaces the target.
+    The permissions of the previous file (if any) are preserved.
+    If `path` is a symbolic link, the file it points to is replaced (and not the link).
+    """
+    path = path.resolve()
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, path.stat().st_mode)
+        except FileNotFoundError:
+            # New file: use default permissions, like `open()` does.
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
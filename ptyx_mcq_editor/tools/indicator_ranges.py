@@ -0,0 +1,152 @@
+"""
+Model of the ranges of positions where a Scintilla indicator is set.
+
+Setting an indicator on a large document by clearing it everywhere, then filling all its ranges again,
+sends a lot of messages to Scintilla, and makes it repaint large parts of the document.
+Instead, the ranges where the indicator is currently set are kept, so that only the differences
+with the new ranges have to be cleared or filled (see `IndicatorRanges.diff()`).
+
+The model must be updated after each modification of the document (see `on_insert()` and `on_delete()`),
+exactly like Scintilla moves its indicators.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator
+
+Range = tuple[int, int]
+
+
+def _merge(ranges: Iterable[Range]) -> list[Range]:
+    """Merge overlapping or touching ranges (ranges must be sorted), and skip empty ones."""
+    merged: list[Range] = []
+    for start, end in ranges:
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(ranges: list[Range], other: list[Range]) -> list[Range]:
+    """Return the parts of `ranges` not covered by `other` (both must be sorted and merged)."""
+    result: list[Range] = []
+    j = 0
+    for start, end in ranges:
+        # Skip the ranges of `other` ending before this range.
+        while j < len(other) and other[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(other) and other[k][0] < end:
+            if other[k][0] > start:
+                result.append((start, other[k][0]))
+            start = max(start, other[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+class IndicatorRanges:
+    """Sorted and disjoint ranges `[start, end)` of positions (in bytes), where an indicator is set.
+
+    Like in Scintilla, touching ranges are merged.
+    """
+
+    def __init__(self) -> None:
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+
+    def __iter__(self) -> Iterator[Range]:
+        return zip(self._starts, self._ends)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __repr__(self) -> str:
+        return f"IndicatorRanges({list(self)})"
+
+    def ranges(self, start: int = 0, end: int | None = None) -> list[Range]:
+        """Return the ranges between positions `start` and `end`, truncated to fit in it."""
+        i = bisect_right(self._ends, start)
+        j = len(self._starts) if end is None else bisect_left(self._starts, end)
+        ranges = list(zip(self._starts[i:j], self._ends[i:j]))
+        if ranges:
+            ranges[0] = (max(ranges[0][0], start), ranges[0][1])
+            if end is not None:
+                ranges[-1] = (ranges[-1][0], min(ranges[-1][1], end))
+        return ranges
+
+    def diff(
+        self, new_ranges: Iterable[Range], start: int = 0, end: int | None = None
+    ) -> tuple[list[Range], list[Range]]:
+        """Compare the current ranges with `new_ranges`, between positions `start` and `end`.
+
+        `new_ranges` must be sorted, but may overlap or touch. Return the ranges to clear,
+        and the ranges to fill, to replace the current ranges with the new ones.
+        """
+        current = self.ranges(start, end)
+        new = _merge(
+            (max(range_start, start), range_end if end is None else min(range_end, end))
+            for range_start, range_end in new_ranges
+        )
+        return _subtract(current, new), _subtract(new, current)
+
+    def fill(self, start: int, end: int) -> None:
+        if start >= end:
+            return
+        # Ranges overlapping or touching the new one are merged into it.
+        i = bisect_left(self._ends, start)
+        j = bisect_right(self._starts, end)
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def clear(self, start: int = 0, end: int | None = None) -> None:
+        i = bisect_right(self._ends, start)
+        j = len(self._starts) if end is None else bisect_left(self._starts, end)
+        if i >= j:
+            return
+        # Keep the parts of the first and last ranges outside the cleared range.
+        remaining = [(self._starts[i], start)]
+        if end is not None:
+            remaining.append((end, self._ends[j - 1]))
+        remaining = [
+            (range_start, range_end) for range_start, range_end in remaining if range_start < range_end
+        ]
+        self._starts[i:j] = [range_start for range_start, _ in remaining]
+        self._ends[i:j] = [range_end for _, range_end in remaining]
+
+    def on_insert(self, position: int, length: int) -> None:
+        """Update the ranges after the insertion of `length` bytes at `position`.
+
+        Like in Scintilla, a range is extended if the text is inserted inside it, but not at its start
+        or at its end.
+        """
+        i = bisect_right(self._starts, position - 1)
+        # Ranges starting at `position` or after are shifted.
+        self._starts[i:] = [start + length for start in self._starts[i:]]
+        if i > 0 and self._ends[i - 1] > position:
+            i -= 1
+        self._ends[i:] = [end + length for end in self._ends[i:]]
+
+    def on_delete(self, position: int, length: int) -> None:
+        """Update the ranges after the deletion of `length` bytes at `position`."""
+        deletion_end = position + length
+
+        def new_position(x: int) -> int:
+            return x if x <= position else position if x <= deletion_end else x - length
+
+        i = bisect_right(self._ends, position)
+        if i > 0 and self._ends[i - 1] == position:
+            # This range may be merged with a following one.
+            i -= 1
+        ranges = _merge(
+            (new_position(start), new_position(end)) for start, end in zip(self._starts[i:], self._ends[i:])
+        )
+        self._starts[i:] = [start for start, _ in ranges]
+        self._ends[i:] = [end for _, end in ranges]
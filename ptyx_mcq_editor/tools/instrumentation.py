@@ -0,0 +1,194 @@
+"""
+Lightweight instrumentation of hot code paths.
+
+Instrumentation is disabled by default, and then costs nothing: `instrumented()` returns
+the decorated function unchanged, and `timed()` does nothing. To enable it, set the
+`MCQ_EDITOR_PROFILE` environment variable before launching the editor:
+
+    $ MCQ_EDITOR_PROFILE=1 mcq-editor
+
+Statistics are then available in the "Debug > Performance statistics" dialog,
+which can export the recorded calls in the Chrome trace event format
+(open the file with `chrome://tracing` or https://ui.perfetto.dev).
+A report is printed too when the editor is closed.
+
+Each call is stored in a ring buffer (a `deque` with a maximal length), so the memory used is bounded.
+Calls may be recorded from any thread: statistics are updated, and buffers are copied, holding a lock
+(this costs far less than the timed code paths).
+"""
+
+import json
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, TypeVar, ParamSpec
+
+ENABLED = bool(os.environ.get("MCQ_EDITOR_PROFILE"))
+
+# Number of calls kept in the ring buffer, for the trace export.
+EVENTS_BUFFER_SIZE = 100_000
+# Number of durations kept for each code path, to compute percentiles.
+SAMPLES_BUFFER_SIZE = 10_000
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class Stats:
+    """Statistics for an instrumented code path."""
+
+    count: int = 0
+    # Durations in seconds.
+    total: float = 0.0
+    max: float = 0.0
+    # Durations of the last calls.
+    samples: deque[float] = field(default_factory=lambda: deque(maxlen=SAMPLES_BUFFER_SIZE))
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Return the `p`-th percentile of the durations of the last calls (nearest-rank method)."""
+        with _lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return 0.0
+        return samples[max(math.ceil(p / 100 * len(samples)) - 1, 0)]
+
+
+@dataclass(frozen=True)
+class Event:
+    """A single call of an instrumented code path."""
+
+    name: str
+    # Start time (`perf_counter()` value) and duration, in seconds.
+    start: float
+    duration: float
+    thread_id: int
+
+
+_stats: dict[str, Stats] = {}
+_events: deque[Event] = deque(maxlen=EVENTS_BUFFER_SIZE)
+# Protect the statistics and the buffers, which may be modified by several threads at once.
+_lock = threading.Lock()
+
+
+def record(name: str, duration: float, start: float | None = None) -> None:
+    """Record a call of the code path `name`, which lasted `duration` seconds."""
+    if start is None:
+        start = perf_counter() - duration
+    event = Event(name, start, duration, threading.get_ident())
+    with _lock:
+        _events.append(event)
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = Stats()
+        stats.count += 1
+        stats.total += duration
+        if duration > stats.max:
+            stats.max = duration
+        stats.samples.append(duration)
+
+
+def instrumented(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator counting and timing the calls of the decorated function, if instrumentation is enabled."""
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start, start)
+
+        return wrapper
+
+    return decorator
+
+
+class timed:
+    """Context manager counting and timing the execution of a block, if instrumentation is enabled.
+
+    with timed("EditorWidget.autocomplete"):
+        ...
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        if ENABLED:
+            self.start = perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        if ENABLED:
+            record(self.name, perf_counter() - self.start, self.start)
+
+
+def get_stats() -> dict[str, Stats]:
+    with _lock:
+        return dict(_stats)
+
+
+def get_events() -> list[Event]:
+    with _lock:
+        return list(_events)
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+
+def format_report() -> str:
+    """Return a plain text report, the most time-consuming code paths first."""
+    lines = [
+        f"{'Code path':<45} {'Calls':>9} {'Total (ms)':>11} {'Mean (µs)':>10}"
+        f" {'p50 (µs)':>10} {'p95 (µs)':>10} {'p99 (µs)':>10} {'Max (µs)':>10}"
+    ]
+    for name, stats in sorted(get_stats().items(), key=lambda item: item[1].total, reverse=True):
+        lines.append(
+            f"{name:<45} {stats.count:>9} {1000 * stats.total:>11.2f} {1e6 * stats.mean:>10.2f}"
+            f" {1e6 * stats.percentile(50):>10.2f} {1e6 * stats.percentile(95):>10.2f}"
+            f" {1e6 * stats.percentile(99):>10.2f} {1e6 * stats.max:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def export_chrome_trace(path: Path) -> int:
+    """Write the recorded calls in the Chrome trace event format, and return the number of events.
+
+    See https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU
+    """
+    pid = os.getpid()
+    events = get_events()
+    trace_events = [
+        {
+            "name": event.name,
+            "cat": event.name.split(".", 1)[0],
+            "ph": "X",
+            # Timestamps and durations are in microseconds.
+            "ts": round(1e6 * event.start, 3),
+            "dur": round(1e6 * event.duration, 3),
+            "pid": pid,
+            "tid": event.thread_id,
+        }
+        for event in events
+    ]
+    path.write_text(json.dumps({"traceEvents": trace_events, "displayTimeUnit": "ms"}), encoding="utf8")
+    return len(trace_events)
@@ -0,0 +1,41 @@
+"""
+Import the slow modules in the background, once the main window is displayed.
+
+pTyX compiler (through sympy) and pymupdf take seconds to import, so they are imported
+only when needed, to display the main window as soon as possible. Importing them
+in a background thread afterward avoids delaying the first compilation or analysis.
+"""
+
+import importlib
+import threading
+
+SLOW_MODULES = (
+    "ptyx.latex_generator",
+    "ptyx.compilation",
+    "ptyx.extensions.extended_python",
+    "ptyx_mcq.make.exercises_parsing",
+    "ptyx_mcq.make.make_command",
+    "ptyx_mcq.other_commands.update",
+)
+
+
+def _preload() -> None:
+    from ptyx_mcq_editor.editor.lexer import get_lexicon
+    from ptyx_mcq_editor.tools.processes import start_compilation_server
+    from ptyx_mcq_editor.tools.python_code_tools import get_ruff_version
+
+    for module in SLOW_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"Can't preload module {module}: {e}")
+    get_lexicon()
+    get_ruff_version()
+    start_compilation_server()
+
+
+def preload_modules() -> threading.Thread:
+    """Import the slow modules in a background thread, and return this thread."""
+    thread = threading.Thread(target=_preload, name="preload-modules", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,51 @@
+"""
+Processes used to compile documents.
+
+Compilations must be reproducible: the same document number must always give the same document.
+Yet, the iteration order of sets (and so, the result of the random functions applied to them)
+depends on the hash seed, so the compilation processes must disable it (`PYTHONHASHSEED=0`).
+
+Since the hash seed can't be changed once the interpreter is started, the processes can't be forked
+from the editor process. On POSIX systems, they are forked from a fork server instead, started
+with the hash seed disabled, and which has already imported the pTyX compiler, so that compilations
+start almost as fast as when forking the editor process. Elsewhere, they are spawned.
+"""
+
+import multiprocessing
+import os
+from multiprocessing.context import BaseContext
+
+from ptyx_mcq_editor.tools.preload import SLOW_MODULES
+
+# Modules of the functions run by the compilation processes.
+# Each process also imports again the main module (the `mcq-editor` script), which imports
+# `ptyx_mcq_editor.app`. (Preloading `__main__` instead doesn't work before Python 3.13.)
+COMPILATION_MODULES = (
+    "ptyx_mcq_editor.app",
+    "ptyx_mcq_editor.preview.compiler",
+    "ptyx_mcq_editor.preview.batch",
+    "ptyx_mcq_editor.preview.sweep",
+    "ptyx_mcq_editor.publish.compiler",
+)
+
+
+def compilation_context() -> BaseContext:
+    """Return the multiprocessing context to use for the compilation processes."""
+    # https://stackoverflow.com/questions/52044045/os-environment-variable-reading-in-a-spawned-process
+    # https://docs.python.org/3/library/multiprocessing.html#multiprocessing-start-methods
+    os.environ["PYTHONHASHSEED"] = "0"
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        # This has no effect if the fork server is already running.
+        ctx.set_forkserver_preload([*SLOW_MODULES, *COMPILATION_MODULES])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def start_compilation_server() -> None:
+    """Start the fork server now, if any, so that the first compilation doesn't have to wait for it."""
+    ctx = compilation_context()
+    if ctx.get_start_method() == "forkserver":
+        from multiprocessing import forkserver
+
+        forkserver.ensure_running()
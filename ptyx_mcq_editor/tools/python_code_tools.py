@@ -1,57 +1,96 @@
 import json
 import re
 import subprocess
+import tempfile
 import traceback
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Iterable, Sequence
 
 from ptyx.errors import ErrorInformation
-from ptyx.extensions.extended_python import (
-    PYTHON_DELIMITER,
-    parse_code_block,
-    parse_extended_python_line,
-)
 
 from ptyx.pretty_print import red, yellow
 
-try:
-    RUFF_VERSION = subprocess.run(["ruff", "--version"], encoding="utf8", stdout=subprocess.PIPE).stdout
-except Exception as _e:
-    RUFF_VERSION = "?"
-    print(_e)
+# Note that `ptyx.extensions.extended_python` is imported only when needed,
+# since it imports the whole pTyX compiler, which is slow (see `preload_modules()`).
 
 
-def ruff_check(code: str, select="E101,F", ignore="F821") -> list[dict[str, Any]]:
-    # https://github.com/astral-sh/ruff/issues/8401#issuecomment-1788806462
+@cache
+def get_ruff_version() -> str:
+    try:
+        return subprocess.run(["ruff", "--version"], encoding="utf8", stdout=subprocess.PIPE).stdout
+    except Exception as e:
+        print(e)
+        return "?"
 
-    # Checker example
-    proc = subprocess.run(
-        ["ruff", "check", f"--select={select}", f"--ignore={ignore}", "--output-format=json", "-"],
-        input=code,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.DEVNULL,  # remove this for debugging!
-        encoding="utf-8",
-    )
-    # proc.returncode  # <- 1 if bad
-    output = proc.stdout
+
+def _parse_ruff_output(output: str) -> Any:
     try:
-        js = json.loads(output)
+        return json.loads(output)
     except json.JSONDecodeError as e:
         print(red("\nError: invalid ruff output."))
-        print(yellow(f"Ruff version: {RUFF_VERSION}"))
+        print(yellow(f"Ruff version: {get_ruff_version()}"))
         print("--------------")
         print(" Ruff output: ")
         print("==============")
-        print(proc.stdout)
+        print(output)
         print("--------------")
         print()
         traceback.print_exception(e)
-        js = {}
-    return js
+        return []
 
 
-def check_each_python_block(code: str) -> list[ErrorInformation]:
+def ruff_check_many(codes: Sequence[str], select="E101,F", ignore="F821") -> list[list[dict[str, Any]]]:
+    """Check all the given python codes using a single ruff invocation.
+
+    Each code is written to its own file in a temporary directory, and ruff checks them
+    all at once (and in parallel), which is much faster than launching a process per code.
+
+    Return the list of ruff diagnostics for each code, in the same order.
+    """
+    results: list[list[dict[str, Any]]] = [[] for _ in codes]
+    if not codes:
+        return results
+    with tempfile.TemporaryDirectory(prefix="mcq-editor-ruff-") as tmp_dir:
+        for i, code in enumerate(codes):
+            (Path(tmp_dir) / f"{i}.py").write_text(code, encoding="utf-8")
+        proc = subprocess.run(
+            # Use `--isolated`, so that no configuration file found in the temporary directory's parents
+            # changes the selected rules (project ruff configurations are ignored).
+            ["ruff", "check", "--isolated", "--no-cache", f"--select={select}", f"--ignore={ignore}"]
+            + ["--output-format=json", tmp_dir],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+        )
+    for diagnostic in _parse_ruff_output(proc.stdout):
+        results[int(Path(diagnostic["filename"]).stem)].append(diagnostic)
+    return results
+
+
+@dataclass
+class PythonBlock:
+    """A python code block of a pTyX document."""
+
+    # Index of the line of the opening delimiter.
+    start: int
+    # Python code, once extended python syntax (`let` directives...) has been translated.
+    code: str
+
+
+def extract_python_blocks(code: str) -> tuple[list[PythonBlock], list[ErrorInformation]]:
+    """Return all the python blocks of the document.
+
+    Errors found when translating extended python syntax are returned too.
+    """
+    from ptyx.extensions.extended_python import PYTHON_DELIMITER, parse_extended_python_line
+
     lines: list[str] = []
     inside_python_block = False
+    blocks: list[PythonBlock] = []
     errors: list[ErrorInformation] = []
     start = 0
     for i, line in enumerate(code.split("\n")):
@@ -61,32 +100,67 @@ def check_each_python_block(code: str) -> list[ErrorInformation]:
                 start = i
             else:
                 # Leaving a python block
-                code = "\n".join(lines)
-                for d in ruff_check(code):
-                    message = d["message"]
-                    type_ = ""
-                    if message.startswith("SyntaxError: "):
-                        message = message[13:]
-                        type_ = "SyntaxError"
-                    errors.append(
-                        ErrorInformation(
-                            type_,
-                            f"{message}",
-                            start + d["location"]["row"],
-                            start + d["end_location"]["row"],
-                            d["location"]["column"],
-                            d["end_location"]["column"],
-                            extra={"ruff-error-code": d["code"]},
-                        )
-                    )
+                blocks.append(PythonBlock(start, "\n".join(lines)))
                 lines.clear()
         elif inside_python_block:
             try:
                 line = parse_extended_python_line(line)
             except SyntaxError as e:
-                errors.append(ErrorInformation("SyntaxError", e.msg, row=start + i))
+                errors.append(ErrorInformation("SyntaxError", e.msg, row=i))
             lines.append(line)
-    return errors
+    return blocks, errors
+
+
+def _ruff_diagnostic_to_error_info(block: PythonBlock, d: dict[str, Any]) -> ErrorInformation:
+    message = d["message"]
+    type_ = ""
+    if message.startswith("SyntaxError: "):
+        message = message[13:]
+        type_ = "SyntaxError"
+    return ErrorInformation(
+        type_,
+        f"{message}",
+        block.start + d["location"]["row"],
+        block.start + d["end_location"]["row"],
+        d["location"]["column"],
+        d["end_location"]["column"],
+        extra={"ruff-error-code": d["code"]},
+    )
+
+
+def check_python_blocks(documents: Sequence[str]) -> list[list[ErrorInformation]]:
+    """Check the python blocks of all the documents, using a single ruff invocation.
+
+    Return the errors found in each document, sorted by row.
+    Rows are 0-based (like Scintilla lines), columns are 1-based (like ruff ones).
+    """
+    all_errors: list[list[ErrorInformation]] = []
+    blocks: list[tuple[int, PythonBlock]] = []
+    for doc_index, document in enumerate(documents):
+        doc_blocks, errors = extract_python_blocks(document)
+        all_errors.append(errors)
+        blocks.extend((doc_index, block) for block in doc_blocks)
+    for (doc_index, block), diagnostics in zip(blocks, ruff_check_many([block.code for _, block in blocks])):
+        all_errors[doc_index].extend(_ruff_diagnostic_to_error_info(block, d) for d in diagnostics)
+    for errors in all_errors:
+        errors.sort(key=lambda error: (error.row or 0, error.col or 0))
+    return all_errors
+
+
+def check_each_python_block(code: str) -> list[ErrorInformation]:
+    return check_python_blocks([code])[0]
+
+
+def lint_files(paths: Iterable[Path], jobs: int | None = None) -> dict[Path, list[ErrorInformation]]:
+    """Check the python blocks of all the files, like the editor does.
+
+    Files are read using `jobs` threads, then all their python blocks are checked
+    at once by ruff (which itself checks files in parallel).
+    """
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        documents = list(executor.map(lambda path: path.read_text(encoding="utf-8"), paths))
+    return dict(zip(paths, check_python_blocks(documents)))
 
 
 def ruff_formater(code: str) -> str:
@@ -94,12 +168,40 @@ def ruff_formater(code: str) -> str:
     return subprocess.check_output(["ruff", "format", "-"], input=code, encoding="utf-8")
 
 
-def extended_python_ruff_formater(code: str) -> str:
-    """Format code using ruff.
+def ruff_format_many(codes: Sequence[str]) -> list[str]:
+    """Format all the given python codes using a single ruff invocation.
 
-    Support `let` directives, as defined in ptyx.extended_python plugin.
+    Like for `ruff_check_many()`, each code is written to its own file in a temporary directory.
+    Invalid python codes are left untouched.
+    """
+    if not codes:
+        return []
+    with tempfile.TemporaryDirectory(prefix="mcq-editor-ruff-") as tmp_dir:
+        paths = [Path(tmp_dir) / f"{i}.py" for i in range(len(codes))]
+        for path, code in zip(paths, codes):
+            path.write_text(code, encoding="utf-8")
+        # Ruff returns a non-zero exit code if some files can't be formatted,
+        # but the other ones are formatted anyway.
+        proc = subprocess.run(
+            ["ruff", "format", "--isolated", "--no-cache", tmp_dir],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            encoding="utf-8",
+        )
+        if proc.returncode != 0:
+            print(proc.stderr)
+        return [path.read_text(encoding="utf-8") for path in paths]
+
+
+# Random variable name, used to hide `let` directives from ruff.
+RAND_VARNAME = "rNTucrSob8Yqlb68syg066XeWxYZ8H"
+
+
+def _hide_let_directives(code: str) -> tuple[str, list[str]]:
+    """Replace `let` directives with a variable name, so that the code may be parsed as python code.
+
+    Return the new code, and the list of the (normalized) `let` directives.
     """
-    RAND_VARNAME = "rNTucrSob8Yqlb68syg066XeWxYZ8H"
     store: list[str] = []
 
     def extract_let_directives(m: re.Match) -> str:
@@ -109,26 +211,87 @@ def extended_python_ruff_formater(code: str) -> str:
         store.append(let_dir)
         return m.group(1) + RAND_VARNAME
 
-    code = re.sub("^( *)(let .+)$", extract_let_directives, code, flags=re.MULTILINE)
+    return re.sub("^( *)(let .+)$", extract_let_directives, code, flags=re.MULTILINE), store
 
+
+def _restore_let_directives(code: str, store: list[str]) -> str:
+    store = list(store)
+
+    def restore_let_directives(m: re.Match) -> str:
+        return m.group(1) + store.pop(0)
+
+    return re.sub(f"^( *){RAND_VARNAME}$", restore_let_directives, code, flags=re.MULTILINE)
+
+
+def extended_python_ruff_formater(code: str) -> str:
+    """Format code using ruff.
+
+    Support `let` directives, as defined in ptyx.extended_python plugin.
+    """
+    code, store = _hide_let_directives(code)
     try:
         code = ruff_formater(code)
     except Exception as e:
         print(e)
+    return _restore_let_directives(code, store)
+
+
+def extended_python_ruff_format_many(codes: Sequence[str]) -> list[str]:
+    """Format all the codes like `extended_python_ruff_formater()` does, but using a single ruff pass."""
+    hidden = [_hide_let_directives(code) for code in codes]
+    formatted = ruff_format_many([code for code, _ in hidden])
+    return [_restore_let_directives(code, store) for code, (_, store) in zip(formatted, hidden)]
 
-    def restore_let_directives(m: re.Match) -> str:
-        return m.group(1) + store.pop(0)
 
-    code = re.sub(f"^( *){RAND_VARNAME}$", restore_let_directives, code, flags=re.MULTILINE)
-    return code
+# Cache of formatted code blocks: hash of the block content -> formatted block content.
+# Formatted blocks are cached too (as keys), since they are very likely to be formatted again.
+_formatted_blocks_cache: dict[bytes, str] = {}
+FORMATTED_BLOCKS_CACHE_SIZE = 1000
+
+
+def _block_hash(content: str) -> bytes:
+    return blake2b(content.encode("utf-8"), digest_size=16).digest()
 
 
 def format_each_python_block(code: str) -> str:
-    """For each python code block in the document, apply ruff formatting."""
+    """For each python code block in the document, apply ruff formatting.
+
+    All the blocks are formatted at once, using a single ruff invocation,
+    and the blocks already formatted previously are skipped.
+    """
+    from ptyx.extensions.extended_python import parse_code_block
+
     delimiter = 12 * "."
+    hashes: list[bytes] = []
+    # Formatted blocks of this document. Cached values are copied as soon as they are found,
+    # since documents may be formatted concurrently by the save thread, which may prune the cache.
+    formatted_blocks: dict[bytes, str] = {}
+    # Remove duplicates, but keep order.
+    to_format: dict[bytes, str] = {}
+
+    def collect(start: str, end: str, content: str) -> str:
+        hashes.append(h := _block_hash(content))
+        if (cached := _formatted_blocks_cache.get(h)) is not None:
+            formatted_blocks[h] = cached
+        else:
+            to_format[h] = content
+        return ""
+
+    parse_code_block(code, collect)
+    for h, content in zip(to_format, extended_python_ruff_format_many(list(to_format.values()))):
+        if not content.startswith("\n"):
+            content = "\n" + content
+        formatted_blocks[h] = content
+        _formatted_blocks_cache[h] = _formatted_blocks_cache[_block_hash(content)] = content
+    formatted = iter([formatted_blocks[h] for h in hashes])
+    # Remove the oldest entries (dictionaries keep insertion order).
+    for h in list(_formatted_blocks_cache)[
+        : max(0, len(_formatted_blocks_cache) - FORMATTED_BLOCKS_CACHE_SIZE)
+    ]:
+        # Use `pop()`, since another thread may have removed it already.
+        _formatted_blocks_cache.pop(h, None)
 
     def parser(start: str, end: str, content: str) -> str:
-        content = extended_python_ruff_formater(content)
-        return "".join([delimiter, "" if content.startswith("\n") else "\n", content, delimiter])
+        return "".join([delimiter, next(formatted), delimiter])
 
     return parse_code_block(code, parser)
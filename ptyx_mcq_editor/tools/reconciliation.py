@@ -0,0 +1,144 @@
+"""
+Compute the operations needed to transform a sequence into another one.
+
+This is used to synchronize the tabs of the user interface with the opened documents,
+touching as few tabs as possible.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Hashable, Sequence, TypeVar, Generic
+
+Key = TypeVar("Key", bound=Hashable)
+
+
+@dataclass(frozen=True)
+class Remove:
+    index: int
+
+
+@dataclass(frozen=True)
+class Move:
+    from_index: int
+    to_index: int
+
+
+@dataclass(frozen=True)
+class Insert(Generic[Key]):
+    index: int
+    key: Key
+
+
+Operation = Remove | Move | Insert
+
+
+def _longest_increasing_subsequence(values: Sequence[int]) -> set[int]:
+    """Return the values of a longest strictly increasing subsequence (values must be distinct)."""
+    # `tails[k]` is the index (in `values`) of the smallest tail of an increasing subsequence of length k+1.
+    tails: list[int] = []
+    tails_values: list[int] = []
+    previous: list[int] = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails_values, value)
+        if k > 0:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tails_values.append(value)
+        else:
+            tails[k] = i
+            tails_values[k] = value
+    result: set[int] = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        result.add(values[i])
+        i = previous[i]
+    return result
+
+
+class _PresenceCounts:
+    """Fenwick tree counting the slots in use before a given slot, in logarithmic time."""
+
+    def __init__(self, size: int):
+        self._tree = [0] * (size + 1)
+
+    def add(self, slot: int, delta: int) -> None:
+        slot += 1
+        while slot < len(self._tree):
+            self._tree[slot] += delta
+            slot += slot & -slot
+
+    def count_before(self, slot: int) -> int:
+        total = 0
+        while slot > 0:
+            total += self._tree[slot]
+            slot -= slot & -slot
+        return total
+
+
+def reconcile(current: Sequence[Key], wanted: Sequence[Key]) -> list[Operation]:
+    """Return a minimal list of operations transforming `current` into `wanted`.
+
+    Keys must be unique in each sequence. Operations must be applied in order, each index
+    referring to the state of the sequence after the previous operations:
+        - `Remove(i)` removes the i-th item,
+        - `Move(i, j)` moves the i-th item, so that its index becomes `j`,
+        - `Insert(i, key)` inserts a new item at index `i`.
+
+    The items which don't need to be moved are found using a longest increasing subsequence,
+    so the number of moves is minimal.
+    """
+    wanted_keys = set(wanted)
+    # 1. Remove the obsolete items, starting from the last one, to not change the indexes of the others.
+    operations: list[Operation] = [
+        Remove(i) for i in range(len(current) - 1, -1, -1) if current[i] not in wanted_keys
+    ]
+    order = [key for key in current if key in wanted_keys]
+    if order == list(wanted):
+        # Fast path, by far the most frequent one.
+        return operations
+    # 2. Find the items which will stay in place: they are already in the right relative order.
+    position = {key: i for i, key in enumerate(order)}
+    stable = _longest_increasing_subsequence([position[key] for key in wanted if key in position])
+    # 3. Place every other item just after its predecessor in `wanted`.
+    #    Since items are placed in `wanted` order, each one is placed after an item
+    #    which is already at its final place (relatively to the others).
+    #
+    #    Indexes are found in logarithmic time using labels, since items always remain sorted by label:
+    #    the index of an item is the number of labels in use before its label.
+    #    An item at its final place is labeled `(k, 1, 0)`, where `k` is its index in `wanted`.
+    #    An item not placed yet is labeled `(k, 0, i)`, where `i` is its index in `order`,
+    #    and `k` the index in `wanted` of the next stable item (or `len(wanted)` if none).
+    #    An item placed just after its predecessor is still before all the labels greater than its own one.
+    wanted_index = {key: k for k, key in enumerate(wanted)}
+    labels: dict[Key, tuple[int, int, int]] = {}
+    next_stable = len(wanted)
+    for i in range(len(order) - 1, -1, -1):
+        key = order[i]
+        if i in stable:
+            next_stable = wanted_index[key]
+            labels[key] = (next_stable, 1, 0)
+        else:
+            labels[key] = (next_stable, 0, i)
+    final_labels = [(k, 1, 0) for k in range(len(wanted))]
+    slots = {label: slot for slot, label in enumerate(sorted(set(labels.values()) | set(final_labels)))}
+    counts = _PresenceCounts(len(slots))
+    for label in labels.values():
+        counts.add(slots[label], 1)
+    for k, key in enumerate(wanted):
+        if key in position and position[key] in stable:
+            continue
+        slot = slots[final_labels[k]]
+        if key in labels:
+            previous_slot = slots[labels[key]]
+            i = counts.count_before(previous_slot)
+            counts.add(previous_slot, -1)
+            # Index of the item once removed from its current position.
+            target = counts.count_before(slot)
+            if i != target:
+                operations.append(Move(i, target))
+        else:
+            target = counts.count_before(slot)
+            operations.append(Insert(target, key))
+        counts.add(slot, 1)
+    return operations
@@ -0,0 +1,222 @@
+"""
+Search and replace, in a single document or across many files.
+
+Searches use `str` patterns, so that case-insensitive and whole-word searches handle accented letters
+(with bytes patterns, `É` doesn't match `é`, and `\\w` doesn't match `é`). However, Scintilla positions
+correspond to a number of bytes, so the positions of the matches are converted to bytes positions
+(see `finditer_bytes()`).
+
+Files are searched in parallel, using a thread pool, and results are yielded as soon as
+each file has been searched, so that they can be displayed progressively.
+"""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from ptyx_mcq_editor.tools.file_tools import atomic_write
+
+# Maximal number of matches reported for a single file.
+MAX_MATCHES_PER_FILE = 1000
+# Invalid UTF-8 bytes are decoded as lone surrogates, and encoded back unchanged.
+ENCODING_ERRORS = "surrogateescape"
+
+
+def search_pattern(to_find: str, is_regex: bool, case_sensitive: bool, whole_words: bool) -> tuple[str, int]:
+    """Return the regex pattern and flags to use to search `to_find`."""
+    pattern = to_find
+    flags = 0
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    if not is_regex:
+        pattern = re.escape(pattern)
+    if whole_words:
+        pattern = r"\b" + pattern + r"\b"
+    return pattern, flags
+
+
+def _bytes_spans(
+    text: str, matches: Iterable[re.Match[str]], char_position: int = 0, byte_position: int = 0
+) -> Iterator[tuple[int, int]]:
+    """Yield the spans of the matches, converted to bytes positions in the UTF-8 encoded text.
+
+    `byte_position` must be the bytes position corresponding to the characters position `char_position`,
+    which must precede all the matches. Positions are converted incrementally, from a match to the next one.
+    """
+    for match in matches:
+        start, end = match.span()
+        byte_position += len(text[char_position:start].encode("utf8", ENCODING_ERRORS))
+        byte_end = byte_position + len(text[start:end].encode("utf8", ENCODING_ERRORS))
+        yield byte_position, byte_end
+        char_position, byte_position = end, byte_end
+
+
+def finditer_bytes(
+    regex: re.Pattern[str], text: str, start: int = 0, end: int | None = None
+) -> Iterator[tuple[int, int]]:
+    """Yield the spans of the matches of `regex` in `text`, as bytes positions in the UTF-8 encoded text.
+
+    Only the matches between the bytes positions `start` and `end` are searched
+    (like with `re.Pattern.finditer()`, the text before and after is still taken into account
+    for `^`, `$` or `\\b`).
+    """
+    data = text.encode("utf8", ENCODING_ERRORS)
+    char_start = len(data[:start].decode("utf8", ENCODING_ERRORS))
+    char_end = len(text) if end is None else char_start + len(data[start:end].decode("utf8", ENCODING_ERRORS))
+    return _bytes_spans(text, regex.finditer(text, char_start, char_end), char_start, start)
+
+
+def replace_matches(
+    text: bytes, regex: re.Pattern[str], replacement: str, is_regex: bool, start: int, end: int
+) -> tuple[bytes, int]:
+    """Replace all the matches of `regex` in `text[start:end]` (`start` and `end` are bytes positions).
+
+    If `is_regex` is True, `replacement` is a template, which may contain group references
+    (like `\\1` or `\\g<name>`), else it is inserted as is.
+
+    Return the new text of the range `text[start:end]`, and the number of replacements.
+    """
+    if not is_regex:
+        # Don't interpret backslashes.
+        replacement = replacement.replace("\\", "\\\\")
+    new_text, count = regex.subn(replacement, text[start:end].decode("utf8", ENCODING_ERRORS))
+    return new_text.encode("utf8", ENCODING_ERRORS), count
+
+
+@dataclass(frozen=True)
+class FileMatch:
+    """A search result in a file."""
+
+    path: Path
+    # Line number (starting from 0).
+    line: int
+    # Position of the match in the line (number of characters, not bytes).
+    column: int
+    # Positions of the match in the file (number of bytes).
+    start: int
+    end: int
+    # Content of the whole line.
+    line_text: str
+
+
+def include_tree(ptyx_file: Path) -> list[Path]:
+    """Return the pTyX file and all the files it includes (even through disabled directives).
+
+    Included `.ptyx` files are searched recursively for include directives too.
+    Missing files are ignored.
+    """
+    # Imported here, since it is slow to import.
+    from ptyx_mcq.make.include_directives_parsing import parse_code, AddPath, ChangeDirectory
+
+    files: dict[Path, None] = {}
+    to_visit = [ptyx_file.resolve()]
+    while to_visit:
+        path = to_visit.pop()
+        if path in files:
+            continue
+        files[path] = None
+        if path.suffix != ".ptyx":
+            continue
+        try:
+            code = path.read_text(encoding="utf8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Can't read {path}: {e}")
+            continue
+        default_dir = directory = path.parent
+        included_files: list[Path] = []
+        for directive in parse_code(code):
+            if isinstance(directive, ChangeDirectory):
+                if not directive.is_disabled:
+                    directory = (
+                        directive.path if directive.path.is_absolute() else default_dir / directive.path
+                    )
+            elif isinstance(directive, AddPath):
+                included = directive.path
+                if included.is_absolute():
+                    candidates = [included] if included.is_file() else []
+                else:
+                    candidates = sorted(p for p in directory.glob(str(included)) if p.is_file())
+                included_files.extend(candidate.resolve() for candidate in candidates)
+        # Visit included files in the order they appear.
+        to_visit.extend(reversed(included_files))
+    return list(files)
+
+
+def search_file(path: Path, regex: re.Pattern[str]) -> list[FileMatch]:
+    """Return the matches of `regex` in the file (at most `MAX_MATCHES_PER_FILE`)."""
+    text = path.read_bytes().decode("utf8", ENCODING_ERRORS)
+    matches: list[FileMatch] = []
+    regex_matches: list[re.Match[str]] = []
+    for match in regex.finditer(text):
+        regex_matches.append(match)
+        if len(regex_matches) >= MAX_MATCHES_PER_FILE:
+            break
+    # Lines are counted incrementally, from the previous match.
+    line = 0
+    position = 0
+    for match, (start, end) in zip(regex_matches, _bytes_spans(text, regex_matches)):
+        line += text.count("\n", position, match.start())
+        position = match.start()
+        line_start = text.rfind("\n", 0, position) + 1
+        line_end = text.find("\n", position)
+        if line_end == -1:
+            line_end = len(text)
+        matches.append(
+            FileMatch(
+                path=path,
+                line=line,
+                column=position - line_start,
+                start=start,
+                end=end,
+                line_text=text[line_start:line_end].encode("utf8", ENCODING_ERRORS).decode("utf8", "replace"),
+            )
+        )
+    return matches
+
+
+def search_files(
+    paths: Iterable[Path],
+    regex: re.Pattern[str],
+    jobs: int | None = None,
+    cancelled: threading.Event | None = None,
+) -> Iterator[tuple[Path, list[FileMatch]]]:
+    """Search `regex` in all the files, using `jobs` threads.
+
+    Yield each file with its matches, as soon as it has been searched (so, in no particular order).
+    Files which can't be read are skipped. If `cancelled` is set, the search stops as soon as possible.
+    """
+
+    def search(path: Path) -> list[FileMatch]:
+        if cancelled is not None and cancelled.is_set():
+            return []
+        try:
+            return search_file(path, regex)
+        except OSError as e:
+            print(f"Can't search {path}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(search, path): path for path in paths}
+        try:
+            for future in as_completed(futures):
+                if cancelled is not None and cancelled.is_set():
+                    break
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def replace_in_file(path: Path, regex: re.Pattern[str], replacement: str, is_regex: bool) -> int:
+    """Replace all the matches of `regex` in the file, and return the number of replacements.
+
+    The file is only written if it was modified, and it is written atomically.
+    """
+    content = path.read_bytes()
+    new_content, count = replace_matches(content, regex, replacement, is_regex, 0, len(content))
+    if count > 0:
+        atomic_write(path, new_content.decode("utf8"))
+    return count
@@ -0,0 +1,319 @@
+"""
+Semantic index of the exercises: answers, tags and python symbols of each question.
+
+Facts are extracted from each question (or each version of a question, when there are several ones)
+using the editor tokenization (see `lexer.py`), and python blocks are extracted like when formatting
+them (using `parse_code_block()`). They are stored in a SQLite database, updated incrementally
+(see `file_index.py`), which can then be queried using a small query language (see `parse_query()`):
+
+    with SemanticIndex(SEMANTIC_INDEX_PATH) as index:
+        index.update(library)
+        results = index.query("answers>6 -tag:ANSWERS_LIST", library)
+"""
+
+import ast
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import NamedTuple, Any
+
+from ptyx_mcq_editor.tools.file_index import FileIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    incorrect INTEGER NOT NULL,
+    neutralized INTEGER NOT NULL,
+    conditional INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_file_id ON questions(file_id);
+CREATE TABLE IF NOT EXISTS tags (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (question_id, tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_tag ON tags(tag);
+CREATE TABLE IF NOT EXISTS symbols (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    -- 1 if the symbol is defined (assigned) in a python block, 0 if it is only used.
+    defined INTEGER NOT NULL,
+    PRIMARY KEY (question_id, name, defined)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name);
+"""
+
+# Columns of the `questions` table which may be compared to an integer in a query.
+# Note that `answers` is not a column, but the total number of answers.
+COUNTERS = {
+    "answers": "(q.correct + q.incorrect + q.neutralized + q.conditional)",
+    "correct": "q.correct",
+    "incorrect": "q.incorrect",
+    "neutralized": "q.neutralized",
+    "conditional": "q.conditional",
+}
+COUNTER_TERM_REGEX = re.compile(r"(?P<counter>\w+)(?P<operator><=|>=|!=|=|<|>)(?P<value>\d+)")
+# Prefix of the variables generated by pTyX when translating extended python syntax.
+PTYX_TMP_VAR_PREFIX = "_tmp_ptyx_"
+SYMBOL_CONDITIONS = {
+    "defines": "defined = 1",
+    "uses": "defined = 0",
+    "symbol": "1",
+}
+
+
+@dataclass
+class QuestionFacts:
+    """Facts about a question (or about a version of a question)."""
+
+    # Line of the question start (or of the `OR` line, for another version), starting from 0.
+    line: int
+    # Index of the version of the question (versions are separated by `OR` lines).
+    version: int = 0
+    correct: int = 0
+    incorrect: int = 0
+    neutralized: int = 0
+    # Answers whose correctness depends on a condition (`?{condition} answer`).
+    conditional: int = 0
+    tags: set[str] = field(default_factory=set)
+    # Python names assigned in python blocks.
+    defined: set[str] = field(default_factory=set)
+    # Python names used in python blocks and in pTyX expressions or variables (like `#{a+1}` or `#a`).
+    used: set[str] = field(default_factory=set)
+
+    @property
+    def answers(self) -> int:
+        return self.correct + self.incorrect + self.neutralized + self.conditional
+
+
+class QueryResult(NamedTuple):
+    path: Path
+    line: int
+    version: int
+    correct: int
+    incorrect: int
+    neutralized: int
+    conditional: int
+
+    @property
+    def answers(self) -> int:
+        return self.correct + self.incorrect + self.neutralized + self.conditional
+
+
+def split_questions(code: str) -> list[tuple[int, str]]:
+    """Return the first line and the code of each question of the document.
+
+    A `.ex` file (or any document without MCQ section) is a single question.
+    Otherwise, questions are the parts of the MCQ section (between `<<<` and `>>>`)
+    starting with `*` or `>` (this mark itself is replaced by a space).
+    """
+    from ptyx_mcq.make.parser_tools import is_mcq_start, is_mcq_end
+    from ptyx.extensions.extended_python import PYTHON_DELIMITER
+
+    lines = code.split("\n")
+    if not any(is_mcq_start(line.rstrip()) for line in lines):
+        return [(0, code)]
+    questions: list[tuple[int, list[str]]] = []
+    inside_mcq = inside_python_block = False
+    for i, line in enumerate(lines):
+        if not inside_mcq:
+            inside_mcq = is_mcq_start(line.rstrip())
+        elif is_mcq_end(line.rstrip()):
+            inside_mcq = False
+        elif re.match(PYTHON_DELIMITER, line):
+            inside_python_block = not inside_python_block
+        elif not inside_python_block and line[:2].rstrip() in ("*", ">"):
+            questions.append((i, [" " + line[1:]]))
+            continue
+        if inside_mcq and questions:
+            questions[-1][1].append(line)
+    return [(start, "\n".join(question_lines)) for start, question_lines in questions]
+
+
+def python_names(code: str) -> tuple[set[str], set[str]]:
+    """Return the names defined and the names used by the python code (or empty sets if it is invalid)."""
+    defined: set[str] = set()
+    used: set[str] = set()
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return defined, used
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            (defined if isinstance(node.ctx, ast.Store) else used).add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            defined.add(node.name)
+        elif isinstance(node, ast.alias):
+            defined.add((node.asname or node.name).split(".")[0])
+    return defined, used
+
+
+def _python_blocks(code: str) -> list[str]:
+    """Return the content of the python blocks, with extended python syntax translated to python."""
+    from ptyx.extensions.extended_python import parse_code_block, parse_extended_python_line
+
+    blocks: list[str] = []
+
+    def collect(start: str, end: str, content: str) -> str:
+        lines = []
+        for line in content.split("\n"):
+            try:
+                lines.append(parse_extended_python_line(line))
+            except SyntaxError:
+                lines.append(line)
+        blocks.append("\n".join(lines))
+        return ""
+
+    parse_code_block(code, collect)
+    return blocks
+
+
+def _question_facts(line: int, code: str) -> list[QuestionFacts]:
+    """Return the facts of each version of the question."""
+    from ptyx_mcq_editor.editor.lexer import Mode, MyLexer, Style, VAR_NAME_REGEX, get_lexicon
+
+    lexicon = get_lexicon()
+    versions = [QuestionFacts(line)]
+    # Code of each version.
+    versions_code: list[list[str]] = [[]]
+    style, mode, previous_mode = Style.DEFAULT, Mode.DEFAULT, Mode.DEFAULT
+    for token in lexicon.tokens_regex.findall(code):
+        old_mode = mode
+        # noinspection PyProtectedMember
+        style, mode = MyLexer._get_token_style_and_mode(token, mode, style, previous_mode, lexicon)
+        if mode != old_mode:
+            previous_mode = old_mode
+        facts = versions[-1]
+        if style == Style.MCQ_OR:
+            versions.append(QuestionFacts(line, version=len(versions)))
+            versions_code.append([])
+        elif style == Style.MCQ_CORRECT_ANSWER and token == "+ ":
+            facts.correct += 1
+        elif style == Style.MCQ_INCORRECT_ANSWER and token == "- ":
+            facts.incorrect += 1
+        elif style == Style.MCQ_NEUTRALIZED_ANSWER and token == "! ":
+            facts.neutralized += 1
+        elif style == Style.PTYX_TAG and token == "?{":
+            facts.conditional += 1
+        elif style == Style.PTYX_TAG and token[1:].rstrip("{").isidentifier():
+            facts.tags.add(token[1:].rstrip("{"))
+        elif style == Style.PTYX_VARIABLE and (m := VAR_NAME_REGEX.match(token)):
+            facts.used.add(re.sub(r"^#(\[[^]]+\])?", "", m.group()))
+        elif mode == Mode.EXPRESSION and style == Style.PYTHON_BLOCK and token.isidentifier():
+            facts.used.add(token)
+        versions_code[-1].append(token)
+        line += token.count("\n")
+        if style == Style.MCQ_OR:
+            versions[-1].line = line - 1
+    for facts, tokens in zip(versions, versions_code):
+        for block in _python_blocks("".join(tokens)):
+            defined, used = python_names(block)
+            facts.defined |= defined
+            facts.used |= used
+        # Remove the variables generated when translating `let` directives.
+        facts.defined = {name for name in facts.defined if not name.startswith(PTYX_TMP_VAR_PREFIX)}
+        facts.used = {name for name in facts.used if not name.startswith(PTYX_TMP_VAR_PREFIX)}
+    return versions
+
+
+def extract_facts(code: str) -> list[QuestionFacts]:
+    """Return the facts of each question of the document (and of each version of a question)."""
+    return [facts for line, question in split_questions(code) for facts in _question_facts(line, question)]
+
+
+def parse_query(query: str) -> tuple[str, list[Any]]:
+    """Convert the query into an SQL condition on the questions `q` and their files `f`, and its parameters.
+
+    A query is a list of terms separated by spaces, which must all be satisfied:
+        - `answers>6`, `correct=0`, `incorrect<=3`, `neutralized!=0`, `conditional>0`:
+          compare the number of answers (of any kind) or of answers of a given kind to an integer
+          (operators: `=`, `!=`, `<`, `<=`, `>`, `>=`),
+        - `tag:ANSWERS_LIST`: the question uses this pTyX tag,
+        - `defines:a`, `uses:a`, `symbol:a`: the question defines (in a python block), uses,
+          or either defines or uses this python name,
+        - `path:algebra`: the path of the file contains this text.
+    A term starting with `-` is negated.
+
+    Raise `ValueError` if the query is invalid.
+    """
+    conditions: list[str] = []
+    parameters: list[Any] = []
+    for term in query.split():
+        negated = term.startswith("-")
+        if negated:
+            term = term[1:]
+        key, _, value = term.partition(":")
+        if m := COUNTER_TERM_REGEX.fullmatch(term):
+            if m.group("counter") not in COUNTERS:
+                raise ValueError(f"Unknown counter '{m.group('counter')}', use one of {', '.join(COUNTERS)}.")
+            condition = f"{COUNTERS[m.group('counter')]} {m.group('operator')} ?"
+            parameters.append(int(m.group("value")))
+        elif key == "tag" and value:
+            condition = "EXISTS (SELECT 1 FROM tags WHERE question_id = q.id AND tag = ?)"
+            parameters.append(value.lstrip("#").upper())
+        elif key in SYMBOL_CONDITIONS and value:
+            condition = (
+                "EXISTS (SELECT 1 FROM symbols WHERE question_id = q.id AND name = ?"
+                f" AND {SYMBOL_CONDITIONS[key]})"
+            )
+            parameters.append(value)
+        elif key == "path" and value:
+            condition = "instr(f.path, ?) > 0"
+            parameters.append(value)
+        else:
+            raise ValueError(f"Invalid query term: '{term}'.")
+        conditions.append(f"NOT {condition}" if negated else condition)
+    return " AND ".join(conditions) or "1", parameters
+
+
+class SemanticIndex(FileIndex):
+    """Index of the answers, tags and python symbols of the questions, stored in a SQLite database."""
+
+    SCHEMA = SCHEMA
+
+    def __enter__(self) -> "SemanticIndex":
+        return self
+
+    def _index_file(self, file_id: int, content: bytes) -> None:
+        for facts in extract_facts(content.decode("utf8", errors="replace")):
+            question_id = self.connection.execute(
+                "INSERT INTO questions (file_id, line, version, correct, incorrect, neutralized, conditional)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_id,
+                    facts.line,
+                    facts.version,
+                    facts.correct,
+                    facts.incorrect,
+                    facts.neutralized,
+                    facts.conditional,
+                ),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO tags (question_id, tag) VALUES (?, ?)",
+                ((question_id, tag) for tag in facts.tags),
+            )
+            self.connection.executemany(
+                "INSERT INTO symbols (question_id, name, defined) VALUES (?, ?, ?)",
+                [(question_id, name, 1) for name in facts.defined]
+                + [(question_id, name, 0) for name in facts.used],
+            )
+
+    def query(self, query: str, root: Path) -> list[QueryResult]:
+        """Return the questions of the files of the directory `root` matching the query.
+
+        The index must be up-to-date (see `update()`). Raise `ValueError` if the query is invalid.
+        """
+        condition, parameters = parse_query(query)
+        prefix = self._prefix(root)
+        rows = self.connection.execute(
+            "SELECT f.path, q.line, q.version, q.correct, q.incorrect, q.neutralized, q.conditional"
+            f" FROM questions q JOIN files f ON q.file_id = f.id"
+            f" WHERE substr(f.path, 1, ?) = ? AND {condition} ORDER BY f.path, q.line",
+            (len(prefix), prefix, *parameters),
+        )
+        return [QueryResult(Path(path), *values) for path, *values in rows]
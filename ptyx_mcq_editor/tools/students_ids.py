@@ -0,0 +1,102 @@
+"""
+Read the CSV file listing the students IDs and names, set in the header of a pTyX file (`ids = path`).
+
+Like in ptyx_mcq, the first column contains the students IDs, and the other ones their names.
+The file is read as a stream: only a summary is kept, even for large files.
+"""
+
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+
+# Maximal number of errors reported in a summary (the other ones are only counted).
+MAX_REPORTED_ERRORS = 5
+
+# Modification time (in ns) and size of a file, used to detect changes.
+FileStamp = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class StudentsSummary:
+    """Summary of a students IDs file: number of students, first and last ones, and errors found."""
+
+    count: int = 0
+    first: str = ""
+    last: str = ""
+    errors: tuple[str, ...] = ()
+    errors_count: int = 0
+    # True if the file doesn't exist.
+    missing: bool = False
+
+    def __str__(self) -> str:
+        if self.missing:
+            return "File not found."
+        lines = [self.first] if self.first else []
+        if self.count > 1:
+            lines += ["⋯", self.last]
+        lines.append(f"{self.count} students")
+        if self.errors_count:
+            lines.append(f"{self.errors_count} errors:")
+            lines += self.errors
+            if self.errors_count > len(self.errors):
+                lines.append("⋯")
+        return "\n".join(lines)
+
+
+def file_stamp(path: Path) -> FileStamp | None:
+    """Return the modification time and the size of the file, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_students_summary(path: Path) -> StudentsSummary:
+    """Read the students IDs file, and check the students IDs.
+
+    All the IDs must have the same length, and an ID can't be shared by students with different names
+    (those are the ptyx_mcq requirements). Empty lines are ignored.
+
+    Raise `OSError`, `UnicodeDecodeError` or `csv.Error` if the file can't be read.
+    """
+    count = 0
+    first = last = ""
+    errors: list[str] = []
+    errors_count = 0
+    names: dict[str, str] = {}
+    id_length: int | None = None
+
+    def error(message: str) -> None:
+        nonlocal errors_count
+        errors_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(f"Line {reader.line_num}: {message}")
+
+    with open(path, newline="") as f:
+        try:
+            dialect: type[csv.Dialect] | csv.Dialect = csv.Sniffer().sniff(f.read(1024))
+        except csv.Error:
+            # Not enough data to detect the dialect (a single column, for example).
+            dialect = csv.excel
+        f.seek(0)
+        reader = csv.reader(f, dialect)
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            student_id = row[0].strip()
+            name = " ".join(cell.strip() for cell in row[1:])
+            count += 1
+            last = f"{student_id} {name}".strip()
+            if count == 1:
+                first = last
+            if not student_id:
+                error("missing student ID.")
+                continue
+            if id_length is None:
+                id_length = len(student_id)
+            elif len(student_id) != id_length:
+                error(f"ID {student_id!r} has {len(student_id)} characters instead of {id_length}.")
+            if names.setdefault(student_id, name) != name:
+                error(f"ID {student_id!r} is already used for {names[student_id]!r}.")
+    return StudentsSummary(count, first, last, tuple(errors), errors_count)
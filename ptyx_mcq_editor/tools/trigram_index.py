@@ -0,0 +1,186 @@
+"""
+Persistent trigram index of the exercises, to search large exercise libraries quickly.
+
+For each indexed file, the index stores the set of its trigrams (all the sequences of 3 bytes,
+in lower case). To search a pattern, the trigrams the matching text must contain are extracted
+from the pattern, and only the files containing all of them are candidates: the other ones can't
+match, so they don't have to be read.
+
+The index is a SQLite database, updated incrementally (see `file_index.py`).
+
+Usage:
+
+    with TrigramIndex(TRIGRAM_INDEX_PATH) as index:
+        index.update(library)
+        paths = index.candidates(re.compile(r"ANSWERS_LIST"), library)
+"""
+
+import re
+from array import array
+from pathlib import Path
+from typing import Iterable
+
+from ptyx_mcq_editor.tools.file_index import FileIndex
+
+try:
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# For each file, its trigrams are stored, to be able to update the posting lists when it changes.
+# For each trigram, the ids of the files containing it are stored as a single blob (a posting list),
+# which is much faster to build and to query than a row for each pair (trigram, file).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_trigrams (
+    file_id INTEGER PRIMARY KEY REFERENCES files(id) ON DELETE CASCADE,
+    trigrams BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER PRIMARY KEY,
+    file_ids BLOB NOT NULL
+);
+"""
+# In case-insensitive searches, those ASCII letters also match non-ASCII characters
+# (`İ` and `ı` for `i`, `K` (Kelvin sign) for `k`, and `ſ` for `s`), so they can't be used to find trigrams.
+CASE_FOLDED_ASCII = frozenset("IiKkSs")
+# Blobs are arrays of unsigned integers, stored in native byte order (the index is a local cache).
+ARRAY_TYPECODE = "I"
+
+
+def trigrams(data: bytes) -> set[int]:
+    """Return the trigrams of `data`, in lower case, each one encoded as an integer."""
+    data = data.lower()
+    return {int.from_bytes(data[i : i + 3], "big") for i in range(len(data) - 2)}
+
+
+def required_literals(regex: re.Pattern[str]) -> list[bytes]:
+    """Return byte strings (UTF-8 encoded) which must appear in any text matched by `regex`.
+
+    Only the literals at the top level of the pattern are taken into account
+    (ignoring alternatives, repetitions and groups), so the result is incomplete, but always correct.
+    In case-insensitive searches, only ASCII characters are taken into account, since the trigrams
+    are only converted to lower case for ASCII characters.
+    """
+    ignore_case = bool(regex.flags & re.IGNORECASE)
+    literals: list[bytes] = []
+    current: list[str] = []
+    for op, value in sre_parse.parse(regex.pattern, regex.flags):
+        if op == sre_parse.LITERAL and not (
+            ignore_case and (value >= 128 or chr(value) in CASE_FOLDED_ASCII)
+        ):
+            current.append(chr(value))
+        else:
+            # `current` must be followed by something unknown.
+            if current:
+                literals.append("".join(current).encode("utf8"))
+            current.clear()
+    if current:
+        literals.append("".join(current).encode("utf8"))
+    return literals
+
+
+def required_trigrams(regex: re.Pattern[str]) -> set[int]:
+    """Return the trigrams which must appear in any file containing a match of `regex`."""
+    result: set[int] = set()
+    for literal in required_literals(regex):
+        result |= trigrams(literal)
+    return result
+
+
+def _to_blob(values: Iterable[int]) -> bytes:
+    return array(ARRAY_TYPECODE, sorted(values)).tobytes()
+
+
+def _from_blob(blob: bytes) -> array:
+    values = array(ARRAY_TYPECODE)
+    values.frombytes(blob)
+    return values
+
+
+class TrigramIndex(FileIndex):
+    """Trigram index of the `.ptyx` and `.ex` files of some directories, stored in a SQLite database."""
+
+    SCHEMA = SCHEMA
+
+    def __init__(self, db_path: Path):
+        super().__init__(db_path)
+        # Changes of the posting lists during an update.
+        self._added: dict[int, list[int]] = {}
+        self._removed: dict[int, set[int]] = {}
+
+    def __enter__(self) -> "TrigramIndex":
+        return self
+
+    def _index_file(self, file_id: int, content: bytes) -> None:
+        file_trigrams = trigrams(content)
+        self.connection.execute(
+            "INSERT INTO file_trigrams (file_id, trigrams) VALUES (?, ?)", (file_id, _to_blob(file_trigrams))
+        )
+        for trigram in file_trigrams:
+            self._added.setdefault(trigram, []).append(file_id)
+
+    def _forget_file(self, file_id: int) -> None:
+        row = self.connection.execute("SELECT trigrams FROM file_trigrams WHERE file_id = ?", (file_id,))
+        for (blob,) in row:
+            for trigram in _from_blob(blob):
+                self._removed.setdefault(trigram, set()).add(file_id)
+
+    def _end_update(self) -> None:
+        for trigram in self._added.keys() | self._removed.keys():
+            row = self.connection.execute(
+                "SELECT file_ids FROM postings WHERE trigram = ?", (trigram,)
+            ).fetchone()
+            file_ids = set() if row is None else set(_from_blob(row[0]))
+            file_ids.difference_update(self._removed.get(trigram, ()))
+            file_ids.update(self._added.get(trigram, ()))
+            if file_ids:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO postings (trigram, file_ids) VALUES (?, ?)",
+                    (trigram, _to_blob(file_ids)),
+                )
+            elif row is not None:
+                self.connection.execute("DELETE FROM postings WHERE trigram = ?", (trigram,))
+        self._added.clear()
+        self._removed.clear()
+
+    def candidates(self, regex: re.Pattern[str], root: Path) -> list[Path]:
+        """Return the files of the directory `root` which may contain a match of `regex`.
+
+        The index must be up-to-date (see `update()`).
+        If no trigram can be extracted from the pattern, all the files of the directory are returned.
+        """
+        required = list(required_trigrams(regex))
+        file_ids: set[int] | None = None
+        if required:
+            blobs = [
+                blob
+                for (blob,) in self.connection.execute(
+                    f"SELECT file_ids FROM postings WHERE trigram IN ({', '.join('?' * len(required))})",
+                    required,
+                )
+            ]
+            if len(blobs) < len(required):
+                # Some trigram doesn't appear anywhere.
+                return []
+            # Start with the shortest posting list, to keep the intersection small.
+            blobs.sort(key=len)
+            file_ids = set(_from_blob(blobs[0]))
+            for blob in blobs[1:]:
+                if not file_ids:
+                    return []
+                file_ids.intersection_update(_from_blob(blob))
+        prefix = self._prefix(root)
+        if file_ids is None:
+            rows = self.connection.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )
+            return sorted(Path(path) for path, in rows)
+        # Don't retrieve all the paths, since there are usually few candidates.
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS candidates (id INTEGER PRIMARY KEY)")
+            self.connection.execute("DELETE FROM candidates")
+            self.connection.executemany(
+                "INSERT INTO candidates (id) VALUES (?)", ((id_,) for id_ in file_ids)
+            )
+            paths = self.connection.execute("SELECT path FROM files JOIN candidates USING (id)").fetchall()
+        return sorted(Path(path) for (path,) in paths if path.startswith(prefix))
@@ -0,0 +1,71 @@
+import json
+import os
+from pathlib import Path
+
+from ptyx_mcq_editor.preview.batch import compile_preview_file, write_json_report, write_junit_report
+from ptyx_mcq_editor.preview.compiler import get_preview_path, prune_preview_cache
+
+EXERCISE = """* What is the value of #a?
+....
+let a in 1..2
+....
++ #a
+- #{a+1}
+"""
+
+
+def test_compile_preview_file(tmp_path):
+    path = tmp_path / "exercise.ex"
+    path.write_text(EXERCISE, encoding="utf8")
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    report = compile_preview_file(path, cache_dir)
+    assert report.status == "passed", report.error
+    assert len(list(cache_dir.glob("exercise-*.tex"))) == 1
+    # Nothing changed, so the previous preview is reused.
+    assert compile_preview_file(path, cache_dir).status == "cached"
+    assert compile_preview_file(path, cache_dir, force=True).status == "passed"
+    # Changing the document number invalidates the preview.
+    assert compile_preview_file(path, cache_dir, doc_id=7).status == "passed"
+
+
+def test_compile_preview_file_with_includes(tmp_path):
+    (tmp_path / "questions").mkdir()
+    question = tmp_path / "questions" / "q.ex"
+    question.write_text(EXERCISE, encoding="utf8")
+    path = tmp_path / "main.ptyx"
+    path.write_text("#LOAD{mcq}\n#SEED{1}\n<<<\n-- questions/q.ex\n>>>\n", encoding="utf8")
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    report = compile_preview_file(path, cache_dir)
+    assert report.status == "passed", report.error
+    assert compile_preview_file(path, cache_dir).status == "cached"
+    # The document didn't change, but an included file did.
+    question.write_text(EXERCISE.replace("What is the value", "Give the value"), encoding="utf8")
+    assert compile_preview_file(path, cache_dir).status == "passed"
+    assert "Give the value" in next(cache_dir.glob("main-*.tex")).read_text(encoding="utf8")
+
+
+def test_reports(tmp_path):
+    path = tmp_path / "exercise.ex"
+    path.write_text(EXERCISE.replace("let a in 1..2", "a = 1/0"), encoding="utf8")
+    reports = [compile_preview_file(path, tmp_path)]
+    assert reports[0].status == "failed"
+    assert "division by zero" in reports[0].error
+    write_json_report(reports, tmp_path / "report.json")
+    assert json.loads((tmp_path / "report.json").read_text())["summary"]["failed"] == 1
+    write_junit_report(reports, tmp_path / "report.xml")
+    assert 'failures="1"' in (tmp_path / "report.xml").read_text()
+
+
+def test_prune_preview_cache(tmp_path):
+    # The previews of "a.ex" are the oldest ones, then those of "b.ex", then those of "c.ex".
+    for i, name in enumerate(("a.ex", "b.ex", "c.ex")):
+        for suffix in ("tex", "pdf", "synctex.gz"):
+            path = get_preview_path(tmp_path, Path(name), suffix)
+            path.write_bytes(100 * b"x")
+            os.utime(path, (i, i))
+    assert prune_preview_cache(tmp_path, 1000) == 0
+    # All the files of a preview are removed together.
+    assert prune_preview_cache(tmp_path, 500) == 6
+    assert sorted(path.name.split("-")[0] for path in tmp_path.iterdir()) == 3 * ["c"]
@@ -1,7 +1,12 @@
+import os
+import subprocess
+import sys
 from multiprocessing import Queue
 from pathlib import Path
 
 from ptyx_mcq_editor.preview.compiler import PreviewCompilerWorker, compile_code
+from ptyx_mcq_editor.tools.compilation_trace import CompilationTrace
+from ptyx_mcq_editor.tools.processes import compilation_context
 
 
 def test_compilation_error(tmp_path):
@@ -17,3 +22,40 @@ def test_compil(tmp_path):
     code = "..............\nt=(4\n...........\n\n+ ok"
     queue = Queue()
     compile_code(queue, code=code, options={})
+
+
+def test_compilation_trace(tmp_path):
+    c = PreviewCompilerWorker(
+        "* Question\n+ yes\n- no\n", doc_path=tmp_path / "ex.ex", doc_id=0, tmp_dir=tmp_path
+    )
+    return_data = c._generate()
+    assert "error" not in return_data
+    stages = return_data["trace"].stages
+    assert list(stages) == [
+        "inject_labels",
+        "wrap_exercise",
+        "process_spawn",
+        "Compiler.parse",
+        "queue_transfer",
+        "tex_write",
+    ]
+    assert all(duration >= 0 for duration in stages.values())
+
+
+def test_compilation_is_reproducible():
+    """The hash seed must be disabled in the compilation process, even if it isn't in the editor one."""
+    python_code = "''.join(sorted('abcdefgh', key=hash))"
+    expected = subprocess.run(
+        [sys.executable, "-c", f"print({python_code})"],
+        env=dict(os.environ, PYTHONHASHSEED="0"),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    ctx = compilation_context()
+    queue = ctx.Queue()
+    process = ctx.Process(target=compile_code, args=(queue, f"#{{{python_code}}}", {}))
+    process.start()
+    assert isinstance(queue.get(), CompilationTrace)
+    assert queue.get().strip() == expected
+    process.join()
@@ -0,0 +1,34 @@
+import json
+
+from ptyx_mcq_editor.tools import compilation_trace
+from ptyx_mcq_editor.tools.compilation_trace import CompilationTrace, append_to_history
+
+
+def test_history(tmp_path, monkeypatch):
+    trace = CompilationTrace()
+    with trace.stage("parse"):
+        pass
+    trace.marks = {"process_start": 10.0, "sent": 12.5}
+    trace.merge_process_trace(
+        CompilationTrace(stages={"Compiler.parse": 1.5}, marks={"process_started": 10.25})
+    )
+    trace.marks["received"] = 12.75
+    trace.add_interval("queue_transfer", "sent", "received")
+    # Missing marks are ignored.
+    trace.add_interval("other", "sent", "missing")
+    assert list(trace.stages) == ["parse", "process_spawn", "Compiler.parse", "queue_transfer"]
+    assert trace.stages["process_spawn"] == 0.25
+    assert trace.stages["queue_transfer"] == 0.25
+    assert "Compiler.parse" in trace.format()
+    history = tmp_path / "history.jsonl"
+    append_to_history(trace, "preview", tmp_path / "ex.ex", failed=False, history_path=history)
+    append_to_history(trace, "publish", tmp_path / "ex.ptyx", failed=True, history_path=history)
+    entries = [json.loads(line) for line in history.read_text(encoding="utf8").splitlines()]
+    assert [entry["kind"] for entry in entries] == ["preview", "publish"]
+    assert entries[1]["status"] == "failed"
+    assert entries[0]["stages"]["Compiler.parse"] == 1.5
+    # History rotation.
+    monkeypatch.setattr(compilation_trace, "MAX_HISTORY_SIZE", 10)
+    append_to_history(trace, "preview", tmp_path / "ex.ex", failed=False, history_path=history)
+    assert len(history.read_text(encoding="utf8").splitlines()) == 1
+    assert len((tmp_path / "history.jsonl.1").read_text(encoding="utf8").splitlines()) == 2
@@ -0,0 +1,80 @@
+import random
+
+from ptyx_mcq_editor.tools.directives_index import LinesIndex, LineKind, classify_line
+
+LINES = [
+    "some text",
+    "=====",
+    "ids = students.csv",
+    "=====",
+    "-- ex1.ex",
+    "!-- ex2.ex",
+    "-- DIR: exercises",
+    "ids = other.csv",
+    "",
+]
+
+
+def test_classify_line():
+    assert [classify_line(line) for line in LINES] == [
+        None,
+        LineKind.DELIMITER,
+        LineKind.STUDENTS_IDS,
+        LineKind.DELIMITER,
+        LineKind.INCLUDE,
+        LineKind.DISABLED_INCLUDE,
+        LineKind.DIRECTORY,
+        LineKind.STUDENTS_IDS,
+        None,
+    ]
+
+
+def test_lines_index():
+    index = LinesIndex()
+    index.reset(LINES)
+    assert index.lines(LineKind.INCLUDE) == [4]
+    assert index.count(LineKind.DISABLED_INCLUDE) == 1
+    assert [i for i in range(len(LINES)) if index.is_directive(i)] == [4, 5, 6]
+    assert index.header() == (2, 2)
+    # The `ids` line after the header is ignored.
+    assert index.students_ids_line() == 2
+
+
+def _apply_random_modification(lines: list[str], index: LinesIndex, rng: random.Random) -> None:
+    """Modify `lines` like Scintilla would, and notify `index`, like the editor does."""
+    line = rng.randrange(len(lines))
+    if rng.random() < 0.5:
+        # Insert some lines in the middle of line `line`.
+        inserted = [rng.choice(LINES) for _ in range(rng.randrange(4))]
+        col = rng.randrange(len(lines[line]) + 1)
+        head, tail = lines[line][:col], lines[line][col:]
+        new_lines = [head, *inserted, tail] if inserted else [lines[line]]
+        lines[line : line + 1] = new_lines
+        index.shift(line, len(new_lines) - 1)
+    else:
+        # Delete some lines, merging the remaining text into line `line`.
+        end = min(len(lines) - 1, line + rng.randrange(4))
+        head = lines[line][: rng.randrange(len(lines[line]) + 1)]
+        tail = lines[end][rng.randrange(len(lines[end]) + 1) :]
+        lines[line : end + 1] = [head + tail]
+        index.shift(line, line - end)
+
+
+def test_lines_index_incremental_updates():
+    rng = random.Random(0)
+    lines = LINES * 3
+    index = LinesIndex()
+    index.reset(lines)
+    for _ in range(500):
+        # Several modifications may happen before the dirty lines are examined again.
+        for _ in range(rng.randrange(1, 4)):
+            _apply_random_modification(lines, index, rng)
+        for i in index.pop_dirty_lines():
+            if i < len(lines):
+                index.set_line(i, lines[i])
+        expected = LinesIndex()
+        expected.reset(lines)
+        for kind in LineKind:
+            assert index.lines(kind) == expected.lines(kind)
+            assert index.count(kind) == expected.count(kind)
+        assert index.students_ids_line() == expected.students_ids_line()
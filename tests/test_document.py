@@ -0,0 +1,19 @@
+from ptyx_mcq_editor.settings import Document
+
+
+def test_document_file_state(tmp_path):
+    path = tmp_path / "exercise.ex"
+    path.write_text("* Question\n+ a\n- b\n", encoding="utf8")
+    doc = Document(path)
+    try:
+        assert doc.is_saved and doc.title == "exercise.ex"
+        # Writing the document does not count as an external modification.
+        doc.write("* Other question\n+ a\n- b\n")
+        assert not doc.refresh_file_state()
+        # File state is cached: deleting the file is only noticed once the state is refreshed.
+        path.unlink()
+        assert doc.is_saved
+        assert doc.refresh_file_state()
+        assert not doc.is_saved and doc.title == "* exercise.ex"
+    finally:
+        doc.on_close()
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from ptyx_mcq_editor.tools.file_tools import atomic_write
+
+
+def test_atomic_write(tmp_path):
+    path = tmp_path / "exercise.ex"
+    atomic_write(path, "* Question\n+ a\n- b\n")
+    assert path.read_text(encoding="utf8") == "* Question\n+ a\n- b\n"
+    path.chmod(0o600)
+    atomic_write(path, "new content")
+    assert path.read_text(encoding="utf8") == "new content"
+    # Permissions are preserved.
+    assert path.stat().st_mode & 0o777 == 0o600
+    # No temporary file left.
+    assert os.listdir(tmp_path) == ["exercise.ex"]
+
+
+def test_atomic_write_symlink(tmp_path):
+    path = tmp_path / "exercise.ex"
+    path.write_text("old content", encoding="utf8")
+    link = tmp_path / "link.ex"
+    link.symlink_to(path)
+    atomic_write(link, "new content")
+    # The link is kept, and the file it points to is updated.
+    assert link.is_symlink()
+    assert path.read_text(encoding="utf8") == "new content"
+    assert sorted(os.listdir(tmp_path)) == ["exercise.ex", "link.ex"]
+
+
+def test_atomic_write_failure(tmp_path):
+    path = tmp_path / "exercise.ex"
+    path.write_text("old content", encoding="utf8")
+    with pytest.raises(UnicodeEncodeError):
+        atomic_write(path, "\udc00", encoding="utf8")
+    # Previous content is left untouched.
+    assert path.read_text(encoding="utf8") == "old content"
+    assert os.listdir(tmp_path) == ["exercise.ex"]
@@ -0,0 +1,76 @@
+import random
+
+from ptyx_mcq_editor.tools.indicator_ranges import IndicatorRanges
+
+
+def _ranges(*ranges: tuple[int, int]) -> IndicatorRanges:
+    indicator_ranges = IndicatorRanges()
+    for start, end in ranges:
+        indicator_ranges.fill(start, end)
+    return indicator_ranges
+
+
+def test_fill_and_clear():
+    ranges = _ranges((10, 20), (30, 40), (20, 25))
+    # Touching ranges are merged.
+    assert list(ranges) == [(10, 25), (30, 40)]
+    ranges.fill(24, 31)
+    assert list(ranges) == [(10, 40)]
+    ranges.clear(15, 20)
+    assert list(ranges) == [(10, 15), (20, 40)]
+    assert ranges.ranges(12, 30) == [(12, 15), (20, 30)]
+    ranges.clear(30)
+    assert list(ranges) == [(10, 15), (20, 30)]
+
+
+def test_diff():
+    ranges = _ranges((10, 20), (30, 40), (50, 60))
+    to_clear, to_fill = ranges.diff([(12, 20), (30, 45)], 0, 55)
+    assert to_clear == [(10, 12), (50, 55)]
+    assert to_fill == [(40, 45)]
+    # Nothing changed inside the window.
+    assert ranges.diff([(0, 20), (30, 40)], 12, 40) == ([], [])
+
+
+def test_on_insert_and_delete():
+    ranges = _ranges((10, 20), (30, 40))
+    # Text inserted at the end or at the start of a range is not part of it.
+    ranges.on_insert(20, 5)
+    ranges.on_insert(35, 5)
+    assert list(ranges) == [(10, 20), (40, 50)]
+    # Text inserted inside a range is.
+    ranges.on_insert(15, 5)
+    assert list(ranges) == [(10, 25), (45, 55)]
+    ranges.on_delete(20, 25)
+    # Both ranges now touch, so they are merged.
+    assert list(ranges) == [(10, 30)]
+    ranges.on_delete(5, 30)
+    assert list(ranges) == []
+
+
+def test_random_modifications():
+    """Compare the ranges with a list of the indicator values of each position."""
+    rng = random.Random(0)
+    ranges = IndicatorRanges()
+    values = [False] * 100
+    for _ in range(2000):
+        position = rng.randrange(len(values) + 1)
+        length = rng.randrange(1, 10)
+        # Indicators can't be set after the end of the document.
+        end = min(position + length, len(values))
+        action = rng.choice(("fill", "clear", "insert", "delete"))
+        if action == "fill":
+            ranges.fill(position, end)
+            values[position:end] = [True] * (end - position)
+        elif action == "clear":
+            ranges.clear(position, end)
+            values[position:end] = [False] * (end - position)
+        elif action == "insert":
+            ranges.on_insert(position, length)
+            inside = 0 < position < len(values) and values[position - 1] and values[position]
+            values[position:position] = [inside] * length
+        else:
+            ranges.on_delete(position, end - position)
+            del values[position:end]
+        expected = [(i, i + 1) for i, value in enumerate(values) if value]
+        assert ranges.diff(expected) == ([], [])
@@ -0,0 +1,54 @@
+import json
+import threading
+
+from ptyx_mcq_editor.tools import instrumentation
+
+
+def test_percentiles():
+    stats = instrumentation.Stats()
+    assert stats.percentile(50) == 0
+    for i in range(1, 101):
+        stats.samples.append(i)
+    assert stats.percentile(50) == 50
+    assert stats.percentile(95) == 95
+    assert stats.percentile(100) == 100
+    assert stats.percentile(0) == 1
+
+
+def test_timed_and_chrome_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    instrumentation.reset()
+    try:
+        with instrumentation.timed("test.block"):
+            pass
+        instrumentation.record("test.path", 0.002, start=1.0)
+        instrumentation.record("test.path", 0.001, start=2.0)
+        stats = instrumentation.get_stats()
+        assert stats["test.block"].count == 1
+        assert stats["test.path"].count == 2
+        assert stats["test.path"].max == 0.002
+        assert "test.path" in instrumentation.format_report()
+        path = tmp_path / "trace.json"
+        assert instrumentation.export_chrome_trace(path) == 3
+        events = json.loads(path.read_text(encoding="utf8"))["traceEvents"]
+        assert events[1] == events[1] | {"name": "test.path", "ph": "X", "ts": 1e6, "dur": 2000}
+    finally:
+        instrumentation.reset()
+
+
+def test_record_from_several_threads():
+    instrumentation.reset()
+    try:
+
+        def record_calls() -> None:
+            for _ in range(10_000):
+                instrumentation.record("test.thread", 0.001)
+
+        threads = [threading.Thread(target=record_calls) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert instrumentation.get_stats()["test.thread"].count == 40_000
+    finally:
+        instrumentation.reset()
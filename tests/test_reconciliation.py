@@ -0,0 +1,41 @@
+import random
+
+from ptyx_mcq_editor.tools.reconciliation import reconcile, Remove, Move, Insert
+
+
+def apply(current: list, operations: list) -> list:
+    current = list(current)
+    for operation in operations:
+        match operation:
+            case Remove(index=i):
+                del current[i]
+            case Move(from_index=i, to_index=j):
+                current.insert(j, current.pop(i))
+            case Insert(index=i, key=key):
+                current.insert(i, key)
+    return current
+
+
+def test_reconcile():
+    assert reconcile([1, 2, 3], [1, 2, 3]) == []
+    assert reconcile([1, 2, 3], [1, 3]) == [Remove(1)]
+    assert reconcile([1, 2, 3], [1, 2, 4, 3]) == [Insert(2, 4)]
+    # A single move is enough, whatever the direction.
+    assert reconcile([1, 2, 3, 4], [2, 3, 4, 1]) == [Move(0, 3)]
+    assert reconcile([1, 2, 3, 4], [4, 1, 2, 3]) == [Move(3, 0)]
+
+
+def test_reconcile_random():
+    rng = random.Random(0)
+    for _ in range(500):
+        current = rng.sample(range(30), rng.randint(0, 20))
+        wanted = rng.sample(range(30), rng.randint(0, 20))
+        assert apply(current, reconcile(current, wanted)) == wanted
+
+
+def test_reconcile_many_items():
+    rng = random.Random(0)
+    current = list(range(5000))
+    wanted = current[1000:] + list(range(5000, 5500))
+    rng.shuffle(wanted)
+    assert apply(current, reconcile(current, wanted)) == wanted
@@ -1,6 +1,13 @@
 from ptyx.errors import ErrorInformation
 
-from ptyx_mcq_editor.tools.python_code_tools import format_each_python_block, check_each_python_block
+from ptyx_mcq_editor.tools import python_code_tools
+from ptyx_mcq_editor.tools.file_tools import collect_files
+from ptyx_mcq_editor.tools.python_code_tools import (
+    format_each_python_block,
+    check_each_python_block,
+    lint_files,
+    extended_python_ruff_format_many,
+)
 
 
 def test_ruff_formater():
@@ -76,3 +83,49 @@ return y
             extra={"ruff-error-code": None},
         )
     ]
+
+
+def test_lint_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "ok.ex").write_text("* Question\n....\nlet a in 1..5\n....\n+ #a\n- b\n", encoding="utf8")
+    (tmp_path / "sub" / "bad.ex").write_text(
+        "* Question\n\n....\nimport os\n....\n+ a\n- b\n\n....\nx = (\n....\n", encoding="utf8"
+    )
+    results = lint_files(collect_files([tmp_path]))
+    assert results[tmp_path / "ok.ex"] == []
+    errors = results[tmp_path / "sub" / "bad.ex"]
+    # Rows must be relative to the document, even when there are several python blocks.
+    assert [(info.row, info.extra["ruff-error-code"]) for info in errors] == [(3, "F401"), (9, None)]
+
+
+def test_ruff_formater_single_invocation(monkeypatch):
+    calls: list[list[str]] = []
+
+    def spy(codes):
+        calls.append(list(codes))
+        return extended_python_ruff_format_many(codes)
+
+    monkeypatch.setattr(python_code_tools, "extended_python_ruff_format_many", spy)
+    code = "".join(f"Question {i}\n........\nx={i}\nlet a,b in 1..{i + 5}\n........\n\n" for i in range(10))
+    formatted = format_each_python_block(code)
+    assert formatted.count("let a, b in 1..") == 10
+    assert len(calls) == 1 and len(calls[0]) == 10
+    # Formatting again does not call ruff: formatted blocks are cached.
+    assert format_each_python_block(formatted) == formatted
+    assert len(calls) == 2 and calls[1] == []
+
+
+def test_ruff_formater_cache_pruned_concurrently(monkeypatch):
+    cached = "Question\n........\ny = 1\n........\n"
+    code = cached + "Other question\n........\nz=2\n........\n"
+    expected = format_each_python_block(code)
+    python_code_tools._formatted_blocks_cache.clear()
+    format_each_python_block(cached)
+
+    def format_and_prune(codes):
+        # Meanwhile, the save thread prunes the cache.
+        python_code_tools._formatted_blocks_cache.clear()
+        return extended_python_ruff_format_many(codes)
+
+    monkeypatch.setattr(python_code_tools, "extended_python_ruff_format_many", format_and_prune)
+    assert format_each_python_block(code) == expected
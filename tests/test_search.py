@@ -0,0 +1,291 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from ptyx_mcq_editor.tools import file_index
+from ptyx_mcq_editor.tools.duplicates import (
+    BANDS,
+    SIGNATURE_SIZE,
+    DuplicatesFinder,
+    normalize_code,
+    signature,
+    similarity,
+    find_duplicates,
+    find_similar,
+)
+from ptyx_mcq_editor.tools.search import (
+    search_pattern,
+    finditer_bytes,
+    replace_matches,
+    include_tree,
+    search_files,
+    replace_in_file,
+)
+from ptyx_mcq_editor.tools.semantic_index import SemanticIndex, extract_facts
+from ptyx_mcq_editor.tools.trigram_index import TrigramIndex, required_literals
+
+
+def test_search_pattern():
+    text = "Un été, 2*x et 2*xy. Été !"
+
+    def find(to_find: str, is_regex=False, case_sensitive=False, whole_words=False) -> list[tuple[int, int]]:
+        pattern, flags = search_pattern(to_find, is_regex, case_sensitive, whole_words)
+        return list(finditer_bytes(re.compile(pattern, flags), text))
+
+    # Positions are bytes positions, like Scintilla ones.
+    assert find("été") == [(3, 8), (23, 28)]
+    assert find("été", case_sensitive=True) == [(3, 8)]
+    # Accented letters are word characters.
+    assert find("été", whole_words=True) == [(3, 8), (23, 28)]
+    assert find("t", whole_words=True) == []
+    assert find("2*x") == [(10, 13), (17, 20)]
+    assert find("2*x", whole_words=True) == [(10, 13)]
+    assert find("un") == [(0, 2)]
+    assert find("un", case_sensitive=True) == []
+    assert find(r"\d", is_regex=True) == [(10, 11), (17, 18)]
+    # Search between bytes positions.
+    assert list(finditer_bytes(re.compile("É"), text, 0, 23)) == []
+    assert list(finditer_bytes(re.compile("É"), text, 23)) == [(23, 25)]
+
+
+def test_replace_matches():
+    text = b"a1 a2 a3 b4"
+    regex = re.compile(r"a(\d)")
+    assert replace_matches(text, regex, r"<\1>", True, 0, len(text)) == (b"<1> <2> <3> b4", 3)
+    # Backslashes must not be interpreted if the search is not a regex one.
+    assert replace_matches(text, regex, r"<\1>", False, 0, len(text)) == (b"<\\1> <\\1> <\\1> b4", 3)
+    # Search in the selection only.
+    assert replace_matches(text, regex, "x", True, 3, 8) == (b"x x", 2)
+    # Case-insensitive and whole-word searches handle accented letters.
+    text = "Été, été, étés.".encode("utf8")
+    pattern, flags = search_pattern("été", is_regex=False, case_sensitive=False, whole_words=True)
+    assert replace_matches(text, re.compile(pattern, flags), "hiver", False, 0, len(text)) == (
+        "hiver, hiver, étés.".encode("utf8"),
+        2,
+    )
+
+
+def test_include_tree(tmp_path: Path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.ex").write_text("A", encoding="utf8")
+    (tmp_path / "b.ex").write_text("B", encoding="utf8")
+    (tmp_path / "sub" / "c.ex").write_text("C", encoding="utf8")
+    (tmp_path / "sub" / "d.ptyx").write_text("-- c.ex\n", encoding="utf8")
+    main = tmp_path / "main.ptyx"
+    main.write_text("-- a.ex\n!-- b.ex\n-- missing.ex\n-- DIR: sub\n-- d.ptyx\n", encoding="utf8")
+    # Disabled includes are searched too, and included .ptyx files are searched recursively.
+    assert [path.relative_to(tmp_path.resolve()) for path in include_tree(main)] == [
+        Path("main.ptyx"),
+        Path("a.ex"),
+        Path("b.ex"),
+        Path("sub/d.ptyx"),
+        Path("sub/c.ex"),
+    ]
+
+
+def test_search_and_replace_in_files(tmp_path: Path):
+    first = tmp_path / "first.ex"
+    first.write_text("Un été\nÉté, été !\n", encoding="utf8")
+    second = tmp_path / "second.ex"
+    second.write_text("Nothing here.\n", encoding="utf8")
+    empty = tmp_path / "empty.ex"
+    empty.write_text("", encoding="utf8")
+    regex = re.compile("été", re.IGNORECASE)
+    results = dict(search_files([first, second, empty], regex, jobs=2))
+    assert results[second] == results[empty] == []
+    # Lines start from 0, and columns are numbers of characters.
+    assert [(match.line, match.column, match.line_text) for match in results[first]] == [
+        (0, 3, "Un été"),
+        (1, 0, "Été, été !"),
+        (1, 5, "Été, été !"),
+    ]
+    # Positions are numbers of bytes.
+    assert [(match.start, match.end) for match in results[first]] == [(3, 8), (9, 14), (16, 21)]
+    assert replace_in_file(first, regex, "hiver", is_regex=False) == 3
+    assert first.read_text(encoding="utf8") == "Un hiver\nhiver, hiver !\n"
+    assert replace_in_file(second, regex, "hiver", is_regex=False) == 0
+
+
+def test_required_literals():
+    def literals(pattern: str, flags=0) -> list[bytes]:
+        return required_literals(re.compile(pattern, flags))
+
+    assert literals(r"ANSWERS_LIST") == [b"ANSWERS_LIST"]
+    assert literals(r"\bab(c|d)efg\d+xyz") == [b"ab", b"efg", b"xyz"]
+    assert literals(r"abc|def") == []
+    assert literals(re.escape("2*x+1")) == [b"2*x+1"]
+    assert literals("été") == ["été".encode("utf8")]
+    # Non-ASCII characters, and ASCII letters matching non-ASCII ones, can't be used if case is ignored.
+    assert literals("hétéro", re.IGNORECASE) == [b"h", b"t", b"ro"]
+    assert literals("answers", re.IGNORECASE) == [b"an", b"wer"]
+
+
+def test_trigram_index(tmp_path: Path):
+    library = tmp_path / "library"
+    (library / "sub").mkdir(parents=True)
+    first = library / "first.ex"
+    first.write_text("Compute the derivative.", encoding="utf8")
+    second = library / "sub" / "second.ex"
+    second.write_text("Compute the integral.", encoding="utf8")
+    (library / "notes.txt").write_text("derivative", encoding="utf8")
+    with TrigramIndex(tmp_path / "index.sqlite") as index:
+        assert index.update(library) == (2, 0)
+        # Nothing changed.
+        assert index.update(library) == (0, 0)
+
+        def candidates(pattern: str, flags=0) -> list[str]:
+            return [path.name for path in index.candidates(re.compile(pattern, flags), library)]
+
+        assert candidates("derivative") == ["first.ex"]
+        assert candidates("DERIVATIVE", re.IGNORECASE) == ["first.ex"]
+        assert candidates(r"the (derivative|integral)") == ["first.ex", "second.ex"]
+        assert candidates("limit") == []
+        # Too short to use the index.
+        assert candidates("de") == ["first.ex", "second.ex"]
+        assert candidates("derivative", re.IGNORECASE) == ["first.ex"]
+        second.write_text("Compute the derivative again.", encoding="utf8")
+        first.unlink()
+        assert index.update(library) == (1, 1)
+        assert candidates("derivative") == ["second.ex"]
+        # Other directories are not affected.
+        assert index.candidates(re.compile("derivative"), library / "sub") == [second.resolve()]
+
+
+def test_trigram_index_unreadable_file(tmp_path: Path, monkeypatch):
+    library = tmp_path / "library"
+    library.mkdir()
+    first = library / "a.ex"
+    first.write_text("Compute the derivative.", encoding="utf8")
+    second = library / "b.ex"
+    with TrigramIndex(tmp_path / "index.sqlite") as index:
+        assert index.update(library) == (1, 0)
+        # `b.ex` is deleted after the files were listed, so `stat()` fails (even on the first file).
+        monkeypatch.setattr(file_index, "collect_files", lambda _: iter([second.resolve(), first.resolve()]))
+        assert index.update(library) == (0, 0)
+        assert index.candidates(re.compile("derivative"), library) == [first.resolve()]
+
+
+EX_FILE = """\
+What is #a + #b?
+........................................
+let a, b in 1..5
+values = [a + b, a - b]
+........................................
+
+- #{a - b}
++ #{values[0]}
+! none
+
+OR
+
+Which value is correct?
+#ANSWERS_LIST{all_answers}{correct_answers}
+"""
+
+
+def test_extract_facts():
+    first, second = extract_facts(EX_FILE)
+    assert (first.line, first.version, first.correct, first.incorrect, first.neutralized) == (0, 0, 1, 1, 1)
+    assert first.answers == 3
+    assert first.defined == {"a", "b", "values"}
+    assert {"a", "b", "values"} <= first.used
+    assert (second.line, second.version, second.answers) == (10, 1, 0)
+    assert second.tags == {"ANSWERS_LIST"}
+    # Questions of a .ptyx file.
+    code = "#LOAD{mcq}\n<<<\n-- intro.ex\n* First\n+ yes\n- no\n\n*\nSecond\n- 1\n+ 2\n- 3\n>>>\n"
+    assert [(facts.line, facts.answers) for facts in extract_facts(code)] == [(3, 2), (7, 3)]
+
+
+def test_semantic_index(tmp_path: Path):
+    library = tmp_path / "library"
+    library.mkdir()
+    first = library / "first.ex"
+    first.write_text(EX_FILE, encoding="utf8")
+    (library / "second.ex").write_text("Question\n+ a\n- b\n- c\n- d\n", encoding="utf8")
+    with SemanticIndex(tmp_path / "index.sqlite") as index:
+        assert index.update(library) == (2, 0)
+
+        def query(text: str) -> list[tuple[str, int]]:
+            return [(result.path.name, result.line) for result in index.query(text, library)]
+
+        assert query("answers>3") == [("second.ex", 0)]
+        assert query("correct=0") == [("first.ex", 10)]
+        assert query("correct=0 -tag:answers_list") == []
+        assert query("defines:values") == query("uses:a") == [("first.ex", 0)]
+        assert query("path:sec") == [("second.ex", 0)]
+        with pytest.raises(ValueError):
+            query("answers>>3")
+        first.unlink()
+        assert index.update(library) == (0, 1)
+        assert query("") == [("second.ex", 0)]
+
+
+DUPLICATE_EX = """\
+* Compute $#a+#b$, knowing that $a$ and $b$ are two random integers between 1 and 9.
+.................................
+let a, b in 1..9
+all_answers = list(range(2, 19))
+correct_answers = [a + b]  # Only one correct answer.
+.................................
+#ANSWERS_LIST{all_answers}{correct_answers}
+"""
+
+
+def test_normalize_code():
+    # Whitespace, comments and quotes don't matter.
+    code = "Some  text\n\n...........\nx = 'a' # comment\n...........\n"
+    other = 'Some text\n...........\nx = "a"\n...........\n'
+    assert normalize_code(code) == normalize_code(other)
+
+
+def test_duplicates_finder_not_transitive():
+    """An exercise similar to the second exercise of a cluster, but not to the first one."""
+    rows = SIGNATURE_SIZE // BANDS
+    a = SIGNATURE_SIZE * [0]
+    # Same first bands as `a`, only the last two ones differ.
+    b = a[: -2 * rows] + 2 * rows * [1]
+    # Only the first band is shared with `a` and `b` (one bin differs in each other band).
+    c = [2 if i % rows == 0 and i >= rows else value for i, value in enumerate(b)]
+    finder = DuplicatesFinder(threshold=0.8)
+    assert similarity(tuple(a), tuple(b)) >= 0.8
+    assert similarity(tuple(b), tuple(c)) >= 0.8 > similarity(tuple(a), tuple(c))
+    for name, sig in zip("abc", (a, b, c)):
+        finder.add(Path(name), tuple(sig))
+    assert finder.clusters() == [[Path("a"), Path("b"), Path("c")]]
+
+
+def test_find_duplicates(tmp_path: Path):
+    (tmp_path / "a").mkdir()
+    paths = [
+        tmp_path / "a/original.ex",
+        tmp_path / "copy.ex",
+        tmp_path / "modified.ex",
+        tmp_path / "other.ex",
+    ]
+    paths[0].write_text(DUPLICATE_EX, encoding="utf8")
+    # Exact copy, reformatted.
+    paths[1].write_text(DUPLICATE_EX.replace("  # Only one correct answer.", "").replace(" ", "  "))
+    # Near duplicate.
+    paths[2].write_text(DUPLICATE_EX.replace("two random integers", "two integers chosen randomly"))
+    # Different exercise, sharing some code.
+    paths[3].write_text(
+        DUPLICATE_EX.replace("Compute $#a+#b$", "What is the product of $#a$ and $#b$ ?")
+        .replace("a + b", "a * b")
+        .replace("range(2, 19)", "range(1, 82)")
+        .replace("knowing that", "where")
+    )
+    signatures = [signature(path.read_text()) for path in paths]
+    original, copy, modified, other = signatures
+    assert original is not None and modified is not None and other is not None
+    assert original == copy
+    assert similarity(original, modified) > 0.8
+    assert similarity(original, other) < 0.6
+    finder = find_duplicates(paths, jobs=1)
+    assert finder.clusters() == [sorted(paths[:3])]
+    assert find_similar(DUPLICATE_EX, paths[1:], jobs=1) == [
+        (paths[1], 1.0),
+        (paths[2], pytest.approx(0.85, abs=0.1)),
+    ]
+    # Too short to be compared.
+    assert signature("Hello") is None
@@ -0,0 +1,32 @@
+from ptyx_mcq_editor.tools.students_ids import StudentsSummary, read_students_summary, file_stamp
+
+
+def test_read_students_summary(tmp_path):
+    path = tmp_path / "students.csv"
+    path.write_text("12345678;Doe;John\n\n23456789;Martin;Alice\n34567890;Smith;Bob\n")
+    summary = read_students_summary(path)
+    assert summary == StudentsSummary(3, "12345678 Doe John", "34567890 Smith Bob")
+    assert str(summary) == "12345678 Doe John\n⋯\n34567890 Smith Bob\n3 students"
+    assert file_stamp(path) is not None
+    assert file_stamp(tmp_path / "missing.csv") is None
+    assert str(StudentsSummary(missing=True)) == "File not found."
+
+
+def test_read_students_summary_errors(tmp_path):
+    path = tmp_path / "students.csv"
+    path.write_text(
+        "12345678,Doe John\n"
+        "1234567,Martin Alice\n"
+        # Same ID, same name: accepted.
+        "12345678,Doe John\n"
+        "12345678,Smith Bob\n"
+        ",Nobody\n"
+    )
+    summary = read_students_summary(path)
+    assert summary.count == 5
+    assert summary.errors == (
+        "Line 2: ID '1234567' has 7 characters instead of 8.",
+        "Line 4: ID '12345678' is already used for 'Doe John'.",
+        "Line 5: missing student ID.",
+    )
+    assert str(summary).endswith("5 students\n3 errors:\n" + "\n".join(summary.errors))
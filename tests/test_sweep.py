@@ -0,0 +1,45 @@
+from ptyx_mcq_editor.cli import run_command
+from ptyx_mcq_editor.preview.sweep import parse_seeds, sweep
+
+EXERCISE = """* What is the value of #a?
+....
+let a in 1..2
+....
++ #a
+- #{a+1}
+"""
+
+
+def test_parse_seeds():
+    assert parse_seeds("1-3, 8,2") == [1, 2, 3, 8]
+    assert parse_seeds("") == []
+
+
+def test_sweep(tmp_path):
+    path = tmp_path / "exercise.ex"
+    path.write_text(EXERCISE, encoding="utf8")
+    results = sweep(EXERCISE, path, list(range(1, 7)), tmp_path / "output", jobs=2)
+    assert [result.doc_id for result in results] == list(range(1, 7))
+    assert all(result.error == "" for result in results)
+    assert all((tmp_path / "output" / f"exercise-{i}.tex").is_file() for i in range(1, 7))
+    # `a` can only take 2 values, so there must be duplicates.
+    assert sum(result.duplicate_of is not None for result in results) >= 4
+
+
+def test_sweep_error(tmp_path):
+    path = tmp_path / "exercise.ex"
+    code = EXERCISE.replace("let a in 1..2", "a = 1/0")
+    results = sweep(code, path, [1, 2], tmp_path)
+    assert [result.status for result in results] == ["ERROR", "ERROR"]
+    assert "division by zero" in results[0].error
+
+
+def test_sweep_command(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "sub" / "exercise.ex"
+    path.parent.mkdir()
+    path.write_text(EXERCISE, encoding="utf8")
+    # The output directory is relative to the current directory, not to the document one.
+    assert run_command(["sweep", "sub/exercise.ex", "--seeds", "1-2", "--output-dir", "out"]) == 0
+    assert (tmp_path / "out" / "exercise-2.tex").is_file()
+    assert run_command(["sweep", "sub/exercise.ex", "--seeds", "1-x"]) == 2